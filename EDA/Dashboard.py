@@ -3,21 +3,34 @@ import pandas as pd
 import seaborn as sns
 import matplotlib.pyplot as plt
 import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data_generation"))
+from data_store import read_groups
 
 # -------- SETTINGS --------
 DATA_FOLDER = r"..\data\groups"  # Pas dit pad aan naar jouw folder
+PARQUET_FOLDER = os.path.join("..", "data", "parquet", "groups")  # aangemaakt met `python data_generation/data_store.py convert`
 
 # -------- LOAD DATA --------
 @st.cache_data
 def load_data(data_folder):
-    csv_files = [f for f in os.listdir(data_folder) if f.endswith(".csv")]
-    df_list = []
-    for f in csv_files:
-        group_name = os.path.splitext(f)[0]
-        df_tmp = pd.read_csv(os.path.join(data_folder, f))
-        df_tmp['group'] = group_name
-        df_list.append(df_tmp)
-    df = pd.concat(df_list, ignore_index=True)
+    if os.path.exists(PARQUET_FOLDER):
+        # De Parquet-dataset laadt in één keer en heeft al getypeerde kolommen
+        df = read_groups(PARQUET_FOLDER)
+        df['group'] = "group_" + df['group'].astype(str)
+        # Categoricals terug naar tekst, zodat de kolomselectie hieronder ze blijft vinden
+        for col in df.select_dtypes(include='category').columns:
+            df[col] = df[col].astype(object)
+    else:
+        csv_files = [f for f in os.listdir(data_folder) if f.endswith(".csv")]
+        df_list = []
+        for f in csv_files:
+            group_name = os.path.splitext(f)[0]
+            df_tmp = pd.read_csv(os.path.join(data_folder, f))
+            df_tmp['group'] = group_name
+            df_list.append(df_tmp)
+        df = pd.concat(df_list, ignore_index=True)
     
     # Probeer birthdate om te zetten naar leeftijd
     if 'birthdate' in df.columns:
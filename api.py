@@ -1,30 +1,242 @@
-from fastapi import FastAPI, UploadFile, File
-from transformers import pipeline, AutoTokenizer, AutoModelForSeq2SeqLM
+import os
 import json
+import time
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, UploadFile, File, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse, PlainTextResponse
 
-app = FastAPI()
+from model_registry import ModelRegistry, DEFAULT_MODEL_PATH, PRELOAD_MODELS
+from inference_scheduler import InferenceScheduler, MAX_INPUT_TOKENS, SUMMARY_GENERATION_KWARGS, DETERMINISTIC_GENERATION_KWARGS
+from chat_ingest import (ChatFormatError, iter_upload_chunks, build_input_from_chunks, build_windows_from_chunks,
+                         split_texts_into_windows)
+from summary_cache import SummaryCache, ContentHasher, make_cache_key
+from api_metrics import ApiMetrics
 
-def preprocces_json(data):
-    chat_text = "\n".join([msg["text"] for msg in data])
-    input_text = "Summarize the following conversation. Give mainly the opinions of the people:\n" + chat_text
-    return input_text
+# Kortere deelsamenvattingen, zodat meerdere ervan samen in één venster passen
+MAP_LENGTH_KWARGS = {"max_length": 128, "min_length": 30}
+REDUCE_INSTRUCTION = "Summarize the following partial summaries of one conversation. Give mainly the opinions of the people:\n"
+LONG_CHAT_MAX_WINDOWS = int(os.getenv("LONG_CHAT_MAX_WINDOWS", "64"))
+
+registry = ModelRegistry()
+metrics = ApiMetrics()
+scheduler = InferenceScheduler(registry, metrics=metrics)
+summary_cache = SummaryCache()
+
+
+@asynccontextmanager
+async def lifespan(app):
+    for model_path in PRELOAD_MODELS:
+        try:
+            await run_in_threadpool(registry.load, model_path)
+        except Exception as e:
+            print(f"Warning: could not preload model {model_path}: {e}")
+    await scheduler.start()
+    yield
+    await scheduler.stop()
+    print(metrics.report())
+
+
+app = FastAPI(lifespan=lifespan)
+
+
+async def get_model(model_path, loader=registry.get):
+    try:
+        return await run_in_threadpool(loader, model_path)
+    except OSError as e:
+        raise HTTPException(status_code=404, detail=f"Model not found: {model_path} ({e})")
+
+
+async def summarize_windows(model_path, windows, generation_kwargs, max_input_tokens):
+    # Alle vensters tegelijk indienen, zodat de scheduler ze samen in batches uitvoert
+    return await asyncio.gather(*[scheduler.submit(model_path, window, generation_kwargs, max_input_tokens) for window in windows])
+
+
+async def summarize_long_chat(windows, model_path, tokenizer, window_tokens, generation_kwargs):
+    """
+    Map-reduce samenvatting voor chats die langer zijn dan het modelvenster.
+    Elk venster wordt samengevat en daarna worden de deelsamenvattingen samengevat
+    totdat er één samenvatting over is.
+    """
+    map_generation_kwargs = {**generation_kwargs, **MAP_LENGTH_KWARGS}
+    timings = {}
+    start_time = time.perf_counter()
+    if len(windows) == 1:
+        summaries = await summarize_windows(model_path, windows, generation_kwargs, window_tokens)
+    else:
+        summaries = await summarize_windows(model_path, windows, map_generation_kwargs, window_tokens)
+    timings["map_seconds"] = round(time.perf_counter() - start_time, 3)
+
+    start_time = time.perf_counter()
+    reduce_levels = 0
+    while len(summaries) > 1:
+        reduce_levels += 1
+        reduce_windows = split_texts_into_windows(summaries, tokenizer, window_tokens, REDUCE_INSTRUCTION)
+        if len(reduce_windows) >= len(summaries):
+            # Geen voortgang meer mogelijk; alles in één venster en de tokenizer laten afkappen
+            reduce_windows = [REDUCE_INSTRUCTION + "\n".join(summaries)]
+        level_kwargs = generation_kwargs if len(reduce_windows) == 1 else map_generation_kwargs
+        summaries = await summarize_windows(model_path, reduce_windows, level_kwargs, window_tokens)
+    timings["reduce_seconds"] = round(time.perf_counter() - start_time, 3)
+
+    return {"summary": summaries[0], "reduce_levels": reduce_levels, "timings": timings}
+
+
+async def ingest_chat(chunks, tokenizer, max_input_tokens, long_chat=False):
+    """Leest een chat in en geeft de modelinput(s), ingest-statistieken en de content-hash terug."""
+    hasher = ContentHasher()
+    start_time = time.perf_counter()
+    try:
+        if long_chat:
+            inputs, ingest_stats = await build_windows_from_chunks(
+                chunks, tokenizer, max_input_tokens, LONG_CHAT_MAX_WINDOWS, hasher=hasher
+            )
+            if not inputs:
+                raise HTTPException(status_code=400, detail="Chat upload contains no messages")
+        else:
+            input_text, ingest_stats = await build_input_from_chunks(chunks, tokenizer, max_input_tokens, hasher=hasher)
+            inputs = [input_text]
+    except ChatFormatError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    ingest_seconds = time.perf_counter() - start_time
+    metrics.observe("summarize_ingest_seconds", ingest_seconds, long_chat=long_chat)
+    return {
+        "inputs": inputs,
+        "stats": ingest_stats,
+        "content_hash": hasher.hexdigest(),
+        "ingest_seconds": round(ingest_seconds, 3),
+    }
+
+
+async def summarize_ingested(chat, model_path, tokenizer, max_input_tokens, long_chat=False, deterministic=False, use_cache=False):
+    with metrics.span("summarize", long_chat=long_chat):
+        result = await _summarize_ingested(chat, model_path, tokenizer, max_input_tokens, long_chat, deterministic, use_cache)
+    if use_cache or deterministic:
+        metrics.inc("summarize_cache_lookups_total", result="hit" if result["cached"] else "miss")
+    return result
+
+
+async def _summarize_ingested(chat, model_path, tokenizer, max_input_tokens, long_chat=False, deterministic=False, use_cache=False):
+    generation_kwargs = DETERMINISTIC_GENERATION_KWARGS if deterministic else SUMMARY_GENERATION_KWARGS
+
+    # Met do_sample=True is elke samenvatting anders, dus alleen cachen als de aanroeper daar expliciet om vraagt
+    cache_key = None
+    if use_cache or not generation_kwargs["do_sample"]:
+        cache_key = make_cache_key(chat["content_hash"], model_path, generation_kwargs,
+                                   long_chat=long_chat, max_input_tokens=max_input_tokens, backend=registry.backend)
+        cached = await run_in_threadpool(summary_cache.get, cache_key)
+        if cached is not None:
+            return {**cached, "cached": True}
+
+    if long_chat:
+        result = await summarize_long_chat(chat["inputs"], model_path, tokenizer, max_input_tokens, generation_kwargs)
+        result = {"summary": result.pop("summary"), **chat["stats"], **result}
+        result["timings"] = {"ingest_seconds": chat["ingest_seconds"], **result["timings"]}
+    else:
+        summary = await scheduler.submit(model_path, chat["inputs"][0], generation_kwargs, max_input_tokens)
+        result = {"summary": summary, **chat["stats"]}
+
+    if cache_key is not None:
+        await run_in_threadpool(summary_cache.put, cache_key, result)
+    return {**result, "cached": False}
+
+
+async def summarize_chunks(chunks, model_path, max_input_tokens, long_chat=False, deterministic=False, use_cache=False):
+    entry = await get_model(model_path)
+    if max_input_tokens is None:
+        max_input_tokens = min(entry.tokenizer.model_max_length, MAX_INPUT_TOKENS)
+    chat = await ingest_chat(chunks, entry.tokenizer, max_input_tokens, long_chat)
+    return await summarize_ingested(chat, model_path, entry.tokenizer, max_input_tokens, long_chat, deterministic, use_cache)
 
 @app.post("/summarize/")
-async def summarize(file: UploadFile = File(...), model_path: str = "Testing/bartsummarizer"):
-    contents = await file.read()
-    data = json.loads(contents)
-    input_text = preprocces_json(data)
-    tokenizer = AutoTokenizer.from_pretrained(model_path)
-    model = AutoModelForSeq2SeqLM.from_pretrained(model_path)
-    summarizer = pipeline("summarization", model=model, tokenizer=tokenizer, device=-1)
-    summary = summarizer(
-        input_text,
-        max_length=248,
-        min_length=50,
-        do_sample=True,
-        num_beams=4
-    )[0]["summary_text"]
-    return {"summary": summary}
+async def summarize(file: UploadFile = File(...), model_path: str = DEFAULT_MODEL_PATH, max_input_tokens: int = None,
+                    long_chat: bool = False, deterministic: bool = False, cache: bool = False):
+    return await summarize_chunks(iter_upload_chunks(file), model_path, max_input_tokens, long_chat, deterministic, cache)
+
+@app.post("/summarize/stream/")
+async def summarize_stream(request: Request, model_path: str = DEFAULT_MODEL_PATH, max_input_tokens: int = None,
+                           long_chat: bool = False, deterministic: bool = False, cache: bool = False):
+    """Leest de chat (JSON-array of JSONL) direct uit de request body, zonder multipart-upload."""
+    return await summarize_chunks(request.stream(), model_path, max_input_tokens, long_chat, deterministic, cache)
+
+@app.post("/summarize/batch/")
+async def summarize_batch(files: list[UploadFile] = File(...), model_path: str = DEFAULT_MODEL_PATH, max_input_tokens: int = None,
+                          long_chat: bool = False, deterministic: bool = False, cache: bool = False):
+    """
+    Vat meerdere chats in één request samen. De chats worden eerst ingelezen en op lengte gesorteerd,
+    zodat de scheduler batches met weinig padding vormt. Resultaten worden als JSONL teruggestuurd
+    zodra ze klaar zijn.
+    """
+    entry = await get_model(model_path)
+    if max_input_tokens is None:
+        max_input_tokens = min(entry.tokenizer.model_max_length, MAX_INPUT_TOKENS)
+
+    chats = []
+    for file in files:
+        try:
+            chats.append((file.filename, await ingest_chat(iter_upload_chunks(file), entry.tokenizer, max_input_tokens, long_chat)))
+        except HTTPException as e:
+            chats.append((file.filename, e))
+    chats.sort(key=lambda item: 0 if isinstance(item[1], HTTPException) else sum(len(text) for text in item[1]["inputs"]))
+
+    async def run(filename, chat):
+        if isinstance(chat, HTTPException):
+            return {"file": filename, "error": chat.detail}
+        try:
+            result = await summarize_ingested(chat, model_path, entry.tokenizer, max_input_tokens, long_chat, deterministic, cache)
+            return {"file": filename, **result}
+        except Exception as e:
+            return {"file": filename, "error": str(e)}
+
+    # In gesorteerde volgorde indienen, zodat chats van gelijke lengte samen in de wachtrij staan
+    tasks = [asyncio.create_task(run(filename, chat)) for filename, chat in chats]
+
+    async def stream_results():
+        for task in asyncio.as_completed(tasks):
+            yield json.dumps(await task, ensure_ascii=False) + "\n"
+
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
+
+
+@app.get("/cache/")
+async def cache_stats():
+    return summary_cache.stats()
+
+@app.post("/cache/clear")
+async def clear_cache():
+    summary_cache.clear()
+    return summary_cache.stats()
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    """Latency, wachttijd, tokens en cache-hits in het Prometheus text format."""
+    return PlainTextResponse(metrics.prometheus_text(), media_type="text/plain; version=0.0.4")
+
+@app.get("/metrics/report/")
+async def metrics_report():
+    return {"report": metrics.report(), **metrics.snapshot()}
+
+@app.get("/models/")
+async def list_models():
+    return registry.list_models()
+
+@app.get("/scheduler/")
+async def scheduler_stats():
+    return scheduler.stats()
+
+@app.post("/models/load")
+async def load_model(model_path: str):
+    entry = await get_model(model_path, loader=registry.load)
+    return entry.info()
+
+@app.post("/models/unload")
+async def unload_model(model_path: str):
+    if not registry.unload(model_path):
+        raise HTTPException(status_code=404, detail=f"Model not loaded: {model_path}")
+    return {"unloaded": model_path}
 
 # uvicorn api:app --reload
-# http://127.0.0.1:8000/docs
\ No newline at end of file
+# curl -X POST --data-binary @data/chat_logs/chatlog_topic_002_20250605_110618.json http://127.0.0.1:8000/summarize/stream/
+# http://127.0.0.1:8000/docs
+# SUMMARIZER_BACKEND=onnx SUMMARY_CACHE_DB=summary_cache.sqlite MODEL_MEMORY_BUDGET_MB=4096 PRELOAD_MODELS=Testing/bartsummarizer MAX_BATCH_SIZE=8 MAX_BATCH_WAIT_MS=25 uvicorn api:app
@@ -0,0 +1,30 @@
+import time
+from contextlib import contextmanager
+
+from data_generation.metrics_core import MetricsCore
+
+
+class ApiMetrics(MetricsCore):
+    """
+    Metrics van de API en de InferenceScheduler, op dezelfde basis en met dezelfde metricnamen als
+    data_generation/metrics.py. De API wordt via /metrics gescraped en schrijft zelf geen bestanden.
+    """
+    @contextmanager
+    def span(self, name, **labels):
+        """Meet de duur van een stap als histogram <name>_seconds en telt <name>_total per uitkomst."""
+        start_time = time.perf_counter()
+        outcome = "ok"
+        try:
+            yield
+        except BaseException:
+            outcome = "error"
+            raise
+        finally:
+            self.observe(f"{name}_seconds", time.perf_counter() - start_time, **labels)
+            self.inc(f"{name}_total", outcome=outcome, **labels)
+
+    def report(self):
+        counters, histograms = self.collect()
+        lines = [f"API report ({time.time() - self.started_at:.1f}s)"]
+        lines.extend(self.step_report_lines(counters, histograms))
+        return "\n".join(lines)
@@ -0,0 +1,114 @@
+import os
+import glob
+import json
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from model_registry import ModelRegistry, DEFAULT_MODEL_PATH
+from inference_scheduler import generate_batch, MAX_INPUT_TOKENS, SUMMARY_GENERATION_KWARGS, DETERMINISTIC_GENERATION_KWARGS
+from chat_ingest import ChatInputBuilder
+
+
+def load_done_ids(output_path):
+    """
+    Leest de ids die al in het outputbestand staan, zodat een afgebroken run verder kan.
+    Een half geschreven laatste regel (door een crash) wordt weggehaald.
+    """
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path, "rb+") as f:
+        data = f.read()
+        if data and not data.endswith(b"\n"):
+            f.truncate(data.rfind(b"\n") + 1)
+            data = data[:data.rfind(b"\n") + 1]
+    for line in data.decode("utf-8").splitlines():
+        try:
+            done.add(json.loads(line)["id"])
+        except (json.JSONDecodeError, KeyError):
+            continue
+    return done
+
+
+def build_input(messages, tokenizer, max_tokens):
+    builder = ChatInputBuilder(tokenizer, max_tokens)
+    for message in messages:
+        builder.add(message["text"])
+        if builder.is_full():
+            break
+    return builder.build(), builder.num_tokens
+
+
+def batched(items, batch_size):
+    for i in range(0, len(items), batch_size):
+        yield items[i:i + batch_size]
+
+
+def summarize_files(paths, output_path, model_path=DEFAULT_MODEL_PATH, batch_size=8, workers=1,
+                    generation_kwargs=SUMMARY_GENERATION_KWARGS, max_input_tokens=None):
+    """
+    Vat alle chatbestanden samen en schrijft elk resultaat direct als regel naar output_path.
+    De chats worden op tokenlengte gesorteerd en in batches over een pool van workers verdeeld.
+    """
+    done = load_done_ids(output_path)
+    todo = [path for path in paths if path not in done]
+    print(f"{len(done)} chats already summarized, {len(todo)} to go")
+    if not todo:
+        return
+
+    entry = ModelRegistry().get(model_path)
+    tokenizer, model = entry.tokenizer, entry.model
+    if max_input_tokens is None:
+        max_input_tokens = min(tokenizer.model_max_length, MAX_INPUT_TOKENS)
+
+    items = []
+    for path in todo:
+        with open(path, "r", encoding="utf-8") as f:
+            messages = json.load(f)
+        input_text, num_tokens = build_input(messages, tokenizer, max_input_tokens)
+        items.append({"id": path, "input_text": input_text, "input_tokens": num_tokens})
+    # Gesorteerd op lengte, zodat elke batch zo min mogelijk padding bevat
+    items.sort(key=lambda item: item["input_tokens"])
+
+    def run(batch):
+        start_time = time.perf_counter()
+        summaries = generate_batch(tokenizer, model, [item["input_text"] for item in batch], generation_kwargs, max_input_tokens)
+        return batch, summaries, time.perf_counter() - start_time
+
+    start_time_total = time.perf_counter()
+    written = 0
+    with open(output_path, "a", encoding="utf-8") as out, ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(run, batch) for batch in batched(items, batch_size)]
+        for future in as_completed(futures):
+            batch, summaries, duration = future.result()
+            for item, summary in zip(batch, summaries):
+                record = {"id": item["id"], "model_path": model_path, "input_tokens": item["input_tokens"], "summary": summary}
+                out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            out.flush()
+            written += len(batch)
+            print(f"Summarized batch of {len(batch)} chats in {duration:.2f} seconds ({written}/{len(items)})")
+
+    duration_minutes = (time.perf_counter() - start_time_total) / 60
+    print(f"All chats summarized in {duration_minutes:.2f} minutes, results in {output_path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize chat logs in bulk.")
+    parser.add_argument("--input", default="data/chat_logs/*.json", help="glob pattern of chat log files")
+    parser.add_argument("--output", default="data/summaries.jsonl")
+    parser.add_argument("--model-path", default=DEFAULT_MODEL_PATH)
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--max-input-tokens", type=int, default=None)
+    parser.add_argument("--deterministic", action="store_true", help="use beam search without sampling")
+    args = parser.parse_args()
+
+    generation_kwargs = DETERMINISTIC_GENERATION_KWARGS if args.deterministic else SUMMARY_GENERATION_KWARGS
+    paths = sorted(glob.glob(args.input))
+    summarize_files(paths, args.output, args.model_path, args.batch_size, args.workers,
+                    generation_kwargs, args.max_input_tokens)
+
+
+if __name__ == "__main__":
+    main()
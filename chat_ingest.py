@@ -0,0 +1,199 @@
+import json
+import codecs
+
+SUMMARY_INSTRUCTION = "Summarize the following conversation. Give mainly the opinions of the people:\n"
+CHUNK_SIZE = 64 * 1024
+
+
+class ChatFormatError(ValueError):
+    pass
+
+
+async def iter_upload_chunks(upload, chunk_size=CHUNK_SIZE):
+    """Leest een UploadFile in stukken in plaats van in één keer."""
+    while True:
+        chunk = await upload.read(chunk_size)
+        if not chunk:
+            break
+        yield chunk
+
+
+async def iter_chat_messages(chunks):
+    """
+    Parseert berichten incrementeel uit een stroom van bytes.
+    Ondersteunt een JSON-array van berichten en JSONL (één bericht per regel).
+    Er wordt nooit meer dan het huidige, nog onvolledige bericht in de buffer gehouden.
+    """
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder("utf-8-sig")()
+    buffer = ""
+    pos = 0
+    mode = None
+    eof = False
+    chunk_iter = chunks.__aiter__()
+
+    async def fill():
+        nonlocal buffer, pos, eof
+        try:
+            chunk = await chunk_iter.__anext__()
+            buffer = buffer[pos:] + utf8.decode(chunk)
+        except StopAsyncIteration:
+            buffer = buffer[pos:] + utf8.decode(b"", final=True)
+            eof = True
+        pos = 0
+
+    while True:
+        while pos < len(buffer) and buffer[pos] in " \t\r\n":
+            pos += 1
+        if pos >= len(buffer):
+            if eof:
+                if mode == "array":
+                    raise ChatFormatError("Unexpected end of JSON array")
+                return
+            await fill()
+            continue
+
+        if mode is None:
+            if buffer[pos] == "[":
+                mode = "array"
+                pos += 1
+            else:
+                mode = "jsonl"
+            continue
+
+        if mode == "array":
+            if buffer[pos] == ",":
+                pos += 1
+                continue
+            if buffer[pos] == "]":
+                return
+            try:
+                message, pos = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError as e:
+                if eof:
+                    raise ChatFormatError(f"Invalid JSON in chat upload: {e}")
+                await fill()
+                continue
+            yield message
+        else:
+            line_end = buffer.find("\n", pos)
+            if line_end == -1 and not eof:
+                await fill()
+                continue
+            line = buffer[pos:] if line_end == -1 else buffer[pos:line_end]
+            pos = len(buffer) if line_end == -1 else line_end + 1
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ChatFormatError(f"Invalid JSONL line in chat upload: {e}")
+
+
+class ChatInputBuilder():
+    """Bouwt de modelinput bericht voor bericht op en houdt het aantal tokens bij."""
+    def __init__(self, tokenizer, max_tokens, instruction=SUMMARY_INSTRUCTION):
+        self.tokenizer = tokenizer
+        self.max_tokens = max_tokens
+        self.parts = [instruction]
+        self.num_tokens = self.count_tokens(instruction)
+        self.num_messages = 0
+
+    def count_tokens(self, text):
+        return len(self.tokenizer(text, add_special_tokens=False)["input_ids"])
+
+    def is_full(self):
+        return self.num_tokens >= self.max_tokens
+
+    def fits(self, num_tokens):
+        return self.num_tokens + num_tokens <= self.max_tokens
+
+    def add(self, text, num_tokens=None):
+        if num_tokens is None:
+            # +1 voor de newline tussen berichten
+            num_tokens = self.count_tokens(text) + 1
+        if self.num_messages:
+            self.parts.append("\n")
+        self.parts.append(text)
+        self.num_tokens += num_tokens
+        self.num_messages += 1
+
+    def build(self):
+        return "".join(self.parts)
+
+
+async def iter_message_texts(chunks):
+    messages = iter_chat_messages(chunks)
+    try:
+        async for message in messages:
+            if not isinstance(message, dict) or "text" not in message:
+                raise ChatFormatError("Every chat message must be an object with a 'text' field")
+            yield message["text"]
+    finally:
+        await messages.aclose()
+
+
+async def build_input_from_chunks(chunks, tokenizer, max_tokens, hasher=None):
+    """
+    Leest berichten totdat het tokenbudget vol is en geeft de modelinput terug.
+    Het laatste bericht mag het budget overschrijden; de tokenizer kapt dat later af.
+    Als er een hasher is meegegeven, wordt die bijgewerkt met elk gebruikt bericht.
+    """
+    builder = ChatInputBuilder(tokenizer, max_tokens)
+    texts = iter_message_texts(chunks)
+    try:
+        async for text in texts:
+            if hasher is not None:
+                hasher.update(text)
+            builder.add(text)
+            if builder.is_full():
+                break
+    finally:
+        await texts.aclose()
+    return builder.build(), {"messages_used": builder.num_messages, "input_tokens": builder.num_tokens, "budget_reached": builder.is_full()}
+
+
+def split_texts_into_windows(texts, tokenizer, window_tokens, instruction=SUMMARY_INSTRUCTION):
+    """
+    Verdeelt teksten over vensters van maximaal window_tokens tokens, zonder een tekst op te splitsen.
+    Een tekst die op zichzelf al te lang is krijgt een eigen venster.
+    """
+    windows = []
+    builder = ChatInputBuilder(tokenizer, window_tokens, instruction)
+    for text in texts:
+        num_tokens = builder.count_tokens(text) + 1
+        if builder.num_messages and not builder.fits(num_tokens):
+            windows.append(builder.build())
+            builder = ChatInputBuilder(tokenizer, window_tokens, instruction)
+        builder.add(text, num_tokens)
+    if builder.num_messages:
+        windows.append(builder.build())
+    return windows
+
+
+async def build_windows_from_chunks(chunks, tokenizer, window_tokens, max_windows, hasher=None):
+    """
+    Leest de hele chat en verdeelt de berichten over vensters op berichtgrenzen.
+    Na max_windows vensters wordt er gestopt met lezen, zodat de latency begrensd blijft.
+    """
+    windows = []
+    num_messages = 0
+    budget_reached = False
+    builder = ChatInputBuilder(tokenizer, window_tokens)
+    texts = iter_message_texts(chunks)
+    try:
+        async for text in texts:
+            num_tokens = builder.count_tokens(text) + 1
+            if builder.num_messages and not builder.fits(num_tokens):
+                windows.append(builder.build())
+                builder = ChatInputBuilder(tokenizer, window_tokens)
+                if len(windows) >= max_windows:
+                    budget_reached = True
+                    break
+            if hasher is not None:
+                hasher.update(text)
+            builder.add(text, num_tokens)
+            num_messages += 1
+    finally:
+        await texts.aclose()
+    if builder.num_messages:
+        windows.append(builder.build())
+    return windows, {"messages_used": num_messages, "windows": len(windows), "budget_reached": budget_reached}
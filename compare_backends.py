@@ -0,0 +1,90 @@
+import json
+import time
+import argparse
+import pandas as pd
+import evaluate
+from transformers import AutoTokenizer
+
+from inference_backends import BACKENDS, load_seq2seq_model, estimate_model_bytes
+from inference_scheduler import generate_batch
+
+# Zelfde instellingen als de ROUGE-evaluatie in Training_and_eval.ipynb
+EVAL_GENERATION_KWARGS = {"max_length": 248, "min_length": 10, "do_sample": False}
+
+
+def load_eval_data(path, limit):
+    with open(path, "r", encoding="utf-8") as f:
+        rows = [json.loads(line) for line in f]
+    return rows[-limit:] if limit else rows
+
+
+def evaluate_backend(model_path, backend, tokenizer, chats, references, batch_size, rouge):
+    start_time = time.perf_counter()
+    model = load_seq2seq_model(model_path, backend)
+    load_seconds = time.perf_counter() - start_time
+
+    # Latency: één chat per keer
+    latencies = []
+    predictions = []
+    for chat in chats:
+        start_time = time.perf_counter()
+        predictions.extend(generate_batch(tokenizer, model, [chat], EVAL_GENERATION_KWARGS))
+        latencies.append(time.perf_counter() - start_time)
+
+    # Throughput: gebatchte generatie over dezelfde chats
+    start_time = time.perf_counter()
+    for i in range(0, len(chats), batch_size):
+        generate_batch(tokenizer, model, chats[i:i + batch_size], EVAL_GENERATION_KWARGS)
+    batched_seconds = time.perf_counter() - start_time
+
+    scores = rouge.compute(predictions=predictions, references=references)
+    latencies_series = pd.Series(latencies)
+    return {
+        "backend": backend,
+        "size_mb": round(estimate_model_bytes(model) / (1024 * 1024), 1),
+        "load_s": round(load_seconds, 2),
+        "p50_latency_s": round(latencies_series.quantile(0.5), 3),
+        "p95_latency_s": round(latencies_series.quantile(0.95), 3),
+        "chats_per_s": round(len(chats) / batched_seconds, 2),
+        "rouge1": round(scores["rouge1"], 4),
+        "rouge2": round(scores["rouge2"], 4),
+        "rougeL": round(scores["rougeL"], 4),
+        "rougeLsum": round(scores["rougeLsum"], 4),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare ROUGE parity and CPU latency of the summarizer backends.")
+    parser.add_argument("--model-path", default="./bart-summarizer")
+    parser.add_argument("--data", default="model_training_and_eval/samengevoegd_met_samenvattingen_local.jsonl")
+    parser.add_argument("--limit", type=int, default=50, help="number of chats to evaluate (0 = all)")
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--backends", default=",".join(BACKENDS))
+    args = parser.parse_args()
+
+    rows = load_eval_data(args.data, args.limit)
+    chats = [row["chat"] for row in rows]
+    references = [row["summary"] for row in rows]
+    tokenizer = AutoTokenizer.from_pretrained(args.model_path)
+    rouge = evaluate.load("rouge")
+
+    results = []
+    for backend in args.backends.split(","):
+        print(f"\nEvaluating {args.model_path} with backend {backend}")
+        try:
+            results.append(evaluate_backend(args.model_path, backend, tokenizer, chats, references, args.batch_size, rouge))
+        except ImportError as e:
+            print(f"Skipping {backend}: {e}")
+
+    df_results = pd.DataFrame(results)
+    if not df_results.empty and "torch" in df_results["backend"].values:
+        # Verschil ten opzichte van de fp32 PyTorch baseline
+        baseline = df_results[df_results["backend"] == "torch"].iloc[0]
+        df_results["rougeL_delta"] = (df_results["rougeL"] - baseline["rougeL"]).round(4)
+        df_results["speedup"] = (df_results["chats_per_s"] / baseline["chats_per_s"]).round(2)
+    print("\n=== Backend vergelijking ===")
+    print(df_results.to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,64 +1,247 @@
 import os
 import time
 import datetime
-import ollama
-from google import genai
-from google.genai import types
-from google.genai.errors import ClientError
-from dotenv import load_dotenv
+import threading
 
 from custom_exceptions import DailyLimitException
+from rate_limiter import get_rate_limiter
+from ollama_pool import get_ollama_pool
+from streaming import get_stream_stats
+from response_cache import get_response_cache, cache_key, cache_params
+from llm_backends import backend_from_env
+from metrics import get_metrics, estimate_tokens
+
+_gemini_client = None
+_gemini_client_lock = threading.Lock()
+
+MAX_RATE_LIMIT_RETRIES = 5
+
+
+def get_gemini_client():
+    """
+    De gedeelde genai.Client, pas bij de eerste Gemini-call gemaakt. Zo hoeft een script dat alleen
+    hulpfuncties importeert (of een worker die lokaal genereert) de SDK niet te laden en geen API key te hebben.
+    De .env (met GEMINI_API_KEY) wordt ook pas hier gelezen.
+    """
+    global _gemini_client
+    with _gemini_client_lock:
+        if _gemini_client is None:
+            from dotenv import load_dotenv
+            from google import genai
+            load_dotenv()
+            _gemini_client = genai.Client(api_key=os.getenv("GEMINI_API_KEY"))
+        return _gemini_client
+
+
+def usage_tokens(usage, prompt_text, response_text):
+    """(tokens in, tokens uit) volgens Gemini's usage_metadata, anders geschat uit de tekst."""
+    tokens_in = getattr(usage, "prompt_token_count", None) if usage else None
+    tokens_out = getattr(usage, "candidates_token_count", None) if usage else None
+    return (tokens_in if tokens_in is not None else estimate_tokens(prompt_text),
+            tokens_out if tokens_out is not None else estimate_tokens(response_text))
+
+
+def daily_quota_exceeded(details):
+    """True als een 429 van Gemini over de dagquota gaat: een violation met "PerDay" in quotaId of quotaMetric."""
+    try:
+        error_details = details["error"]["details"]
+    except (KeyError, TypeError):
+        return False
+    for detail in error_details:
+        for violation in detail.get("violations", []):
+            if "PerDay" in violation.get("quotaId", "") or "PerDay" in violation.get("quotaMetric", ""):
+                return True
+    return False
+
+
+def gemini_schema(schema):
+    """JSON-schema naar de vorm die Gemini verwacht: dezelfde structuur, maar types in hoofdletters."""
+    if isinstance(schema, dict):
+        return {key: value.upper() if key == "type" and isinstance(value, str) else gemini_schema(value) for key, value in schema.items()}
+    if isinstance(schema, list):
+        return [gemini_schema(value) for value in schema]
+    return schema
 
-load_dotenv()
-API_KEY = os.getenv("GEMINI_API_KEY")
-client = genai.Client(api_key=API_KEY)
 
 class agent():
-    def __init__(self, role, local_model="deepseek-r1:7b"):
+    def __init__(self, role, local_model="deepseek-r1:7b", backend=None):
         self.role = role
+        # Een LLMBackend (zie llm_backends.py) vervangt Gemini en Ollama, bijvoorbeeld de MockBackend in benchmarks
+        self.backend = backend if backend is not None else backend_from_env()
         self.api_model = "gemini-2.0-flash-lite"
         self.local_model = local_model
         self.api_daily_limit_date = None 
-        self.api_daily_limit = 1500
+        self.response_cache = get_response_cache()
 
-    def generate_with_api(self, prompt):
-        try:
-            response = client.models.generate_content(
-                    model=self.api_model,
-                    config=types.GenerateContentConfig(system_instruction=self.role),
-                    contents=prompt
-                )
-            return response.text
-        except ClientError as e:
+    @property
+    def rate_limiter(self):
+        """De gedeelde Gemini rate limiter; pas bij de eerste Gemini-call aangemaakt (die opent de SQLite-database)."""
+        return get_rate_limiter("gemini")
+
+    @property
+    def api_daily_limit(self):
+        return self.rate_limiter.requests_per_day
+
+    def system_instruction(self, system=None):
+        """De rol van de agent, eventueel aangevuld met een vaste context (zoals een persona) die per call gelijk blijft."""
+        if not system:
+            return self.role
+        return f"{self.role}\n\n{system.strip()}"
+
+    def model_for(self, backend):
+        if self.backend is not None and backend == self.backend.name:
+            return self.backend.model
+        return self.api_model if backend == "gemini" else self.local_model
+
+    def backend_order(self):
+        """De backends in de volgorde waarin ze nu gebruikt worden."""
+        if self.backend is not None:
+            return [self.backend.name]
+        return ["ollama", "gemini"] if self.api_daily_limit_date == datetime.date.today() else ["gemini", "ollama"]
+
+    def cache_key(self, backend, prompt, system, params):
+        return cache_key(backend, self.model_for(backend), self.system_instruction(system), prompt, params)
+
+    def cache_response(self, backend, prompt, system, params, response):
+        self.response_cache.put(self.cache_key(backend, prompt, system, params), backend, self.model_for(backend), response)
+        return response
+
+    def generation_config(self, system=None, response_schema=None):
+        """Met een response_schema antwoordt Gemini met JSON volgens dat schema."""
+        from google.genai import types
+        if response_schema is None:
+            return types.GenerateContentConfig(system_instruction=self.system_instruction(system))
+        return types.GenerateContentConfig(
+            system_instruction=self.system_instruction(system),
+            response_mime_type="application/json",
+            response_schema=gemini_schema(response_schema),
+        )
+
+    def generate_with_api(self, prompt, system=None, stop_condition=None, strip_reasoning=False, response_schema=None):
+        from google.genai.errors import ClientError
+        metrics = get_metrics()
+        streaming = stop_condition is not None or strip_reasoning
+        prompt_text = f"{self.system_instruction(system)}{prompt}"
+        for attempt in range(MAX_RATE_LIMIT_RETRIES + 1):
+            # Wacht vooraf op een vrije plek in de gedeelde quota; gooit DailyLimitException als de dag op is
+            wait_start = time.perf_counter()
+            self.rate_limiter.acquire()
+            queue_wait = time.perf_counter() - wait_start
+            call_start = time.perf_counter()
             try:
-                daily_limit_reached = (int(e.details['error']['details'][0]['violations'][-1]['quotaValue']) == 1500)
-                if daily_limit_reached:
+                if streaming:
+                    collector = get_stream_stats().new_collector("gemini", self.api_model, stop_condition, strip_reasoning)
+                    response_text = self.stream_with_api(prompt, system, collector, response_schema)
+                    tokens_in = collector.prompt_tokens if collector.prompt_tokens is not None else estimate_tokens(prompt_text)
+                    tokens_out = collector.token_count
+                else:
+                    response = get_gemini_client().models.generate_content(
+                            model=self.api_model,
+                            config=self.generation_config(system, response_schema),
+                            contents=prompt
+                        )
+                    response_text = response.text
+                    tokens_in, tokens_out = usage_tokens(getattr(response, "usage_metadata", None), prompt_text, response_text)
+                metrics.record_llm_call("gemini", self.api_model, time.perf_counter() - call_start, tokens_in, tokens_out, queue_wait)
+                return self.cache_response("gemini", prompt, system, cache_params(stop_condition, strip_reasoning, response_schema), response_text)
+            except ClientError as e:
+                metrics.record_llm_call("gemini", self.api_model, time.perf_counter() - call_start, queue_wait=queue_wait, outcome="client_error")
+                if daily_quota_exceeded(e.details):
+                    self.rate_limiter.exhaust_day()
                     raise DailyLimitException("Daily limit reached")
-                retry_delay = int(e.details['error']['details'][2]['retryDelay'][:-1])
+                try:
+                    retry_delay = int(e.details['error']['details'][2]['retryDelay'][:-1])
+                except Exception:
+                    metrics.record_fallback("gemini", "ollama", "client_error")
+                    return self.generate_locally(prompt, system, stop_condition, strip_reasoning, response_schema)
                 print(f"Rate limit exceeded. Retrying after {retry_delay} seconds.")
-                time.sleep(retry_delay + 1)
-                return self.generate_with_api(prompt)
-                
-            except Exception as e:
-                response = self.generate_locally(prompt)
-                return response
+                metrics.record_retry("gemini", "rate_limit")
+                self.rate_limiter.backoff(retry_delay + 1)
+        metrics.record_fallback("gemini", "ollama", "retries_exhausted")
+        return self.generate_locally(prompt, system, stop_condition, strip_reasoning, response_schema)
+
+    def stream_with_api(self, prompt, system, collector, response_schema=None):
+        """Streamt het Gemini-antwoord in de collector en breekt de stream af zodra de stopconditie voldaan is."""
+        collector.start()
+        stream = get_gemini_client().models.generate_content_stream(
+                model=self.api_model,
+                config=self.generation_config(system, response_schema),
+                contents=prompt
+            )
+        try:
+            for chunk in stream:
+                usage = getattr(chunk, "usage_metadata", None)
+                if usage and usage.candidates_token_count:
+                    collector.tokens = usage.candidates_token_count
+                if usage and getattr(usage, "prompt_token_count", None):
+                    collector.prompt_tokens = usage.prompt_token_count
+                if chunk.text and collector.feed(chunk.text):
+                    break
+        finally:
+            if hasattr(stream, "close"):
+                stream.close()
+        collector.finish()
+        get_stream_stats().record("gemini", self.api_model, collector)
+        return collector.text
+
+    def quota(self):
+        return self.rate_limiter.remaining()
 
-    def generate_locally(self, prompt):
-        return ollama.generate(prompt=prompt, system=self.role, model=self.local_model, stream=False)["response"]
+    def generate_locally(self, prompt, system=None, stop_condition=None, strip_reasoning=False, response_schema=None):
+        # Via de gedeelde pool: het model blijft geladen en threads kunnen tegelijk genereren
+        pool = get_ollama_pool(self.local_model)
+        if stop_condition is None and not strip_reasoning:
+            response_text = pool.generate(prompt, system=self.system_instruction(system), response_format=response_schema)
+        else:
+            collector = get_stream_stats().new_collector("ollama", self.local_model, stop_condition, strip_reasoning)
+            pool.stream(prompt, self.system_instruction(system), collector, response_format=response_schema).result()
+            get_stream_stats().record("ollama", self.local_model, collector)
+            response_text = collector.text
+        return self.cache_response("ollama", prompt, system, cache_params(stop_condition, strip_reasoning, response_schema), response_text)
 
-    def generate(self, prompt):
+    def generate_with_backend(self, prompt, system=None, stop_condition=None, strip_reasoning=False, response_schema=None):
+        backend = self.backend
+        call_start = time.perf_counter()
+        if stop_condition is None and not strip_reasoning:
+            response_text = backend.generate(prompt, self.system_instruction(system), response_schema)
+        else:
+            collector = get_stream_stats().new_collector(backend.name, backend.model, stop_condition, strip_reasoning)
+            backend.stream(prompt, self.system_instruction(system), collector, response_schema)
+            get_stream_stats().record(backend.name, backend.model, collector)
+            response_text = collector.text
+        get_metrics().record_llm_call(backend.name, backend.model, time.perf_counter() - call_start,
+                                      estimate_tokens(f"{self.system_instruction(system)}{prompt}"), estimate_tokens(response_text))
+        return self.cache_response(backend.name, prompt, system, cache_params(stop_condition, strip_reasoning, response_schema), response_text)
+
+    def generate_uncached(self, prompt, system=None, stop_condition=None, strip_reasoning=False, response_schema=None):
+        if self.backend is not None:
+            return self.generate_with_backend(prompt, system, stop_condition, strip_reasoning, response_schema)
         today = datetime.date.today()
+        if self.api_daily_limit_date == today:
+            get_metrics().record_fallback("gemini", "ollama", "daily_limit")
+            return self.generate_locally(prompt, system, stop_condition, strip_reasoning, response_schema)
+        try:
+            return self.generate_with_api(prompt, system, stop_condition, strip_reasoning, response_schema)
+        except DailyLimitException:
+            print(f"Daily limit reached for the Gemini API ({self.api_daily_limit} requests per day). Switching to local generation for the remainder of today.\n")
+            self.api_daily_limit_date = today
+            get_metrics().record_fallback("gemini", "ollama", "daily_limit")
+            return self.generate_locally(prompt, system, stop_condition, strip_reasoning, response_schema)
+
+    def generate(self, prompt, system=None, stop_condition=None, strip_reasoning=False, response_schema=None):
+        """
+        stop_condition (zie streaming.stop_at_marker) en strip_reasoning zetten streaming aan: de call
+        stopt zodra de conditie voldaan is en <think>-blokken worden onderweg weggegooid.
+        Met response_schema (een JSON-schema) antwoorden Gemini en Ollama met JSON volgens dat schema.
+        Antwoorden komen eerst uit de response cache (zie LLM_CACHE_MODE): van de backend die nu aan
+        de beurt is en anders van de andere.
+        """
         start_time = time.perf_counter()
 
-        if self.api_daily_limit_date == today:
-            result = self.generate_locally(prompt)
-        else:
-            try:
-                result = self.generate_with_api(prompt)
-            except DailyLimitException:
-                print("Daily limit reached for the Gemini API (1500 requests per day). Switching to local generation for the remainder of today.\n")
-                self.api_daily_limit_date = today
-                result = self.generate_locally(prompt)
+        params = cache_params(stop_condition, strip_reasoning, response_schema)
+        result = self.response_cache.lookup([self.cache_key(backend, prompt, system, params) for backend in self.backend_order()])
+        if result is None:
+            result = self.generate_uncached(prompt, system, stop_condition, strip_reasoning, response_schema)
 
         end_time = time.perf_counter()
         duration_seconds = end_time - start_time
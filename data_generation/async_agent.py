@@ -0,0 +1,195 @@
+import os
+import time
+import asyncio
+import datetime
+import threading
+import weakref
+
+from agent import get_gemini_client, usage_tokens, daily_quota_exceeded
+from custom_exceptions import DailyLimitException
+from rate_limiter import get_rate_limiter
+from ollama_pool import get_ollama_pool
+from response_cache import get_response_cache, cache_key, cache_params
+from llm_backends import backend_from_env
+from metrics import get_metrics, estimate_tokens
+
+# Maximaal aantal gelijktijdige Gemini-calls; voor Ollama begrenst de OllamaPool (OLLAMA_CONCURRENCY)
+GEMINI_CONCURRENCY = int(os.getenv("GEMINI_CONCURRENCY", "8"))
+REQUEST_TIMEOUT_SECONDS = float(os.getenv("LLM_REQUEST_TIMEOUT_SECONDS", "120"))
+MAX_RATE_LIMIT_RETRIES = 5
+
+_semaphores = weakref.WeakKeyDictionary()
+
+
+def backend_semaphore(backend):
+    """Eén semaphore per backend per event loop, gedeeld door alle agents."""
+    loop = asyncio.get_running_loop()
+    if loop not in _semaphores:
+        _semaphores[loop] = {
+            "gemini": asyncio.Semaphore(GEMINI_CONCURRENCY),
+        }
+    return _semaphores[loop][backend]
+
+
+class AsyncAgent():
+    """
+    Asyncio-variant van agent. Meerdere simulaties kunnen zo tegelijk LLM-calls open hebben staan,
+    begrensd door een semaphore voor Gemini en de gedeelde OllamaPool voor lokale calls.
+    De daglimiet van de API wordt gedeeld door alle instanties.
+    """
+    api_daily_limit_date = None
+
+    def __init__(self, role, local_model="deepseek-r1:7b", timeout=REQUEST_TIMEOUT_SECONDS, backend=None):
+        self.role = role
+        self.backend = backend if backend is not None else backend_from_env()
+        self.api_model = "gemini-2.0-flash-lite"
+        self.local_model = local_model
+        self.timeout = timeout
+        self.response_cache = get_response_cache()
+
+    @property
+    def rate_limiter(self):
+        """De gedeelde Gemini rate limiter; pas bij de eerste Gemini-call aangemaakt (die opent de SQLite-database)."""
+        return get_rate_limiter("gemini")
+
+    @property
+    def api_daily_limit(self):
+        return self.rate_limiter.requests_per_day
+
+    def system_instruction(self, system=None):
+        if not system:
+            return self.role
+        return f"{self.role}\n\n{system.strip()}"
+
+    def model_for(self, backend):
+        if self.backend is not None and backend == self.backend.name:
+            return self.backend.model
+        return self.api_model if backend == "gemini" else self.local_model
+
+    def backend_order(self):
+        if self.backend is not None:
+            return [self.backend.name]
+        return ["ollama", "gemini"] if AsyncAgent.api_daily_limit_date == datetime.date.today() else ["gemini", "ollama"]
+
+    def cache_key(self, backend, prompt, system):
+        # Dezelfde sleutels als agent, dus de sync en async agents delen hun cache
+        return cache_key(backend, self.model_for(backend), self.system_instruction(system), prompt, cache_params())
+
+    async def cache_response(self, backend, prompt, system, response):
+        # put en lookup doen SQLite-I/O (met lock); net als de rate limiter niet op de event loop zelf
+        if self.response_cache.enabled:
+            await asyncio.to_thread(self.response_cache.put, self.cache_key(backend, prompt, system), backend, self.model_for(backend), response)
+        return response
+
+    async def generate_with_api(self, prompt, system=None):
+        from google.genai import types
+        from google.genai.errors import ClientError
+        metrics = get_metrics()
+        prompt_text = f"{self.system_instruction(system)}{prompt}"
+        fallback_reason = "retries_exhausted"
+        for attempt in range(MAX_RATE_LIMIT_RETRIES + 1):
+            # Wachttijd = rate limiter plus de semaphore van de event loop
+            wait_start = time.perf_counter()
+            await self.rate_limiter.acquire_async()
+            call_start = time.perf_counter()
+            try:
+                async with backend_semaphore("gemini"):
+                    queue_wait = time.perf_counter() - wait_start
+                    call_start = time.perf_counter()
+                    response = await asyncio.wait_for(
+                        get_gemini_client().aio.models.generate_content(
+                            model=self.api_model,
+                            config=types.GenerateContentConfig(system_instruction=self.system_instruction(system)),
+                            contents=prompt
+                        ),
+                        timeout=self.timeout
+                    )
+                tokens_in, tokens_out = usage_tokens(getattr(response, "usage_metadata", None), prompt_text, response.text)
+                metrics.record_llm_call("gemini", self.api_model, time.perf_counter() - call_start, tokens_in, tokens_out, queue_wait)
+                return await self.cache_response("gemini", prompt, system, response.text)
+            except ClientError as e:
+                metrics.record_llm_call("gemini", self.api_model, time.perf_counter() - call_start, outcome="client_error")
+                if daily_quota_exceeded(e.details):
+                    await asyncio.to_thread(self.rate_limiter.exhaust_day)
+                    raise DailyLimitException("Daily limit reached")
+                try:
+                    retry_delay = int(e.details['error']['details'][2]['retryDelay'][:-1])
+                except Exception:
+                    metrics.record_fallback("gemini", "ollama", "client_error")
+                    return await self.generate_locally(prompt, system)
+                print(f"Rate limit exceeded. Retrying after {retry_delay} seconds.")
+                metrics.record_retry("gemini", "rate_limit")
+                await asyncio.to_thread(self.rate_limiter.backoff, retry_delay + 1)
+            except asyncio.TimeoutError:
+                print(f"Gemini call timed out after {self.timeout} seconds, falling back to local generation.")
+                metrics.record_llm_call("gemini", self.api_model, time.perf_counter() - call_start, outcome="timeout")
+                fallback_reason = "timeout"
+                break
+        metrics.record_fallback("gemini", "ollama", fallback_reason)
+        return await self.generate_locally(prompt, system)
+
+    async def generate_locally(self, prompt, system=None):
+        # De pool draait de call op een eigen worker-thread; de event loop wacht er alleen op
+        future = get_ollama_pool(self.local_model).submit(prompt, system=self.system_instruction(system))
+        return await self.cache_response("ollama", prompt, system, await asyncio.wrap_future(future))
+
+    def quota(self):
+        return self.rate_limiter.remaining()
+
+    async def generate_with_backend(self, prompt, system=None):
+        call_start = time.perf_counter()
+        response_text = await self.backend.agenerate(prompt, self.system_instruction(system))
+        get_metrics().record_llm_call(self.backend.name, self.backend.model, time.perf_counter() - call_start,
+                                      estimate_tokens(f"{self.system_instruction(system)}{prompt}"), estimate_tokens(response_text))
+        return await self.cache_response(self.backend.name, prompt, system, response_text)
+
+    async def generate_uncached(self, prompt, system=None):
+        if self.backend is not None:
+            return await self.generate_with_backend(prompt, system)
+        today = datetime.date.today()
+        if AsyncAgent.api_daily_limit_date == today:
+            get_metrics().record_fallback("gemini", "ollama", "daily_limit")
+            return await self.generate_locally(prompt, system)
+        try:
+            return await self.generate_with_api(prompt, system)
+        except DailyLimitException:
+            print(f"Daily limit reached for the Gemini API ({self.api_daily_limit} requests per day). Switching to local generation for the remainder of today.\n")
+            AsyncAgent.api_daily_limit_date = today
+            get_metrics().record_fallback("gemini", "ollama", "daily_limit")
+            return await self.generate_locally(prompt, system)
+
+    async def generate(self, prompt, system=None):
+        start_time = time.perf_counter()
+
+        result = None
+        if self.response_cache.enabled:
+            keys = [self.cache_key(backend, prompt, system) for backend in self.backend_order()]
+            result = await asyncio.to_thread(self.response_cache.lookup, keys)
+        if result is None:
+            result = await self.generate_uncached(prompt, system)
+
+        end_time = time.perf_counter()
+        duration_minutes = (end_time - start_time) / 60
+        return result, duration_minutes
+
+
+class AgentLoopBridge():
+    """
+    Biedt de synchrone generate() van agent aan, maar voert de calls uit op één gedeelde
+    achtergrond-event-loop van een AsyncAgent. Zo kunnen bestaande synchrone functies zoals
+    run_simulation vanuit meerdere threads tegelijk de async client gebruiken.
+    """
+    def __init__(self, async_agent):
+        self.async_agent = async_agent
+        self.role = async_agent.role
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="llm-event-loop", daemon=True)
+        self._thread.start()
+
+    def generate(self, prompt, system=None):
+        future = asyncio.run_coroutine_threadsafe(self.async_agent.generate(prompt, system), self._loop)
+        return future.result()
+
+    def close(self):
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
@@ -1,11 +1,27 @@
-import os, json, time
+import os, sys, json, time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import pandas as pd
 from agent import agent
+from streaming import stop_at_marker, get_stream_stats
+from response_cache import get_response_cache
+from metrics import get_metrics
+from bio_structure import BIO_RESPONSE_SCHEMA, parse_bio_response, parse_bio_text, render_bio_text
 
+# Aantal persona's dat tegelijk een bio laat genereren; de rate limiter bewaakt de API-quota
+BIO_WORKERS = int(os.getenv("BIO_WORKERS", "8"))
+# Aantal groepen per run (in volgorde van de groepsdata); eerder afgeronde groepen tellen mee
+BIO_MAX_GROUPS = int(os.getenv("BIO_MAX_GROUPS", "9"))
+BIO_START_MARKER = "[START]"
+BIO_END_MARKER = "[END]"
+# Stop met genereren zodra de bio af is; alles na [END] (en de <think>-redenering van deepseek-r1) is weggegooide tijd
+BIO_STOP_CONDITION = stop_at_marker(BIO_END_MARKER, start_marker=BIO_START_MARKER)
+# "structured": JSON volgens BIO_RESPONSE_SCHEMA, "text": de oude [START]...[END] opmaak
+BIO_OUTPUT = os.getenv("BIO_OUTPUT", "structured")
+BIO_INSTRUCTION = "Create a bio for the person detailed below. The bio should include a general description, their norms and values, beliefs, opinions, and a description of their typical chat writing style. Base the 'Writing style' section on their chat behavior attributes."
 
-def generate_bio(row, bio_agent):
-    row_dict = row.to_dict()
 
+def bio_properties(row_dict):
+    """De persona-kenmerken als '- Key: value' regels voor in de prompt."""
     toh = row_dict.get("typical_online_hours", {})
     if isinstance(toh, str):
         try:
@@ -52,9 +68,13 @@ def generate_bio(row, bio_agent):
       "Message Chaining Preference": row_dict.get("message_chaining_preference", "N/A")
     }
     properties_list = [f"- {key}: {value}" for key, value in props.items() if value is not None]
-    properties_string = "\n".join(properties_list)
+    return "\n".join(properties_list)
+
 
-    instruction_text = "Create a bio for the person detailed below. The bio should include a general description, their norms and values, beliefs, opinions, and a description of their typical chat writing style. Base the 'Writing style' section on their chat behavior attributes."
+def generate_bio(row, bio_agent):
+    row_dict = row.to_dict()
+    properties_string = bio_properties(row_dict)
+    instruction_text = BIO_INSTRUCTION
     format_string = """
 Your response must follow exactly the format below, and nothing else should appear outside the delimiters:
 
@@ -104,54 +124,199 @@ Jane writes in a short, coherent manners. She doesn't really use punctuation whi
 """
     prompt = f"Instruction: {instruction_text}\n\nPersona Details:\n{properties_string}\n\nFormatting of the answer (your response must follow this exact format and structure, including all specified headers like **Description:**, **Normen en Waarden:**, etc.):\n{format_string}"
     
-    response, duration = bio_agent.generate(prompt)
+    response, duration = bio_agent.generate(prompt, stop_condition=BIO_STOP_CONDITION, strip_reasoning=True)
     print(f'Bio generated for {row_dict.get("name", "Unknown")} in {duration:.2f} minutes')
     return response
 
 
+def generate_structured_bio(row, bio_agent):
+    """
+    Vraagt de bio als JSON volgens BIO_RESPONSE_SCHEMA (response schema bij Gemini, format bij Ollama),
+    zodat de velden direct getypeerd zijn en er geen markers gezocht hoeven te worden.
+    """
+    row_dict = row.to_dict()
+    prompt = f"""Instruction: {BIO_INSTRUCTION}
+
+Persona Details:
+{bio_properties(row_dict)}
+
+Answer with a single JSON object with these fields:
+- description: a description of their life in a paragraph of 5 to 6 sentences.
+- normen_en_waarden: a list of their norms and values, each with a short name and a description.
+- beliefs: a list of their beliefs, each with a short name and a description.
+- opinions: a list of their opinions, each with a short name and a description.
+- writing_style: a description of how this person writes chat messages.
+"""
+    response, duration = bio_agent.generate(prompt, response_schema=BIO_RESPONSE_SCHEMA)
+    print(f'Structured bio generated for {row_dict.get("name", "Unknown")} in {duration:.2f} minutes')
+    return parse_bio_response(response)
+
+
+def build_persona_bio(row, bio_agent):
+    """Genereert de bio voor één persona en geeft het volledige personaprofiel terug."""
+    with get_metrics().span("bio", output=BIO_OUTPUT) as span_fields:
+        span_fields["name"] = row.get("name")
+        return _build_persona_bio(row, bio_agent)
+
+
+def _build_persona_bio(row, bio_agent):
+    persona_profile = row.to_dict()
+    toh = persona_profile.get("typical_online_hours")
+    if isinstance(toh, str):
+        try:
+            persona_profile["typical_online_hours"] = json.loads(toh.replace("'", '"'))       
+        except Exception as e:
+            print(f"Warning: Could not parse typical_online_hours for {persona_profile.get('name', 'unknown')}: {e}")
+            persona_profile["typical_online_hours"] = {"weekdays": [], "weekends": []}
+
+    if BIO_OUTPUT == "structured":
+        bio_fields = generate_structured_bio(row, bio_agent)
+        persona_profile.update(bio_fields)
+        # De tekstversie blijft erbij voor bestaande notebooks en exports
+        persona_profile['llm_generated_bio_text'] = render_bio_text(bio_fields)
+        return persona_profile
+
+    llm_bio_string_with_markers = generate_bio(row, bio_agent) 
+    
+    start_marker = BIO_START_MARKER
+    end_marker = BIO_END_MARKER
+    start_idx = llm_bio_string_with_markers.find(start_marker)
+    end_idx = llm_bio_string_with_markers.find(end_marker)
+
+    if start_idx != -1 and end_idx != -1:
+        bio_content_only = llm_bio_string_with_markers[start_idx + len(start_marker):end_idx].strip()
+    else:
+        print(f"Warning: Could not find [START]/[END] markers for {row['name']}. Using full response.")
+        bio_content_only = llm_bio_string_with_markers.strip()
+
+    persona_profile['llm_generated_bio_text'] = bio_content_only 
+    persona_profile.update(parse_bio_text(bio_content_only))
+    return persona_profile
+
+
+def write_bios_json(bios_data_list, filepath):
+    # Eerst naar een tijdelijk bestand, zodat een crash nooit een half bestand achterlaat
+    tmp_filepath = filepath + ".tmp"
+    with open(tmp_filepath, "w", encoding="utf-8") as file:
+        json.dump(bios_data_list, fp=file, indent=4, ensure_ascii=False)
+    os.replace(tmp_filepath, filepath)
+
+
 def save_bio(df, bio_agent, filepath):
     bios_data_list = []
     start_time_total = time.perf_counter()
 
     for index, row in df.iterrows():
         try:
-            persona_profile = row.to_dict()
-            toh = persona_profile.get("typical_online_hours")
-            if isinstance(toh, str):
-                try:
-                    persona_profile["typical_online_hours"] = json.loads(toh.replace("'", '"'))       
-                except Exception as e:
-                    print(f"Warning: Could not parse typical_online_hours for {persona_profile.get('name', 'unknown')}: {e}")
-                    persona_profile["typical_online_hours"] = {"weekdays": [], "weekends": []}
-
-            llm_bio_string_with_markers = generate_bio(row, bio_agent) 
-            
-            start_marker = "[START]"
-            end_marker = "[END]"
-            start_idx = llm_bio_string_with_markers.find(start_marker)
-            end_idx = llm_bio_string_with_markers.find(end_marker)
-
-            if start_idx != -1 and end_idx != -1:
-                bio_content_only = llm_bio_string_with_markers[start_idx + len(start_marker):end_idx].strip()
-            else:
-                print(f"Warning: Could not find [START]/[END] markers for {row['name']}. Using full response.")
-                bio_content_only = llm_bio_string_with_markers.strip()
-
-            persona_profile['llm_generated_bio_text'] = bio_content_only 
-            bios_data_list.append(persona_profile)
-
+            bios_data_list.append(build_persona_bio(row, bio_agent))
         except Exception as e:
             print(f"Error processing bio for {row['name']}: {str(e)}")
         
     end_time_total = time.perf_counter()
     duration_minutes = (end_time_total - start_time_total) / 60
-    print(f'All bios for ({filepath}) processed in {duration_minutes:.2f} minutes\n')
+    print(f'All bios for ({filepath}) processed in {duration_minutes:.2f} minutes ({get_stream_stats().summary()}; {get_response_cache().summary()})\n')
     
-    with open(filepath, "w", encoding="utf-8") as file:
-        json.dump(bios_data_list, fp=file, indent=4, ensure_ascii=False)
+    write_bios_json(bios_data_list, filepath)
+
+
+def load_checkpoint(checkpoint_path):
+    """
+    Leest de al afgeronde persona's uit een checkpoint (JSONL), per persona_index.
+    Een half geschreven laatste regel van een gecrashte run wordt genegeerd.
+    """
+    done = {}
+    if not os.path.exists(checkpoint_path):
+        return done
+    with open(checkpoint_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            done[record["persona_index"]] = record["persona"]
+    return done
+
 
+def append_checkpoint(checkpoint_path, persona_index, persona_profile):
+    with open(checkpoint_path, "a", encoding="utf-8") as f:
+        f.write(json.dumps({"persona_index": persona_index, "persona": persona_profile}, ensure_ascii=False) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
 
-def generate_bios():
+
+def generate_bios_parallel(bio_agent, group_data_folder, bio_data_folder, max_workers=BIO_WORKERS, max_groups=None):
+    """
+    Verdeelt de persona's van alle groepen over een pool van workers. Elke afgeronde bio wordt
+    direct aan het checkpoint van de groep toegevoegd; bij een herstart worden die persona's
+    overgeslagen. Zodra een groep compleet is wordt het bekende group_N.json geschreven.
+    Het aantal calls naar de API wordt begrensd door de gedeelde rate limiter van de agent.
+    """
+    # pyarrow pas laden als er echt Parquet gelezen wordt
+    from data_store import iter_group_frames
+    checkpoint_folder = os.path.join(bio_data_folder, "checkpoints")
+    os.makedirs(checkpoint_folder, exist_ok=True)
+
+    groups = {}
+    # Leest de Parquet-dataset als die bestaat, anders de losse CSV's
+    for group_index, (group_name, df) in enumerate(iter_group_frames(group_data_folder)):
+        if max_groups is not None and group_index >= max_groups:
+            break
+        json_filepath = os.path.join(bio_data_folder, f"{group_name}.json")
+        if os.path.exists(json_filepath):
+            continue
+        checkpoint_path = os.path.join(checkpoint_folder, f"{group_name}.jsonl")
+        groups[group_name] = {
+            "df": df,
+            "json_filepath": json_filepath,
+            "checkpoint_path": checkpoint_path,
+            "done": load_checkpoint(checkpoint_path),
+        }
+
+    def finish_group(group_name):
+        group = groups[group_name]
+        bios_data_list = [group["done"][index] for index in sorted(group["done"])]
+        write_bios_json(bios_data_list, group["json_filepath"])
+        os.remove(group["checkpoint_path"])
+        print(f"All bios for {group_name} saved to {group['json_filepath']}")
+
+    start_time_total = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {}
+        for group_name, group in groups.items():
+            if len(group["done"]) == len(group["df"]):
+                finish_group(group_name)
+                continue
+            print(f"{group_name}: {len(group['done'])}/{len(group['df'])} bios already in checkpoint")
+            for persona_index, row in group["df"].iterrows():
+                if persona_index not in group["done"]:
+                    futures[pool.submit(build_persona_bio, row, bio_agent)] = (group_name, persona_index, row["name"])
+
+        for future in as_completed(futures):
+            group_name, persona_index, name = futures[future]
+            group = groups[group_name]
+            try:
+                persona_profile = future.result()
+            except Exception as e:
+                print(f"Error processing bio for {name}: {str(e)}")
+                continue
+            append_checkpoint(group["checkpoint_path"], persona_index, persona_profile)
+            group["done"][persona_index] = persona_profile
+            if len(group["done"]) == len(group["df"]):
+                finish_group(group_name)
+
+    duration_minutes = (time.perf_counter() - start_time_total) / 60
+    incomplete = [name for name, group in groups.items() if len(group["done"]) < len(group["df"])]
+    print(f"Bio generation finished in {duration_minutes:.2f} minutes, {len(incomplete)} groups incomplete (rerun to retry)")
+    print(f"Streaming: {get_stream_stats().summary()}")
+    print(get_response_cache().summary())
+
+
+def generate_bios(parallel=True, max_groups=BIO_MAX_GROUPS):
+  """
+  Genereert de bios van de eerste max_groups groepen. Standaard via generate_bios_parallel, met een
+  checkpoint per groep zodat een afgebroken run verder kan. Met parallel=False (--serial) één groep
+  tegelijk zonder checkpoint: een afgebroken groep begint opnieuw, alleen complete groepen worden overgeslagen.
+  """
   BIO_DATA_FOLDER = 'data/bios'
   GROUP_DATA_FOLDER = 'data/groups'
   LOCAL_MODEL = "deepseek-r1:7b"
@@ -169,8 +334,14 @@ def generate_bios():
       "You only provide the output in the exact format requested, without any additional text or modifications."
     ),
     local_model=LOCAL_MODEL)
+
+  if parallel:
+    generate_bios_parallel(bio_agent, GROUP_DATA_FOLDER, BIO_DATA_FOLDER, max_groups=max_groups)
+    return
   
-  for csv_file in os.listdir(GROUP_DATA_FOLDER)[:9]:
+  from data_store import group_number
+  csv_files = sorted((f for f in os.listdir(GROUP_DATA_FOLDER) if f.endswith('.csv')), key=lambda f: group_number(f) or 0)
+  for csv_file in csv_files[:max_groups]:
     csv_filepath = os.path.join(GROUP_DATA_FOLDER, csv_file)
     df = pd.read_csv(csv_filepath)
 
@@ -185,4 +356,5 @@ def generate_bios():
     
     
 if __name__ == "__main__":
-    generate_bios()
\ No newline at end of file
+    generate_bios(parallel="--serial" not in sys.argv)
+    get_metrics().report_run()
\ No newline at end of file
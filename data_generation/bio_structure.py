@@ -0,0 +1,191 @@
+import os
+import re
+import sys
+import json
+
+# Getypeerde bio-velden die naast de andere persona-kenmerken in het profiel staan
+BIO_TEXT_FIELDS = ["description", "writing_style"]
+BIO_LIST_FIELDS = ["normen_en_waarden", "beliefs", "opinions"]
+BIO_FIELDS = ["description", "normen_en_waarden", "beliefs", "opinions", "writing_style"]
+DEFAULT_WRITING_STYLE = "Schrijft op een gemiddelde manier."
+
+BIO_ITEM_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "name": {"type": "string"},
+        "description": {"type": "string"},
+    },
+    "required": ["name", "description"],
+}
+# JSON-schema voor gestructureerde output (Ollama format=, Gemini response_schema)
+BIO_RESPONSE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "description": {"type": "string"},
+        "normen_en_waarden": {"type": "array", "items": BIO_ITEM_SCHEMA},
+        "beliefs": {"type": "array", "items": BIO_ITEM_SCHEMA},
+        "opinions": {"type": "array", "items": BIO_ITEM_SCHEMA},
+        "writing_style": {"type": "string"},
+    },
+    "required": BIO_FIELDS,
+}
+
+# Kopjes zoals ze in de vrije-tekst bios voorkomen (het voorbeeld in de prompt gebruikt 'Norms and Values')
+SECTION_FIELDS = {
+    "description": "description",
+    "normen en waarden": "normen_en_waarden",
+    "norms and values": "normen_en_waarden",
+    "beliefs": "beliefs",
+    "opinions": "opinions",
+    "writing style": "writing_style",
+}
+# Een kopje staat aan het begin van een regel en heeft altijd een dubbele punt (**Kopje:** of **Kopje**:),
+# zodat een item als '- **Familie:** description' of een los woord in de tekst nooit als kopje telt
+SECTION_PATTERN = re.compile(
+    r"^[ \t]*\*\*[ \t]*(description|normen en waarden|norms and values|beliefs|opinions|writing style)[ \t]*(?::[ \t]*\*\*|\*\*[ \t]*:)",
+    re.IGNORECASE | re.MULTILINE,
+)
+ITEM_PATTERN = re.compile(r"^[-*•]\s*(?:\*\*(?P<bold>.+?)\*\*|(?P<plain>[^:]{1,80}):)\s*:?\s*(?P<description>.*)$")
+MARKERS = ["[START]", "[END]"]
+
+
+def parse_items(section_text):
+    """'- **Integriteit:** omschrijving' (of '-**waarde**: omschrijving') per regel naar {name, description}."""
+    items = []
+    for line in section_text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        match = ITEM_PATTERN.match(line)
+        if match:
+            name = (match.group("bold") or match.group("plain")).strip().rstrip(":").strip()
+            items.append({"name": name, "description": match.group("description").strip()})
+        elif items:
+            # Vervolg van de omschrijving op een nieuwe regel
+            items[-1]["description"] = f"{items[-1]['description']} {line}".strip()
+        else:
+            items.append({"name": "", "description": line.lstrip("-*• ").strip()})
+    return items
+
+
+def parse_bio_text(bio_text):
+    """
+    Eenmalige parser voor bestaande vrije-tekst bios: splitst op de **Kopje:** markers in één
+    regex-pass en geeft de getypeerde velden terug. Ontbrekende secties worden leeg.
+    """
+    bio_text = bio_text or ""
+    for marker in MARKERS:
+        bio_text = bio_text.replace(marker, "")
+    fields = {"description": "", "normen_en_waarden": [], "beliefs": [], "opinions": [], "writing_style": ""}
+    matches = list(SECTION_PATTERN.finditer(bio_text))
+    for i, match in enumerate(matches):
+        field = SECTION_FIELDS[match.group(1).lower()]
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(bio_text)
+        section_text = bio_text[match.end():end].strip()
+        if field in BIO_LIST_FIELDS:
+            fields[field] = parse_items(section_text)
+        else:
+            fields[field] = " ".join(section_text.split())
+    return fields
+
+
+def validate_bio(data):
+    """Controleert een gestructureerd antwoord en normaliseert de typen; ValueError als het niet klopt."""
+    if not isinstance(data, dict):
+        raise ValueError(f"Expected a JSON object, got {type(data).__name__}")
+    missing = [field for field in BIO_FIELDS if field not in data]
+    if missing:
+        raise ValueError(f"Missing bio fields: {', '.join(missing)}")
+    fields = {}
+    for field in BIO_TEXT_FIELDS:
+        if not isinstance(data[field], str):
+            raise ValueError(f"Bio field {field} should be a string")
+        fields[field] = data[field].strip()
+    for field in BIO_LIST_FIELDS:
+        if not isinstance(data[field], list):
+            raise ValueError(f"Bio field {field} should be a list")
+        fields[field] = []
+        for item in data[field]:
+            if isinstance(item, str):
+                item = {"name": "", "description": item}
+            if not isinstance(item, dict):
+                raise ValueError(f"Items of {field} should be objects with name and description")
+            fields[field].append({"name": str(item.get("name", "")).strip(), "description": str(item.get("description", "")).strip()})
+    return fields
+
+
+def parse_bio_response(response_text):
+    """
+    Antwoord van een gestructureerde call naar velden. Valt terug op de tekstparser als het model
+    toch de oude opmaak teruggaf; ValueError als er niets bruikbaars in staat.
+    """
+    text = response_text.strip()
+    if text.startswith("```"):
+        text = text.strip("`")
+        text = text[text.find("{"):] if "{" in text else text
+    json_start, json_end = text.find("{"), text.rfind("}")
+    if json_start != -1 and json_end > json_start:
+        try:
+            return validate_bio(json.loads(text[json_start:json_end + 1]))
+        except ValueError:
+            # json.JSONDecodeError is ook een ValueError
+            pass
+    fields = parse_bio_text(response_text)
+    if not fields["description"] and not fields["writing_style"]:
+        raise ValueError("Malformed bio response: no JSON object and no bio sections found")
+    return fields
+
+
+def format_bio_items(items, default="Niet gespecificeerd"):
+    """Lijst van {name, description} als één regel voor in de persona-context."""
+    if not items:
+        return default
+    return "; ".join(f"{item['name']}: {item['description']}" if item.get("name") else item["description"] for item in items)
+
+
+def render_bio_text(fields):
+    """De velden terug in de oude **Kopje:** opmaak, voor llm_generated_bio_text."""
+    sections = [f"**Description:**\n{fields['description']}"]
+    for title, field in [("Normen en Waarden", "normen_en_waarden"), ("Beliefs", "beliefs"), ("Opinions", "opinions")]:
+        lines = "\n".join(f"- **{item['name']}:** {item['description']}" if item["name"] else f"- {item['description']}" for item in fields[field])
+        sections.append(f"**{title}:**\n{lines}")
+    sections.append(f"**Writing style:**\n{fields['writing_style']}")
+    return "\n\n".join(sections)
+
+
+def has_bio_fields(persona):
+    return all(field in persona for field in BIO_FIELDS)
+
+
+def structure_persona(persona):
+    """Vult de getypeerde bio-velden aan vanuit de vrije-tekst bio als ze nog ontbreken (in place)."""
+    if not has_bio_fields(persona):
+        bio_text = persona.get("llm_generated_bio_text") or persona.get("bio", "")
+        persona.update(parse_bio_text(bio_text))
+    return persona
+
+
+def structure_bios_folder(bios_folder="data/bios"):
+    """Eenmalige migratie: voegt aan elke data/bios/group_N.json de getypeerde bio-velden toe."""
+    converted = 0
+    for filename in sorted(os.listdir(bios_folder)):
+        if not filename.endswith(".json"):
+            continue
+        filepath = os.path.join(bios_folder, filename)
+        with open(filepath, "r", encoding="utf-8") as f:
+            personas = json.load(f)
+        if not isinstance(personas, list) or all(has_bio_fields(persona) for persona in personas):
+            continue
+        for persona in personas:
+            structure_persona(persona)
+        tmp_filepath = filepath + ".tmp"
+        with open(tmp_filepath, "w", encoding="utf-8") as f:
+            json.dump(personas, f, indent=4, ensure_ascii=False)
+        os.replace(tmp_filepath, filepath)
+        converted += 1
+        print(f"Structured {len(personas)} bios in {filepath}")
+    print(f"{converted} bio files structured")
+
+
+if __name__ == "__main__":
+    structure_bios_folder(sys.argv[1] if len(sys.argv) > 1 else "data/bios")
@@ -3,14 +3,28 @@ import json
 import random
 import time
 import datetime
+import threading
 import ast 
+import sys
 from agent import agent 
+from online_schedule import OnlineSchedule
+from chat_history import ChatHistory
+from bio_structure import DEFAULT_WRITING_STYLE, structure_persona, format_bio_items
+from metrics import get_metrics
 
 SIMULATION_START_TIME_STR = "2023-10-23 00:00:00"
 SIMULATION_DURATION_HOURS = 24  
 SIMULATION_STEP_MINUTES = 5  
 MAX_MESSAGES = 800           
 CHAT_HISTORY_CONTEXT_LENGTH = 25 
+# "stepper" (vaste stappen van SIMULATION_STEP_MINUTES) of "event" (discrete-event, zie event_simulation.py)
+SIMULATION_ENGINE = os.getenv("SIMULATION_ENGINE", "stepper")
+# Met een seed trekt een simulatie per (groep, onderwerp) steeds dezelfde random getallen, zodat een run
+# met LLM_CACHE_MODE=replay exact te herhalen is. De module-random wordt gedeeld, dus alleen met één simulatie tegelijk.
+SIMULATION_SEED = os.getenv("SIMULATION_SEED")
+# Opt-in pauze na elke stap van run_simulation (bv. om een lokale backend rust te geven); standaard
+# draait de simulatie op volle snelheid, gesimuleerde tijd kost geen echte tijd
+SIMULATION_STEP_DELAY_SECONDS = float(os.getenv("SIMULATION_STEP_DELAY_SECONDS", "0"))
 
 ACTIVITY_PROB_MAP = {
     "Laag": 0.05,
@@ -47,6 +61,8 @@ def load_personas_from_json_files(persona_files_dir, persona_names_list=None):
                     data['last_read_message_index'] = -1
                     data['message_cooldown_timer'] = 0
                     data['is_online'] = False
+                    # Oudere bios hebben alleen vrije tekst; die wordt hier één keer in velden gesplitst
+                    structure_persona(data)
                     personas[data['name']] = data
                     print(f"Loaded persona: {data['name']}")
             except Exception as e:
@@ -93,27 +109,24 @@ def is_persona_online(persona, current_sim_time):
     return False
 
 
-def generate_llm_chat_message(persona, topic, chat_history, chat_agent):
-    """Generates a chat message using the LLM agent."""
-    bio_text = persona.get("bio", "") 
-    writing_style_section = "Schrijft op een gemiddelde manier." 
-    try:
-        start_marker = "**Writing style:**"
-        style_start_index = bio_text.find(start_marker)
-        if style_start_index != -1:
-            temp_style_text = bio_text[style_start_index + len(start_marker):].strip()
-            end_markers = ["**", "[END]"] 
-            min_end_idx = len(temp_style_text)
-            for marker in end_markers:
-                idx = temp_style_text.find(marker)
-                if idx != -1 and idx < min_end_idx:
-                    min_end_idx = idx
-            writing_style_section = temp_style_text[:min_end_idx].strip()
-            if not writing_style_section: 
-                writing_style_section = "Schrijft op een gemiddelde manier." 
-    except Exception as e:
-        print(f"Could not parse writing style for {persona['name']}, using default. Error: {e}")
-    persona_prompt_info = f"""
+def extract_writing_style(persona):
+    """De schrijfstijl uit de getypeerde bio-velden (zie bio_structure); valt terug op een gemiddelde schrijfstijl."""
+    if 'writing_style' not in persona:
+        structure_persona(persona)
+    return persona.get('writing_style') or DEFAULT_WRITING_STYLE
+
+
+def build_persona_context(persona, topic):
+    """
+    Het vaste deel van de prompt van een persona: profiel, onderwerp en spelregels.
+    Dit verandert niet tijdens een simulatie en gaat als system instruction mee, zodat elke beurt
+    alleen de recente geschiedenis en de instructie hoeft mee te sturen. Er wordt geen expliciete
+    cache aangemaakt: Ollama hergebruikt de identieke prefix uit zijn prompt-cache zolang het model
+    geladen blijft (keep_alive), en een Gemini cached-content vereist een minimum aantal tokens
+    (4096 voor gemini-2.0-flash-lite) waar deze context (een paar honderd tokens) ver onder blijft.
+    """
+    writing_style_section = extract_writing_style(persona)
+    return f"""
 Jouw persona:
 - Naam: {persona['name']}
 - Leeftijd: {persona['age']}
@@ -144,89 +157,146 @@ Jouw persona:
 - Nadrukstijl: {persona['emphasis_style']}
 - Berichtketen-voorkeur: {persona['message_chaining_preference']}
 - Beroep: {persona['job']}
-- Normen en waarden: {persona.get('normen_en_waarden', 'Niet gespecificeerd')}
-- Overtuigingen: {persona.get('beliefs', 'Niet gespecificeerd')}
-- Meningen: {persona.get('opinions', 'Niet gespecificeerd')}
+- Normen en waarden: {format_bio_items(persona.get('normen_en_waarden'))}
+- Overtuigingen: {format_bio_items(persona.get('beliefs'))}
+- Meningen: {format_bio_items(persona.get('opinions'))}
 - Schrijfstijl: {writing_style_section}
+
+Huidig gespreksonderwerp: {topic['title']} - {topic['description']}
+
+Let op: Blijf altijd volledig trouw aan je persona, ook als dit betekent dat je het oneens bent met anderen, het gesprek een andere wending geeft, of je mening herhaalt. Je mag gerust meningsverschillen uiten, van onderwerp wisselen als dat bij je persona past, of reageren op een manier die typerend is voor jouw karakter. jouw antwoorden moeten altijd authentiek zijn voor jouw persona, zelfs als dat leidt tot discussie, misverstanden of onverwachte wendingen in het gesprek. Gebruik je eigen stijl, voorkeuren en overtuigingen zoals beschreven in je profiel.
 """
 
-    history_str = "\n".join([f"{msg['sender']}: {msg['text']}" for msg in chat_history[-CHAT_HISTORY_CONTEXT_LENGTH:]])
+
+def build_persona_contexts(personas_data, topic):
+    """Eén keer per simulatie: het vaste promptdeel van elke persona."""
+    return {name: build_persona_context(persona, topic) for name, persona in personas_data.items()}
+
+
+def generate_llm_chat_message(persona, topic, chat_history, chat_agent, persona_context=None):
+    """
+    Generates a chat message using the LLM agent. Het vaste persona-deel gaat als system
+    instruction mee; per beurt wordt alleen de recente geschiedenis en de instructie verstuurd.
+    """
+    if persona_context is None:
+        persona_context = build_persona_context(persona, topic)
+
+    if not isinstance(chat_history, ChatHistory):
+        chat_history = ChatHistory.from_messages(chat_history, [persona['name']], CHAT_HISTORY_CONTEXT_LENGTH)
+    history_str = chat_history.history_text()
 
     instruction_hint = "Reageer op de laatste berichten of start een nieuwe gedachte gerelateerd aan het onderwerp."
-    if chat_history and chat_history[-1]['sender'] != persona['name']:
-        instruction_hint = f"Reageer op het gesprek, met name op {chat_history[-1]['sender']} indien relevant."
-    if any(f"@{persona['name']}" in msg['text'] for msg in chat_history[-3:]): # Mentioned recently
+    if len(chat_history) and chat_history.last_sender != persona['name']:
+        instruction_hint = f"Reageer op het gesprek, met name op {chat_history.last_sender} indien relevant."
+    if chat_history.was_mentioned(persona['name']): # Mentioned recently
          instruction_hint = f"Je bent genoemd (@{persona['name']}). Reageer hierop of op de algemene discussie."
 
-    prompt = f"""{persona_prompt_info}
-Huidig gespreksonderwerp: {topic['title']} - {topic['description']}
-
-Recente chatgeschiedenis (laatste {CHAT_HISTORY_CONTEXT_LENGTH} berichten):
+    prompt = f"""Recente chatgeschiedenis (laatste {CHAT_HISTORY_CONTEXT_LENGTH} berichten):
 {history_str if history_str else "Nog geen berichten."}
 
 Instructie: {instruction_hint}
 Genereer een natuurlijke chatreactie als jouw persona. Houd je aan je schrijfstijl, meningen en voorkeuren.
 
-Let op: Blijf altijd volledig trouw aan je persona, ook als dit betekent dat je het oneens bent met anderen, het gesprek een andere wending geeft, of je mening herhaalt. Je mag gerust meningsverschillen uiten, van onderwerp wisselen als dat bij je persona past, of reageren op een manier die typerend is voor jouw karakter. jouw antwoorden moeten altijd authentiek zijn voor jouw persona, zelfs als dat leidt tot discussie, misverstanden of onverwachte wendingen in het gesprek. Gebruik je eigen stijl, voorkeuren en overtuigingen zoals beschreven in je profiel.
-
 Jouw antwoord:
 """
-    response_text, duration = chat_agent.generate(prompt)
+    response_text, duration = chat_agent.generate(prompt, system=persona_context)
+    get_metrics().add_to_span("llm_seconds", duration * 60)
     cleaned_response = response_text.strip()
     if cleaned_response.lower().startswith(f"{persona['name'].lower()}:"):
         cleaned_response = cleaned_response[len(persona['name'])+1:].strip()
     
     return cleaned_response
 
+def post_probability(name, persona, chat_history):
+    """Kans dat een online persona zonder cooldown in één simulatiestap een bericht plaatst."""
+    prob_to_post = ACTIVITY_PROB_MAP.get(persona.get("Chat Activity Level", "Gemiddeld"), 0.1)
+    
+    if chat_history.unread_count(persona) > 0:
+        if chat_history.last_sender != name:
+            prob_to_post += 0.1 
+
+    if chat_history.was_mentioned(name):
+        prob_to_post += MENTION_BOOST
+
+    prob_to_post += SPONTANEITY_CHANCE
+
+    return min(prob_to_post, 1.0)
+
+
+def choose_poster(potential_posters, chat_history):
+    """Wie er mag posten: bij voorkeur iemand die recent genoemd is."""
+    mentioned_posters = [p for p in potential_posters if chat_history.was_mentioned(p)]
+    if mentioned_posters:
+        return random.choice(mentioned_posters)
+    return random.choice(potential_posters)
+
+
+def cooldown_steps(persona, step_minutes=SIMULATION_STEP_MINUTES):
+    cooldown_factor = COOLDOWN_ACTIVITY_FACTOR.get(persona.get("Chat Activity Level", "Gemiddeld"), 1.0)
+    return int(COOLDOWN_MINUTES_BASE * cooldown_factor / step_minutes)
+
+
+def generate_seed_message(seed_poster, topic, chat_agent):
+    """Het openingsbericht van het gesprek."""
+    seed_poster_name = seed_poster['name']
+    seed_prompt = f"""
+Jouw persona:
+- Naam: {seed_poster['name']}
+- Schrijfstijl: {extract_writing_style(seed_poster)}
+
+Huidig gespreksonderwerp: {topic['title']} - {topic['description']}
+Instructie: Start het gesprek over dit onderwerp met een openingsbericht of vraag.
+Jouw antwoord:
+"""
+    seed_message_text, duration = chat_agent.generate(seed_prompt)
+    get_metrics().add_to_span("llm_seconds", duration * 60)
+    if seed_message_text.lower().startswith(f"{seed_poster_name.lower()}:"):
+        seed_message_text = seed_message_text[len(seed_poster_name)+1:].strip()
+    return seed_message_text
+
+
 def run_simulation(personas_data, topic, chat_agent):
-    chat_log = []
+    # Houdt naast het chatlog de promptregels, mentions en de laatste afzender incrementeel bij
+    chat_history = ChatHistory(personas_data.keys(), CHAT_HISTORY_CONTEXT_LENGTH)
     current_sim_time = datetime.datetime.strptime(SIMULATION_START_TIME_STR, "%Y-%m-%d %H:%M:%S")
     simulation_end_time = current_sim_time + datetime.timedelta(hours=SIMULATION_DURATION_HOURS)
     
     simulation_step_delta = datetime.timedelta(minutes=SIMULATION_STEP_MINUTES)
     num_simulation_steps = 0
-    online_at_start = []
+    # Online uren één keer compileren i.p.v. elke stap de tijdslots opnieuw te parsen
+    online_schedule = OnlineSchedule(personas_data)
     for name, p_data in personas_data.items():
         print(name, p_data)
-        if is_persona_online(p_data, current_sim_time):
-            online_at_start.append(name)
+    online_at_start = online_schedule.online_names(current_sim_time)
+    persona_contexts = build_persona_contexts(personas_data, topic)
     
     if online_at_start:
         seed_poster_name = random.choice(online_at_start)
         seed_poster = personas_data[seed_poster_name]
-        seed_prompt = f"""
-Jouw persona:
-- Naam: {seed_poster['name']}
-- Schrijfstijl: {seed_poster.get('writing style', 'normaal')}
+        seed_message_text = generate_seed_message(seed_poster, topic, chat_agent)
 
-Huidig gespreksonderwerp: {topic['title']} - {topic['description']}
-Instructie: Start het gesprek over dit onderwerp met een openingsbericht of vraag.
-Jouw antwoord:
-"""
-        seed_message_text, _ = chat_agent.generate(seed_prompt)
-        if seed_message_text.lower().startswith(f"{seed_poster_name.lower()}:"):
-            seed_message_text = seed_message_text[len(seed_poster_name)+1:].strip()
-
-        chat_log.append({
-            "id": len(chat_log),
+        chat_history.append({
+            "id": len(chat_history),
             "timestamp": current_sim_time.isoformat(),
             "sender": seed_poster_name,
             "text": seed_message_text,
             "topic_id": topic['id']
         })
         print(f"[{current_sim_time.strftime('%H:%M')}] {seed_poster_name}: {seed_message_text} (SEED)")
-        seed_poster['message_cooldown_timer'] = int(COOLDOWN_MINUTES_BASE * COOLDOWN_ACTIVITY_FACTOR.get(seed_poster.get("Chat Activity Level", "Gemiddeld"), 1.0) / SIMULATION_STEP_MINUTES)
-        seed_poster['last_read_message_index'] = len(chat_log) - 1
+        seed_poster['message_cooldown_timer'] = cooldown_steps(seed_poster)
+        seed_poster['last_read_message_index'] = len(chat_history) - 1
     else:
         print("No personas online at start to seed message. Waiting for someone to come online.")
 
-    while current_sim_time < simulation_end_time and len(chat_log) < MAX_MESSAGES:
+    while current_sim_time < simulation_end_time and len(chat_history) < MAX_MESSAGES:
         print(f"\n--- Time: {current_sim_time.strftime('%Y-%m-%d %H:%M')} (Step {num_simulation_steps}) ---")
         new_messages_this_step = False
 
         online_names = []
-        for name, p_data in personas_data.items():
-            p_data['is_online'] = is_persona_online(p_data, current_sim_time)
+        online_mask = online_schedule.online_mask(current_sim_time)
+        for name, online in zip(online_schedule.names, online_mask):
+            p_data = personas_data[name]
+            p_data['is_online'] = bool(online)
             if p_data['is_online']:
                 online_names.append(name)
             if p_data['message_cooldown_timer'] > 0:
@@ -238,41 +308,21 @@ Jouw antwoord:
             if not p_data['is_online'] or p_data['message_cooldown_timer'] > 0:
                 continue
 
-            prob_to_post = ACTIVITY_PROB_MAP.get(p_data.get("Chat Activity Level", "Gemiddeld"), 0.1)
-            
-            if p_data['last_read_message_index'] < len(chat_log) -1:
-                if chat_log[-1]['sender'] != name:
-                    prob_to_post += 0.1 
-
-            was_mentioned = False
-            for msg_idx in range(max(0, len(chat_log) - 3), len(chat_log)):
-                 if f"@{name}" in chat_log[msg_idx]['text']:
-                    was_mentioned = True
-                    break
-            if was_mentioned:
-                prob_to_post += MENTION_BOOST
-
-            prob_to_post += SPONTANEITY_CHANCE
-
-            prob_to_post = min(prob_to_post, 1.0)
+            prob_to_post = post_probability(name, p_data, chat_history)
 
             if random.random() < prob_to_post:
                 potential_posters.append(name)
         
         if potential_posters:
-            mentioned_posters = [p for p in potential_posters if any(f"@{p}" in msg['text'] for msg in chat_log[-3:])]
-            if mentioned_posters:
-                poster_name = random.choice(mentioned_posters)
-            else:
-                poster_name = random.choice(potential_posters)
-            
+            poster_name = choose_poster(potential_posters, chat_history)
+
             persona_to_post = personas_data[poster_name]
 
-            message_text = generate_llm_chat_message(persona_to_post, topic, chat_log, chat_agent)
+            message_text = generate_llm_chat_message(persona_to_post, topic, chat_history, chat_agent, persona_contexts[poster_name])
             
             if message_text: 
-                chat_log.append({
-                    "id": len(chat_log),
+                chat_history.append({
+                    "id": len(chat_history),
                     "timestamp": current_sim_time.isoformat(),
                     "sender": poster_name,
                     "text": message_text,
@@ -281,17 +331,41 @@ Jouw antwoord:
                 print(f"[{current_sim_time.strftime('%H:%M')}] {poster_name}: {message_text}")
                 new_messages_this_step = True
 
-                cooldown_factor = COOLDOWN_ACTIVITY_FACTOR.get(persona_to_post.get("Chat Activity Level", "Gemiddeld"), 1.0)
-                persona_to_post['message_cooldown_timer'] = int(COOLDOWN_MINUTES_BASE * cooldown_factor / SIMULATION_STEP_MINUTES)
-                persona_to_post['last_read_message_index'] = len(chat_log) -1
+                persona_to_post['message_cooldown_timer'] = cooldown_steps(persona_to_post)
+                persona_to_post['last_read_message_index'] = len(chat_history) -1
 
         if not new_messages_this_step:
             print("  No new messages this step.")
 
         current_sim_time += simulation_step_delta
         num_simulation_steps += 1
-        time.sleep(0.1)
-
+        if SIMULATION_STEP_DELAY_SECONDS:
+            time.sleep(SIMULATION_STEP_DELAY_SECONDS)
+
+    return chat_history.messages
+
+
+def simulate_chat(personas_data, topic, chat_agent):
+    """
+    Draait de simulatie met de gekozen SIMULATION_ENGINE. De metrics splitsen de duur in de tijd die
+    op het LLM (of de cache) gewacht is en de tijd in de simulatielus zelf.
+    """
+    if SIMULATION_SEED is not None:
+        random.seed(f"{SIMULATION_SEED}:{topic['id']}:{','.join(sorted(personas_data))}")
+    metrics = get_metrics()
+    with metrics.span("simulation", engine=SIMULATION_ENGINE) as span_fields:
+        start_time = time.perf_counter()
+        if SIMULATION_ENGINE == "event":
+            from event_simulation import run_event_simulation
+            chat_log = run_event_simulation(personas_data, topic, chat_agent)
+        else:
+            chat_log = run_simulation(personas_data, topic, chat_agent)
+        llm_seconds = span_fields.get("llm_seconds", 0.0)
+        span_fields.update(topic=topic["id"], personas=len(personas_data), messages=len(chat_log),
+                           loop_seconds=round(time.perf_counter() - start_time - llm_seconds, 4))
+    metrics.inc("simulation_messages_total", len(chat_log), engine=SIMULATION_ENGINE)
+    metrics.inc("simulation_llm_seconds_total", llm_seconds, engine=SIMULATION_ENGINE)
+    metrics.inc("simulation_loop_seconds_total", span_fields["loop_seconds"], engine=SIMULATION_ENGINE)
     return chat_log
 
 
@@ -314,6 +388,8 @@ def load_personas_from_group_json(group_json_filepath):
                 p_data_entry['last_read_message_index'] = -1
                 p_data_entry['message_cooldown_timer'] = 0
                 p_data_entry['is_online'] = False
+                # Oudere bios hebben alleen vrije tekst; die wordt hier één keer in velden gesplitst
+                structure_persona(p_data_entry)
                 personas[name] = p_data_entry
                 print(f"Loaded persona: {name} from group JSON.")
 
@@ -331,7 +407,24 @@ CHAT_AGENT_ROLE = (
     "Formuleer je antwoorden als een normaal chatbericht. "
     "Voeg GEEN extra uitleg of commentaar toe buiten het chatbericht zelf."
 )
-CHAT_LLM_AGENT = agent(role=CHAT_AGENT_ROLE, local_model=LOCAL_MODEL_CHAT)
+_chat_agent = None
+_chat_agent_lock = threading.Lock()
+
+
+def get_chat_agent():
+    """De chat-agent, pas bij het eerste gebruik gemaakt (dat opent de rate limiter en de response cache)."""
+    global _chat_agent
+    with _chat_agent_lock:
+        if _chat_agent is None:
+            _chat_agent = agent(role=CHAT_AGENT_ROLE, local_model=LOCAL_MODEL_CHAT)
+        return _chat_agent
+
+
+def __getattr__(name):
+    # CHAT_LLM_AGENT blijft bestaan voor bestaande scripts en notebooks, maar wordt pas gemaakt als iemand hem gebruikt
+    if name == "CHAT_LLM_AGENT":
+        return get_chat_agent()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 PERSONA_JSON_DIR = 'data/bios/group_1'
 TOPICS =  [ {
@@ -399,7 +492,7 @@ def generate_chatlogs(bios_folder='data/bios'):
         for topic in TOPICS:
             print(f"\nStarting simulation for topic: {topic['title']}")
             start_sim_wall_time = time.time()
-            chat_log = run_simulation(personas, topic, CHAT_LLM_AGENT)
+            chat_log = run_simulation(personas, topic, get_chat_agent())
             end_sim_wall_time = time.time()
             sim_time = end_sim_wall_time - start_sim_wall_time
             print(f"Simulation complete. Generated {len(chat_log)} messages, in {sim_time:.2f} seconds.")
@@ -411,32 +504,40 @@ def generate_chatlogs(bios_folder='data/bios'):
             print(f"Chat log saved to: {output_chatlog_file}")
 
 def generate_chatlogs(group_json_filepath='data/bios/group_1.json'):
-    """Generates chat logs for all personas in the specified group JSON file."""
+    """
+    Genereert de chatlogs van één groep, één onderwerp tegelijk met de synchrone chat-agent. Net als
+    chat_runner krijgt elk onderwerp een verse kopie van de persona's, een vaste bestandsnaam en een
+    regel in het manifest, zodat een herstart afgeronde onderwerpen overslaat.
+    """
+    from chat_runner import CHAT_LOGS_FOLDER, build_jobs, run_job
     if not os.path.exists(group_json_filepath):
         print(f"Error: Group JSON file not found: {group_json_filepath}")
         return
 
-    personas = load_personas_from_group_json(group_json_filepath)
-    if not personas:
-        print("No personas loaded. Exiting.")
-        return
-
-    for topic in TOPICS:
+    os.makedirs(CHAT_LOGS_FOLDER, exist_ok=True)
+    for group_name, job_filepath, topic in build_jobs([group_json_filepath]):
         print(f"\nStarting simulation for topic: {topic['title']}")
-        start_sim_wall_time = time.time()
-        chat_log = run_simulation(personas, topic, CHAT_LLM_AGENT)
-        end_sim_wall_time = time.time()
-        sim_time = end_sim_wall_time - start_sim_wall_time
-        print(f"Simulation complete. Generated {len(chat_log)} messages, in {sim_time:.2f} seconds.")
-
-        output_chatlog_file = f"data/chat_logs/chatlog_{topic['id']}_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-        os.makedirs(os.path.dirname(output_chatlog_file), exist_ok=True)
-        with open(output_chatlog_file, 'w', encoding='utf-8') as f:
-            json.dump(chat_log, f, indent=2, ensure_ascii=False)
-        print(f"Chat log saved to: {output_chatlog_file}")
-        
+        run_job(group_name, job_filepath, topic, get_chat_agent())
+
+
+def generate_chatlogs_concurrent(group_json_filepaths, max_parallel_simulations=8):
+    """
+    Draait de simulaties voor alle groepen en onderwerpen tegelijk, via chat_runner:
+    elke (groep, onderwerp) krijgt een eigen kopie van de personas, een vaste bestandsnaam
+    en een regel in het manifest, zodat een herstart afgeronde paren overslaat.
+    """
+    from chat_runner import run_chat_jobs
+    run_chat_jobs(group_json_filepaths, max_workers=max_parallel_simulations)
+
 if __name__ == "__main__":
-    for json_file in os.listdir('data/bios'):
-        if json_file.endswith('.json'):
-            json_path = os.path.join('data/bios', json_file)
-            generate_chatlogs(json_path)
\ No newline at end of file
+    if "--event-driven" in sys.argv:
+        # Ook via de omgeving, zodat chat_runner (dat deze module opnieuw importeert) dezelfde engine kiest
+        os.environ["SIMULATION_ENGINE"] = "event"
+        SIMULATION_ENGINE = "event"
+    group_json_files = [os.path.join('data/bios', f) for f in os.listdir('data/bios') if f.endswith('.json')]
+    if "--concurrent" in sys.argv:
+        generate_chatlogs_concurrent(group_json_files)
+    else:
+        for json_path in group_json_files:
+            generate_chatlogs(json_path)
+        get_metrics().report_run()
@@ -0,0 +1,64 @@
+from collections import deque
+
+# Een persona geldt als 'genoemd' als @naam in een van de laatste MENTION_WINDOW berichten staat
+MENTION_WINDOW = 3
+
+
+class ChatHistory():
+    """
+    Chatlog dat bij elk nieuw bericht incrementeel bijhoudt wat de simulatie per stap nodig heeft:
+    de geformatteerde laatste regels voor de prompt, wie er recent genoemd is en de laatste afzender.
+    Zo kosten postkans en promptopbouw O(1) per persona in plaats van telkens het log te doorzoeken.
+    messages is de gewone lijst met berichten (het chatlog zelf).
+    """
+    def __init__(self, persona_names, context_length):
+        self.persona_names = list(persona_names)
+        self.messages = []
+        self.history_lines = deque(maxlen=context_length)
+        self._mention_window = deque()
+        self.mention_counts = {}
+        self._history_text = None
+
+    @classmethod
+    def from_messages(cls, messages, persona_names, context_length):
+        history = cls(persona_names, context_length)
+        for message in messages:
+            history.append(message)
+        return history
+
+    def __len__(self):
+        return len(self.messages)
+
+    def _mentions(self, text):
+        if "@" not in text:
+            return []
+        return [name for name in self.persona_names if f"@{name}" in text]
+
+    def append(self, message):
+        self.messages.append(message)
+        self.history_lines.append(f"{message['sender']}: {message['text']}")
+        self._history_text = None
+
+        mentioned = self._mentions(message['text'])
+        self._mention_window.append(mentioned)
+        for name in mentioned:
+            self.mention_counts[name] = self.mention_counts.get(name, 0) + 1
+        if len(self._mention_window) > MENTION_WINDOW:
+            for name in self._mention_window.popleft():
+                self.mention_counts[name] -= 1
+
+    @property
+    def last_sender(self):
+        return self.messages[-1]['sender'] if self.messages else None
+
+    def was_mentioned(self, name):
+        return self.mention_counts.get(name, 0) > 0
+
+    def unread_count(self, persona):
+        """Aantal berichten sinds de persona voor het laatst iets plaatste (of het gesprek binnenkwam)."""
+        return len(self.messages) - 1 - persona['last_read_message_index']
+
+    def history_text(self):
+        if self._history_text is None:
+            self._history_text = "\n".join(self.history_lines)
+        return self._history_text
@@ -0,0 +1,172 @@
+import os
+import json
+import time
+import argparse
+import datetime
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+
+from chat_generation import TOPICS, CHAT_AGENT_ROLE, LOCAL_MODEL_CHAT, load_personas_from_group_json, simulate_chat
+from async_agent import AsyncAgent, AgentLoopBridge
+from response_cache import get_response_cache
+from metrics import get_metrics
+
+CHAT_LOGS_FOLDER = "data/chat_logs"
+BIOS_FOLDER = "data/bios"
+MANIFEST_FILENAME = "manifest.jsonl"
+# Gelijktijdige simulaties per proces; de LLM-calls zelf worden begrensd door de semaphores en de rate limiter
+CHAT_RUNNER_WORKERS = int(os.getenv("CHAT_RUNNER_WORKERS", "8"))
+CHAT_RUNNER_PROCESSES = int(os.getenv("CHAT_RUNNER_PROCESSES", "1"))
+
+_manifest_lock = threading.Lock()
+
+
+def chatlog_path(group_name, topic_id, output_folder=CHAT_LOGS_FOLDER):
+    """Vaste bestandsnaam per (groep, onderwerp), zodat een herstart hetzelfde bestand overschrijft."""
+    return os.path.join(output_folder, f"chatlog_{group_name}_{topic_id}.json")
+
+
+def load_manifest(output_folder=CHAT_LOGS_FOLDER):
+    """Geeft de (groep, onderwerp)-paren die al klaar zijn en waarvan het chatlogbestand nog bestaat."""
+    manifest_path = os.path.join(output_folder, MANIFEST_FILENAME)
+    done = set()
+    if not os.path.exists(manifest_path):
+        return done
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # Laatste regel half geschreven bij een crash
+                continue
+            if os.path.exists(record["path"]):
+                done.add((record["group"], record["topic_id"]))
+    return done
+
+
+def append_manifest(record, output_folder=CHAT_LOGS_FOLDER):
+    """Eén regel per afgeronde simulatie; met O_APPEND en één write kunnen processen veilig tegelijk schrijven."""
+    line = json.dumps(record, ensure_ascii=False) + "\n"
+    with _manifest_lock:
+        with open(os.path.join(output_folder, MANIFEST_FILENAME), "a", encoding="utf-8") as f:
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+
+
+def write_chat_log(chat_log, filepath):
+    tmp_path = filepath + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(chat_log, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, filepath)
+
+
+def build_jobs(group_json_filepaths, topics=TOPICS, output_folder=CHAT_LOGS_FOLDER):
+    """Alle (groep, onderwerp)-paren die nog niet in het manifest staan."""
+    done = load_manifest(output_folder)
+    jobs = []
+    for group_json_filepath in sorted(group_json_filepaths):
+        group_name = os.path.splitext(os.path.basename(group_json_filepath))[0]
+        for topic in topics:
+            if (group_name, topic["id"]) not in done:
+                jobs.append((group_name, group_json_filepath, topic))
+    print(f"{len(done)} chat logs already in the manifest, {len(jobs)} to generate")
+    return jobs
+
+
+def run_job(group_name, group_json_filepath, topic, chat_agent, output_folder=CHAT_LOGS_FOLDER):
+    """Eén simulatie met een eigen, verse kopie van de persona's van de groep."""
+    personas = load_personas_from_group_json(group_json_filepath)
+    if not personas:
+        raise ValueError(f"No personas loaded from {group_json_filepath}")
+    start_time = time.time()
+    chat_log = simulate_chat(personas, topic, chat_agent)
+    duration = time.time() - start_time
+    filepath = chatlog_path(group_name, topic["id"], output_folder)
+    write_chat_log(chat_log, filepath)
+    append_manifest({
+        "group": group_name,
+        "topic_id": topic["id"],
+        "path": filepath,
+        "messages": len(chat_log),
+        "seconds": round(duration, 1),
+        "completed_at": datetime.datetime.now().isoformat(timespec="seconds"),
+    }, output_folder)
+    print(f"Simulation {group_name}/{topic['id']} complete. Generated {len(chat_log)} messages in {duration:.2f} seconds, saved to {filepath}")
+    return filepath
+
+
+def run_jobs_in_threads(jobs, max_workers=CHAT_RUNNER_WORKERS, output_folder=CHAT_LOGS_FOLDER):
+    """Draait jobs in een thread pool; alle LLM-calls lopen via één AsyncAgent op een achtergrond-event-loop."""
+    chat_agent = AgentLoopBridge(AsyncAgent(role=CHAT_AGENT_ROLE, local_model=LOCAL_MODEL_CHAT))
+    completed, failed = 0, 0
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            futures = {
+                pool.submit(run_job, group_name, group_json_filepath, topic, chat_agent, output_folder): (group_name, topic["id"])
+                for group_name, group_json_filepath, topic in jobs
+            }
+            for future in as_completed(futures):
+                group_name, topic_id = futures[future]
+                try:
+                    future.result()
+                    completed += 1
+                except Exception as e:
+                    failed += 1
+                    print(f"Simulation {group_name}/{topic_id} failed: {e}")
+    finally:
+        chat_agent.close()
+    print(get_response_cache().summary())
+    get_metrics().report_run()
+    return completed, failed
+
+
+def run_chat_jobs(group_json_filepaths, topics=TOPICS, max_workers=CHAT_RUNNER_WORKERS,
+                  processes=CHAT_RUNNER_PROCESSES, output_folder=CHAT_LOGS_FOLDER):
+    """
+    Elke (groep, onderwerp) is een onafhankelijke job. Met processes > 1 worden de jobs over meerdere
+    processen verdeeld, elk met een eigen thread pool; de Gemini-quota wordt via de SQLite rate limiter
+    gedeeld. Afgeronde paren staan in het manifest en worden bij een volgende run overgeslagen.
+    """
+    os.makedirs(output_folder, exist_ok=True)
+    jobs = build_jobs(group_json_filepaths, topics, output_folder)
+    if not jobs:
+        return
+    start_time = time.perf_counter()
+    if processes <= 1:
+        completed, failed = run_jobs_in_threads(jobs, max_workers, output_folder)
+    else:
+        shards = [jobs[i::processes] for i in range(processes)]
+        completed, failed = 0, 0
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            for shard_completed, shard_failed in pool.map(run_jobs_in_threads, shards, [max_workers] * processes, [output_folder] * processes):
+                completed += shard_completed
+                failed += shard_failed
+    duration_minutes = (time.perf_counter() - start_time) / 60
+    print(f"Chat runner finished in {duration_minutes:.2f} minutes: {completed} completed, {failed} failed (rerun to retry)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate chat logs for every (group, topic) pair in parallel.")
+    parser.add_argument("--bios", default=BIOS_FOLDER, help="folder with group_N.json bio files")
+    parser.add_argument("--output", default=CHAT_LOGS_FOLDER)
+    parser.add_argument("--groups", default=None, help="comma-separated group names, e.g. group_1,group_2")
+    parser.add_argument("--topics", default=None, help="comma-separated topic ids, e.g. topic_001,topic_003")
+    parser.add_argument("--workers", type=int, default=CHAT_RUNNER_WORKERS)
+    parser.add_argument("--processes", type=int, default=CHAT_RUNNER_PROCESSES)
+    args = parser.parse_args()
+
+    group_json_filepaths = [os.path.join(args.bios, f) for f in os.listdir(args.bios) if f.endswith(".json")]
+    if args.groups:
+        selected_groups = set(args.groups.split(","))
+        group_json_filepaths = [p for p in group_json_filepaths if os.path.splitext(os.path.basename(p))[0] in selected_groups]
+    topics = TOPICS
+    if args.topics:
+        selected_topics = set(args.topics.split(","))
+        topics = [topic for topic in TOPICS if topic["id"] in selected_topics]
+
+    run_chat_jobs(group_json_filepaths, topics, args.workers, args.processes, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,4 +2,7 @@ class DailyLimitException(Exception):
     pass
 
 class InvalidModelException(Exception):
-    pass
\ No newline at end of file
+    pass
+
+class CacheMissException(Exception):
+    pass
@@ -0,0 +1,285 @@
+import os
+import re
+import ast
+import sys
+import json
+import time
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pyarrow.dataset as ds
+
+# Kolomgeoriënteerde opslag van groepen, bios en chatlogs als gepartitioneerde Parquet-datasets
+PARQUET_ROOT = os.getenv("PARQUET_ROOT", "data/parquet")
+GROUPS_DATASET = os.path.join(PARQUET_ROOT, "groups")
+BIOS_DATASET = os.path.join(PARQUET_ROOT, "bios")
+CHAT_LOGS_DATASET = os.path.join(PARQUET_ROOT, "chat_logs")
+# Groepen worden per blok van GROUPS_PER_SHARD in één bestand gezet i.p.v. 1000 losse bestanden
+GROUPS_PER_SHARD = int(os.getenv("GROUPS_PER_SHARD", "100"))
+
+# Kolommen met een vaste (Nederlandse) set waarden; die worden als dictionary/categorical opgeslagen
+CATEGORY_COLUMNS = [
+    'sex', 'country_of_origin', 'socio_economic_status', 'household_composition', 'political_orientation',
+    'education_level', 'religion', 'marital_status', 'employment_status', 'housing_type',
+    'technology_proficiency', 'health_status', 'income_level', 'activity_level', 'response_latency_profile',
+    'emoji_usage_propensity', 'mention_propensity', 'message_length_preference', 'punctuation_habits',
+    'spelling_error_frequency', 'grammar_correctness', 'language_style', 'emphasis_style',
+    'message_chaining_preference',
+    # oudere bios gebruiken deze kolomnamen
+    'Income', 'Health', 'Social_Interaction', 'Dutch_reading_and_writing_skills',
+]
+ONLINE_HOURS_TYPE = pa.struct([
+    ("weekdays", pa.list_(pa.string())),
+    ("weekends", pa.list_(pa.string())),
+])
+GROUP_NUMBER_PATTERN = re.compile(r"group_(\d+)")
+
+
+def parse_online_hours(value):
+    """Zet typical_online_hours (dict, JSON-string of Python-literal) om naar een dict met twee lijsten."""
+    if isinstance(value, dict):
+        hours = value
+    elif isinstance(value, str):
+        try:
+            hours = json.loads(value)
+        except ValueError:
+            try:
+                hours = ast.literal_eval(value)
+            except (ValueError, SyntaxError):
+                hours = {}
+    else:
+        hours = {}
+    return {
+        "weekdays": [str(slot) for slot in hours.get("weekdays", [])],
+        "weekends": [str(slot) for slot in hours.get("weekends", [])],
+    }
+
+
+def group_number(name):
+    match = GROUP_NUMBER_PATTERN.search(name)
+    return int(match.group(1)) if match else None
+
+
+def _to_table(df):
+    """Typeert de kolommen: categoricals voor de enums, struct voor online uren, date voor birthdate."""
+    df = df.copy()
+    for column in CATEGORY_COLUMNS:
+        if column in df.columns:
+            df[column] = df[column].astype("category")
+    if "birthdate" in df.columns:
+        df["birthdate"] = pd.to_datetime(df["birthdate"], errors="coerce").dt.date
+    if "age" in df.columns:
+        df["age"] = pd.to_numeric(df["age"], errors="coerce").astype("Int16")
+
+    online_hours = None
+    if "typical_online_hours" in df.columns:
+        online_hours = pa.array([parse_online_hours(v) for v in df.pop("typical_online_hours")], type=ONLINE_HOURS_TYPE)
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    if online_hours is not None:
+        table = table.append_column("typical_online_hours", online_hours)
+    return table
+
+
+def _write_partition(table, dataset_path, partition_name):
+    """Schrijft één partitie atomisch weg (tmp-bestand + os.replace)."""
+    partition_dir = os.path.join(dataset_path, partition_name)
+    os.makedirs(partition_dir, exist_ok=True)
+    filepath = os.path.join(partition_dir, "part-0.parquet")
+    tmp_path = filepath + ".tmp"
+    pq.write_table(table, tmp_path, compression="zstd")
+    os.replace(tmp_path, filepath)
+    return filepath
+
+
+def _from_table(table):
+    """Terug naar pandas, met typical_online_hours als gewone dict met lijsten (zoals na json.loads)."""
+    online_hours = None
+    if "typical_online_hours" in table.column_names:
+        online_hours = table.column("typical_online_hours").to_pylist()
+        table = table.drop_columns(["typical_online_hours"])
+    df = table.to_pandas()
+    if online_hours is not None:
+        df["typical_online_hours"] = online_hours
+    return df
+
+
+def _read_dataset(dataset_path, columns=None, filter_expression=None):
+    if not os.path.exists(dataset_path):
+        raise FileNotFoundError(f"{dataset_path} not found, run `python data_generation/data_store.py convert` first")
+    dataset = ds.dataset(dataset_path, format="parquet", partitioning="hive")
+    return dataset.to_table(columns=columns, filter=filter_expression)
+
+
+def write_groups(group_frames, dataset_path=GROUPS_DATASET):
+    """
+    Schrijft {group_id: DataFrame} weg, gepartitioneerd per shard van GROUPS_PER_SHARD groepen.
+    Een shard wordt in zijn geheel vervangen, dus geef altijd alle groepen van een shard mee.
+    """
+    shards = {}
+    for group_id, df in group_frames.items():
+        shards.setdefault(group_id // GROUPS_PER_SHARD, []).append((group_id, df))
+
+    for shard, frames in sorted(shards.items()):
+        tables = []
+        for group_id, df in sorted(frames, key=lambda item: item[0]):
+            df = df.copy()
+            df.insert(0, "group", group_id)
+            tables.append(_to_table(df))
+        table = pa.concat_tables(tables, promote_options="permissive")
+        _write_partition(table, dataset_path, f"shard={shard}")
+
+
+def read_groups(dataset_path=GROUPS_DATASET, group_ids=None, columns=None):
+    """Leest de groepen als één DataFrame met een kolom 'group'; optioneel alleen bepaalde groepen of kolommen."""
+    filter_expression = ds.field("group").isin(list(group_ids)) if group_ids is not None else None
+    if columns is not None and "group" not in columns:
+        columns = ["group"] + list(columns)
+    df = _from_table(_read_dataset(dataset_path, columns, filter_expression))
+    return df.drop(columns=["shard"], errors="ignore").sort_values("group", kind="stable").reset_index(drop=True)
+
+
+def dates_to_strings(df):
+    """date-kolommen (zoals birthdate) als ISO-string, zoals ze uit de CSV's komen en json.dumps ze aankan."""
+    for column in df.columns:
+        if df[column].dtype == object and df[column].map(lambda value: hasattr(value, "isoformat")).any():
+            df[column] = df[column].map(lambda value: value.isoformat() if hasattr(value, "isoformat") else value)
+    return df
+
+
+def iter_group_frames(group_data_folder="data/groups", dataset_path=GROUPS_DATASET):
+    """
+    Geeft (group_name, DataFrame) per groep, uit de Parquet-dataset als die er is en anders uit de CSV's.
+    Gebruikt door de generatie-scripts, zodat die met beide formaten werken.
+    """
+    if os.path.exists(dataset_path):
+        df = dates_to_strings(read_groups(dataset_path))
+        for group_id, group_df in df.groupby("group", sort=True):
+            yield f"group_{group_id}", group_df.drop(columns=["group"]).reset_index(drop=True)
+        return
+    # group_2.csv voor group_10.csv
+    csv_files = sorted((f for f in os.listdir(group_data_folder) if f.endswith(".csv")), key=lambda f: group_number(f) or 0)
+    for csv_file in csv_files:
+        yield csv_file.replace(".csv", ""), pd.read_csv(os.path.join(group_data_folder, csv_file))
+
+
+def write_bios(group_bios, dataset_path=BIOS_DATASET):
+    """Schrijft {group_id: [persona_profile, ...]} weg, één partitie per groep."""
+    for group_id, bios in group_bios.items():
+        df = pd.DataFrame(bios)
+        df.insert(0, "persona_index", range(len(df)))
+        _write_partition(_to_table(df), dataset_path, f"group={group_id}")
+
+
+def read_bios(dataset_path=BIOS_DATASET, group_ids=None, columns=None):
+    filter_expression = ds.field("group").isin(list(group_ids)) if group_ids is not None else None
+    df = _from_table(_read_dataset(dataset_path, columns, filter_expression))
+    sort_columns = [c for c in ["group", "persona_index"] if c in df.columns]
+    return df.sort_values(sort_columns).reset_index(drop=True) if sort_columns else df
+
+
+def read_bio_records(group_id, dataset_path=BIOS_DATASET):
+    """De personaprofielen van één groep als lijst van dicts, net als json.load op data/bios/group_N.json."""
+    df = read_bios(dataset_path, group_ids=[group_id]).drop(columns=["group", "persona_index"])
+    records = df.to_dict(orient="records")
+    for record in records:
+        for key, value in list(record.items()):
+            if hasattr(value, "tolist") and not hasattr(value, "isoformat"):
+                # Lijstkolommen (zoals de bio-velden uit bio_structure) komen terug als numpy-array
+                record[key] = value = value.tolist()
+            if value is None or (not isinstance(value, (dict, list)) and pd.isna(value)):
+                del record[key]
+            elif hasattr(value, "isoformat"):
+                record[key] = value.isoformat()
+    return records
+
+
+def write_chat_logs(chat_logs, dataset_path=CHAT_LOGS_DATASET):
+    """
+    Schrijft {source: [message, ...]} weg, gepartitioneerd per topic_id.
+    source is de naam van het oorspronkelijke chatlogbestand (zonder .json).
+    """
+    frames = []
+    for source, messages in chat_logs.items():
+        df = pd.DataFrame(messages)
+        df.insert(0, "source", source)
+        df.insert(1, "group", group_number(source))
+        frames.append(df)
+    df = pd.concat(frames, ignore_index=True)
+    df["timestamp"] = pd.to_datetime(df["timestamp"], errors="coerce")
+    df["group"] = df["group"].astype("Int32")
+    df["sender"] = df["sender"].astype("category")
+    for topic_id, topic_df in df.groupby("topic_id", sort=True):
+        topic_df = topic_df.drop(columns=["topic_id"]).sort_values(["source", "id"])
+        table = pa.Table.from_pandas(topic_df.assign(source=topic_df["source"].astype("category")), preserve_index=False)
+        _write_partition(table, dataset_path, f"topic_id={topic_id}")
+
+
+def read_chat_logs(dataset_path=CHAT_LOGS_DATASET, topic_ids=None, columns=None):
+    filter_expression = ds.field("topic_id").isin(list(topic_ids)) if topic_ids is not None else None
+    df = _read_dataset(dataset_path, columns, filter_expression).to_pandas()
+    return df.sort_values(["source", "id"]).reset_index(drop=True) if "id" in df.columns else df
+
+
+def read_chat_documents(dataset_path=CHAT_LOGS_DATASET, topic_ids=None):
+    """Eén rij per chatlog met alle berichten samengevoegd in 'chat', als invoer voor training/evaluatie."""
+    df = read_chat_logs(dataset_path, topic_ids, columns=["source", "topic_id", "id", "text"])
+    documents = df.groupby(["source", "topic_id"], observed=True, sort=True)["text"].agg("\n".join)
+    return documents.rename("chat").reset_index()
+
+
+def load_group_csvs(group_data_folder="data/groups"):
+    return {
+        group_number(f): pd.read_csv(os.path.join(group_data_folder, f))
+        for f in os.listdir(group_data_folder) if f.endswith(".csv")
+    }
+
+
+def load_json_folder(folder):
+    data = {}
+    for f in sorted(os.listdir(folder)):
+        if f.endswith(".json"):
+            with open(os.path.join(folder, f), "r", encoding="utf-8") as fh:
+                data[f.replace(".json", "")] = json.load(fh)
+    return data
+
+
+def folder_size(path, extension):
+    total = 0
+    for root, _, files in os.walk(path):
+        total += sum(os.path.getsize(os.path.join(root, f)) for f in files if f.endswith(extension))
+    return total
+
+
+def convert(group_data_folder="data/groups", bio_data_folder="data/bios", chat_logs_folder="data/chat_logs"):
+    """Zet de bestaande CSV/JSON-bestanden om naar de Parquet-datasets en toont het verschil in grootte en laadtijd."""
+    if os.path.exists(group_data_folder):
+        start_time = time.perf_counter()
+        group_frames = load_group_csvs(group_data_folder)
+        csv_seconds = time.perf_counter() - start_time
+        write_groups(group_frames)
+        start_time = time.perf_counter()
+        read_groups()
+        parquet_seconds = time.perf_counter() - start_time
+        print(f"groups: {len(group_frames)} CSV files, {folder_size(group_data_folder, '.csv') / 1024:.0f} KB -> "
+              f"{folder_size(GROUPS_DATASET, '.parquet') / 1024:.0f} KB; load {csv_seconds:.2f}s -> {parquet_seconds:.2f}s")
+
+    if os.path.exists(bio_data_folder):
+        bios = {group_number(name): records for name, records in load_json_folder(bio_data_folder).items() if group_number(name) is not None}
+        if bios:
+            write_bios(bios)
+            print(f"bios: {len(bios)} groups, {folder_size(bio_data_folder, '.json') / 1024:.0f} KB -> "
+                  f"{folder_size(BIOS_DATASET, '.parquet') / 1024:.0f} KB")
+
+    if os.path.exists(chat_logs_folder):
+        chat_logs = load_json_folder(chat_logs_folder)
+        if chat_logs:
+            write_chat_logs(chat_logs)
+            print(f"chat_logs: {len(chat_logs)} files, {folder_size(chat_logs_folder, '.json') / 1024:.0f} KB -> "
+                  f"{folder_size(CHAT_LOGS_DATASET, '.parquet') / 1024:.0f} KB")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "convert":
+        convert()
+    else:
+        print("Usage: python data_generation/data_store.py convert")
@@ -0,0 +1,145 @@
+import math
+import heapq
+import random
+import datetime
+
+from chat_generation import (
+    SIMULATION_START_TIME_STR, SIMULATION_DURATION_HOURS, SIMULATION_STEP_MINUTES, MAX_MESSAGES, CHAT_HISTORY_CONTEXT_LENGTH,
+    post_probability, choose_poster, cooldown_steps, generate_seed_message, generate_llm_chat_message,
+    build_persona_contexts,
+)
+from online_schedule import OnlineSchedule
+from chat_history import ChatHistory
+
+# Soorten events in de wachtrij
+ONLINE_CHANGE = 0
+COOLDOWN_EXPIRED = 1
+
+
+def scale_probability(prob_per_step, step_minutes):
+    """Zet een kans per SIMULATION_STEP_MINUTES om naar een kans per step_minutes, met hetzelfde tempo per minuut."""
+    if step_minutes == SIMULATION_STEP_MINUTES or prob_per_step >= 1.0:
+        return prob_per_step
+    return 1.0 - (1.0 - prob_per_step) ** (step_minutes / SIMULATION_STEP_MINUTES)
+
+
+def steps_until_post(probabilities):
+    """
+    Aantal stappen zonder bericht voordat er (minstens) één persona post, bij gelijkblijvende kansen.
+    Elke stap is een Bernoulli-experiment, dus dit is geometrisch verdeeld. None als niemand kan posten.
+    """
+    none_posts = 1.0
+    for prob in probabilities:
+        none_posts *= 1.0 - prob
+    if none_posts >= 1.0:
+        return None
+    if none_posts <= 0.0:
+        return 0
+    return int(math.log(1.0 - random.random()) / math.log(none_posts))
+
+
+def sample_posters(probabilities):
+    """Trekt de groep personas die in deze stap wil posten, gegeven dat er minstens één is."""
+    while True:
+        posters = [name for name, prob in probabilities.items() if random.random() < prob]
+        if posters:
+            return posters
+
+
+def run_event_simulation(personas_data, topic, chat_agent, duration_hours=SIMULATION_DURATION_HOURS,
+                         step_minutes=SIMULATION_STEP_MINUTES, start_time_str=SIMULATION_START_TIME_STR):
+    """
+    Discrete-event variant van run_simulation. In plaats van elke stap alle persona's langs te gaan
+    springt de klok direct naar het volgende event: iemand komt online/gaat offline, een cooldown
+    loopt af, of er wordt een bericht geplaatst. Tussen twee events zijn de postkansen constant,
+    dus de stap van het volgende bericht wordt in één keer geometrisch getrokken. Per stap is de
+    verdeling gelijk aan die van run_simulation; step_minutes en duration_hours zijn vrij te kiezen.
+    """
+    chat_history = ChatHistory(personas_data.keys(), CHAT_HISTORY_CONTEXT_LENGTH)
+    start_time = datetime.datetime.strptime(start_time_str, "%Y-%m-%d %H:%M:%S")
+    num_steps = math.ceil(duration_hours * 60 / step_minutes)
+
+    def step_time(step):
+        return start_time + datetime.timedelta(minutes=step * step_minutes)
+
+    online_schedule = OnlineSchedule(personas_data)
+    names = online_schedule.names
+    name_index = {name: i for i, name in enumerate(names)}
+    online = online_schedule.online_matrix(start_time, num_steps, step_minutes)
+    persona_contexts = build_persona_contexts(personas_data, topic)
+
+    events = []
+    for i, name in enumerate(names):
+        for step in (online[i, 1:] != online[i, :-1]).nonzero()[0] + 1:
+            events.append((int(step), ONLINE_CHANGE, name))
+    heapq.heapify(events)
+
+    is_online = {name: bool(online[i, 0]) for i, name in enumerate(names)}
+    # Eerste stap waarop de persona weer mag posten
+    ready_step = {name: 0 for name in names}
+
+    online_at_start = [name for name in names if is_online[name]]
+    if online_at_start:
+        seed_poster_name = random.choice(online_at_start)
+        seed_poster = personas_data[seed_poster_name]
+        seed_message_text = generate_seed_message(seed_poster, topic, chat_agent)
+        chat_history.append({
+            "id": len(chat_history),
+            "timestamp": start_time.isoformat(),
+            "sender": seed_poster_name,
+            "text": seed_message_text,
+            "topic_id": topic['id']
+        })
+        print(f"[{start_time.strftime('%H:%M')}] {seed_poster_name}: {seed_message_text} (SEED)")
+        # Het seedbericht valt vóór de eerste stap, waarin de cooldown al één keer afloopt
+        ready_step[seed_poster_name] = max(cooldown_steps(seed_poster, step_minutes) - 1, 0)
+        seed_poster['last_read_message_index'] = len(chat_history) - 1
+        if ready_step[seed_poster_name] > 0:
+            heapq.heappush(events, (ready_step[seed_poster_name], COOLDOWN_EXPIRED, seed_poster_name))
+    else:
+        print("No personas online at start to seed message. Waiting for someone to come online.")
+
+    step = 0
+    num_events = 0
+    while step < num_steps and len(chat_history) < MAX_MESSAGES:
+        while events and events[0][0] <= step:
+            _, kind, name = heapq.heappop(events)
+            num_events += 1
+            if kind == ONLINE_CHANGE:
+                is_online[name] = bool(online[name_index[name], step])
+
+        probabilities = {
+            name: scale_probability(post_probability(name, personas_data[name], chat_history), step_minutes)
+            for name in names if is_online[name] and ready_step[name] <= step
+        }
+        next_event_step = min(events[0][0] if events else num_steps, num_steps)
+        idle_steps = steps_until_post(probabilities.values())
+        if idle_steps is None or step + idle_steps >= next_event_step:
+            step = next_event_step
+            continue
+
+        step += idle_steps
+        current_sim_time = step_time(step)
+        poster_name = choose_poster(sample_posters(probabilities), chat_history)
+        persona_to_post = personas_data[poster_name]
+        message_text = generate_llm_chat_message(persona_to_post, topic, chat_history, chat_agent, persona_contexts[poster_name])
+        if message_text:
+            chat_history.append({
+                "id": len(chat_history),
+                "timestamp": current_sim_time.isoformat(),
+                "sender": poster_name,
+                "text": message_text,
+                "topic_id": topic['id']
+            })
+            print(f"[{current_sim_time.strftime('%H:%M')}] {poster_name}: {message_text}")
+            ready_step[poster_name] = step + max(cooldown_steps(persona_to_post, step_minutes), 1)
+            persona_to_post['last_read_message_index'] = len(chat_history) - 1
+            if ready_step[poster_name] > step + 1:
+                heapq.heappush(events, (ready_step[poster_name], COOLDOWN_EXPIRED, poster_name))
+        step += 1
+
+    for name in names:
+        personas_data[name]['is_online'] = is_online[name]
+        personas_data[name]['message_cooldown_timer'] = max(0, ready_step[name] - step)
+    print(f"Event simulation processed {num_events} events over {min(step, num_steps)} steps of {step_minutes} minutes.")
+    return chat_history.messages
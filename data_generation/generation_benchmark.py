@@ -0,0 +1,195 @@
+import os
+import io
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import tracemalloc
+import contextlib
+
+# Vóór de imports van de generatiemodules: geen echte LLM, geen cache, geen wachttijd per stap
+# en geen stream-statistieken of metrics op schijf, zodat alleen de eigen code gemeten wordt
+os.environ.setdefault("LLM_BACKEND", "mock")
+os.environ.setdefault("LLM_CACHE_MODE", "off")
+os.environ.setdefault("SIMULATION_STEP_DELAY_SECONDS", "0")
+os.environ.setdefault("STREAM_STATS_PATH", "")
+os.environ.setdefault("METRICS_EXPORT", "")
+
+from faker import Faker
+
+import chat_generation
+import bio_generation
+from agent import agent
+from llm_backends import MockBackend
+from group_generation import generate_people, get_worker_faker, MIN_PEOPLE, MAX_PEOPLE
+from vectorized_group_generation import generate_people_vectorized
+from chat_generation import CHAT_AGENT_ROLE, TOPICS, MAX_MESSAGES, load_personas_from_group_json
+from event_simulation import run_event_simulation
+
+BENCHMARK_SIZES = [MIN_PEOPLE, 20, MAX_PEOPLE]
+BENCHMARK_REPEATS = 3
+BENCHMARK_SEED = 313
+# Een stage is een regressie als hij zoveel trager is (of zoveel meer geheugen gebruikt) dan de baseline
+REGRESSION_THRESHOLD = 0.25
+# Verschillen kleiner dan dit zijn meetruis
+MIN_REGRESSION_SECONDS = 0.01
+MIN_REGRESSION_MB = 1.0
+
+
+def measure(func, repeats=BENCHMARK_REPEATS):
+    """
+    Draait func `repeats` keer met stdout onderdrukt. Geeft de snelste tijd, de piek van het
+    geheugen (tracemalloc, in een aparte run omdat tracing zelf de tijd vertraagt) en de uitkomst.
+    """
+    best_seconds = None
+    result = None
+    for _ in range(repeats):
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            result = func()
+            seconds = time.perf_counter() - start
+        best_seconds = seconds if best_seconds is None else min(best_seconds, seconds)
+    tracemalloc.start()
+    with contextlib.redirect_stdout(io.StringIO()):
+        func()
+    peak_bytes = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best_seconds, peak_bytes / 1024 / 1024, result
+
+
+def benchmark_groups(size, repeats):
+    results = []
+    faker_instance = get_worker_faker()
+
+    def faker_group():
+        random.seed(BENCHMARK_SEED)
+        Faker.seed(BENCHMARK_SEED)
+        faker_instance.seed_instance(BENCHMARK_SEED)
+        return generate_people(faker_instance, size)
+
+    for stage, func in [("group_faker", faker_group), ("group_vectorized", lambda: generate_people_vectorized(size, seed=BENCHMARK_SEED))]:
+        seconds, peak_mb, df = measure(func, repeats)
+        results.append({"stage": stage, "size": size, "seconds": seconds, "peak_mb": peak_mb, "personas_per_second": len(df) / seconds})
+    return results, df
+
+
+def benchmark_bios(df, size, workdir, bio_agent, repeats):
+    results = []
+    bios_path = None
+    for output in ["structured", "text"]:
+        bio_generation.BIO_OUTPUT = output
+        path = os.path.join(workdir, f"bios_{output}_{size}.json")
+        seconds, peak_mb, _ = measure(lambda: bio_generation.save_bio(df, bio_agent, path), repeats)
+        results.append({"stage": f"bio_{output}", "size": size, "seconds": seconds, "peak_mb": peak_mb, "personas_per_second": len(df) / seconds})
+        bios_path = bios_path or path
+    bio_generation.BIO_OUTPUT = "structured"
+    return results, bios_path
+
+
+def benchmark_chats(bios_path, size, chat_agent, repeats):
+    results = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        personas = load_personas_from_group_json(bios_path)
+    topic = TOPICS[0]
+
+    def simulate(engine):
+        def run():
+            random.seed(f"{BENCHMARK_SEED}:{size}")
+            # De simulatie past de persona's aan (cooldowns, online status); elke run begint schoon
+            personas_copy = {name: dict(persona) for name, persona in personas.items()}
+            if engine == "event":
+                return run_event_simulation(personas_copy, topic, chat_agent, duration_hours=chat_generation.SIMULATION_DURATION_HOURS)
+            return chat_generation.run_simulation(personas_copy, topic, chat_agent)
+        return run
+
+    for engine in ["stepper", "event"]:
+        seconds, peak_mb, messages = measure(simulate(engine), repeats)
+        results.append({"stage": f"chat_{engine}", "size": size, "seconds": seconds, "peak_mb": peak_mb,
+                        "messages": len(messages), "messages_per_second": len(messages) / seconds})
+    return results
+
+
+def run_benchmark(sizes=BENCHMARK_SIZES, repeats=BENCHMARK_REPEATS, tokens=40, latency_ms=0.0, hours=None):
+    """
+    Meet group-, bio- en chatgeneratie per groepsgrootte met de MockBackend als LLM. Met hours
+    loopt de chatsimulatie langer dan de standaard, zodat grote groepen MAX_MESSAGES halen.
+    """
+    if hours is not None:
+        chat_generation.SIMULATION_DURATION_HOURS = hours
+    backend = MockBackend(tokens=tokens, latency_ms=latency_ms)
+    bio_agent = agent(role="benchmark bio agent", backend=backend)
+    chat_agent = agent(role=CHAT_AGENT_ROLE, backend=backend)
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for size in sizes:
+            group_results, df = benchmark_groups(size, repeats)
+            bio_results, bios_path = benchmark_bios(df, size, workdir, bio_agent, repeats)
+            chat_results = benchmark_chats(bios_path, size, chat_agent, repeats)
+            results.extend(group_results + bio_results + chat_results)
+            for result in group_results + bio_results + chat_results:
+                print(format_result(result))
+    return {
+        "config": {"sizes": list(sizes), "repeats": repeats, "mock_tokens": tokens, "mock_latency_ms": latency_ms,
+                   "simulation_hours": chat_generation.SIMULATION_DURATION_HOURS, "max_messages": MAX_MESSAGES},
+        "results": results,
+    }
+
+
+def format_result(result):
+    line = f"{result['stage']:<17} size {result['size']:>3}: {result['seconds'] * 1000:9.1f} ms, peak {result['peak_mb']:7.2f} MB"
+    if "messages" in result:
+        line += f", {result['messages']} messages ({result['messages_per_second']:.0f}/s)"
+    else:
+        line += f", {result['personas_per_second']:.0f} personas/s"
+    return line
+
+
+def find_regressions(report, baseline, threshold=REGRESSION_THRESHOLD):
+    """Vergelijkt per (stage, size) tijd en geheugen met de baseline; geeft de regressies als tekst terug."""
+    baseline_results = {(result["stage"], result["size"]): result for result in baseline["results"]}
+    regressions = []
+    for result in report["results"]:
+        old = baseline_results.get((result["stage"], result["size"]))
+        if old is None:
+            continue
+        if result["seconds"] > old["seconds"] * (1 + threshold) and result["seconds"] - old["seconds"] > MIN_REGRESSION_SECONDS:
+            regressions.append(f"{result['stage']} size {result['size']}: {old['seconds'] * 1000:.1f} ms -> {result['seconds'] * 1000:.1f} ms")
+        if result["peak_mb"] > old["peak_mb"] * (1 + threshold) and result["peak_mb"] - old["peak_mb"] > MIN_REGRESSION_MB:
+            regressions.append(f"{result['stage']} size {result['size']}: peak {old['peak_mb']:.2f} MB -> {result['peak_mb']:.2f} MB")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark group, bio and chat generation with a mock LLM backend.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=BENCHMARK_SIZES, help="group sizes (personas)")
+    parser.add_argument("--repeats", type=int, default=BENCHMARK_REPEATS)
+    parser.add_argument("--tokens", type=int, default=40, help="words per mock response")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="injected latency per mock call")
+    parser.add_argument("--hours", type=float, default=None, help="simulated chat duration (default SIMULATION_DURATION_HOURS)")
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument("--baseline", help="JSON results of an earlier run; exit 1 on regressions")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD)
+    args = parser.parse_args()
+
+    report = run_benchmark(args.sizes, args.repeats, args.tokens, args.latency_ms, args.hours)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("config") != report["config"]:
+            print(f"Warning: {args.baseline} was run with a different config, timings are not directly comparable")
+        regressions = find_regressions(report, baseline, args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions against {args.baseline} (threshold {args.threshold:.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,23 @@
 import os
+import time
 import random
+import hashlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
 import pandas as pd
 from faker import Faker
 from faker.providers import DynamicProvider
 from dotenv import load_dotenv 
 import json
 
+GROUP_DATA_FOLDER = "data/groups"
+GROUP_AMOUNT = 1000
+MIN_PEOPLE = 10
+MAX_PEOPLE = 35
+BASE_SEED = 313
+# Aantal processen voor --sharded
+GROUP_WORKERS = int(os.getenv("GROUP_WORKERS", str(os.cpu_count() or 1)))
+
 def create_weighted_provider(elements, weights):
     """
     Creëert een lijst waarin elk element wordt herhaald op basis van de bijbehorende gewicht.
@@ -16,246 +28,233 @@ def create_weighted_provider(elements, weights):
         weighted_elements.extend([element] * weight)
     return weighted_elements
 
+# Gewogen keuzes per attribuut: (elementen, gewichten)
+PROVIDER_WEIGHTS = {
+    'country_of_origin': (
+        ['Nederlands', 'Turks', 'Marokkaans', 'Surinaams', 'Antilliaans', 'Indonesisch', 'Duits', 'Pools', 'Chinees', 'Indiaas', 'Afghaans', 'Irakees', 'Somalisch', 'Syrisch', 'Eritrees', 'Roemeens', 'Bulgaars', 'Italiaans', 'Spaans', 'Portugees'],
+        [70, 10, 10, 8, 5, 5, 5, 5, 7, 5, 3, 3, 3, 3, 3, 3, 3, 2, 2, 2]
+    ),
+    'socio_economic_status': (
+        ['Laag', 'Gemiddeld', 'Hoog'],
+        [50, 30, 20]
+    ),
+    'political_orientation': (
+        ['Links', 'Midden', 'Rechts'],
+        [1, 1, 1]
+    ),
+    'education_level': (
+        ['Basisonderwijs', 'VMBO', 'HAVO', 'VWO', 'MBO', 'HBO', 'WO'],
+        [5, 20, 15, 10, 25, 15, 10]
+    ),
+    'religion': (
+        ['Christelijk', 'Islamitisch', 'Hindoeïstisch', 'Boeddhistisch', 'Joods', 'Atheïstisch', 'Anders', 'Geen'], # Added 'Geen'
+        [30, 15, 5, 5, 2, 25, 8, 10]
+    ),
+    'housing_type': (
+        ['Appartement', 'Rijtjeshuis', 'Vrijstaand', 'Twee-onder-een-kap', 'Studio', 'Woonboot'],
+        [30, 40, 10, 10, 5, 5]
+    ),
+    'activity_level_provider': (
+        ['Laag', 'Gemiddeld', 'Hoog'],
+        [30, 50, 20]
+    ),
+    'response_latency_profile_provider': (
+        ['Onmiddellijk', 'Korte vertraging', 'Lange vertraging', 'Variabel'],
+        [30, 40, 15, 15]
+    ),
+    'emoji_usage_propensity_provider': (
+        ['Geen', 'Laag', 'Gemiddeld', 'Hoog'],
+        [20, 30, 30, 20]
+    ),
+    'mention_propensity_provider': (
+        ['Laag', 'Gemiddeld', 'Hoog'],
+        [50, 40, 10]
+    ),
+    'message_length_preference_provider': (
+        ['Kort', 'Lang', 'Gemengd'],
+        [40, 20, 40]
+    ),
+    'punctuation_habits_provider': (
+        ['Correct', 'Schaars', 'Overmatig'],
+        [50, 30, 20]
+    ),
+    'spelling_error_frequency_provider': (
+        ['Geen', 'Laag', 'Gemiddeld', 'Hoog'],
+        [40, 30, 20, 10]
+    ),
+    'grammar_correctness_provider': (
+        ['Correct', 'Informeel', 'Slecht'],
+        [50, 35, 15]
+    ),
+    'language_style_provider': (
+        ['Formeel', 'Informeel', 'Straattaal', 'Vakjargon'],
+        [20, 50, 15, 15]
+    ),
+    'emphasis_style_provider': (
+        ['Geen', 'Soms HOOFDLETTERS', 'Veel uitroeptekens', 'Gemengd'],
+        [50, 20, 20, 10]
+    ),
+    'message_chaining_preference_provider': (
+        ['Eén lange boodschap', 'Meerdere korte boodschappen', 'Gemengd'],
+        [30, 40, 30]
+    ),
+}
+MIN_AGE = 18
+MAX_AGE = 90 # exclusief
+
+# Leeftijdsafhankelijke keuzes: (bovengrens leeftijd (exclusief) of None, elementen, gewichten)
+EMPLOYMENT_STATUS_BY_AGE = [
+    (25, ['Student', 'Fulltime', 'Parttime', 'Zelfstandig', 'Werkzoekend'], [60, 15, 10, 5, 10]),
+    (67, ['Fulltime', 'Parttime', 'Zelfstandig', 'Werkzoekend'], [50, 25, 15, 10]),
+    (None, ['Gepensioneerd', 'Parttime', 'Vrijwilligerswerk'], [80, 10, 10]),
+]
+MARITAL_STATUS_BY_AGE = [
+    (25, ['Ongehuwd', 'Relatie'], [85, 15]),
+    (35, ['Ongehuwd', 'Gehuwd', 'Samenwonend', 'Relatie'], [40, 30, 20, 10]),
+    (50, ['Gehuwd', 'Gescheiden', 'Ongehuwd', 'Samenwonend', 'Weduwe/Weduwnaar'], [55, 20, 10, 10, 5]),
+    (None, ['Gehuwd', 'Gescheiden', 'Weduwe/Weduwnaar', 'Samenwonend', 'Ongehuwd'], [45, 25, 20, 5, 5]),
+]
+HEALTH_STATUS_BY_AGE = [
+    (40, ['Zeer goed', 'Goed', 'Redelijk', 'Matig', 'Slecht'], [45, 35, 15, 3, 2]),
+    (65, ['Zeer goed', 'Goed', 'Redelijk', 'Matig', 'Slecht'], [25, 40, 25, 7, 3]),
+    (None, ['Goed', 'Redelijk', 'Matig', 'Slecht', 'Zeer slecht'], [20, 35, 25, 15, 5]),
+]
+TECHNOLOGY_PROFICIENCY_BY_AGE = [
+    (25, ['Beginner', 'Gemiddeld', 'Gevorderd', 'Expert'], [5, 25, 45, 25]),
+    (50, ['Beginner', 'Gemiddeld', 'Gevorderd', 'Expert'], [5, 20, 50, 25]),
+    (65, ['Beginner', 'Gemiddeld', 'Gevorderd'], [20, 50, 30]),
+    (None, ['Zeer beperkt', 'Beginner', 'Gemiddeld'], [30, 45, 25]),
+]
+# Inkomen per sociaal-economische status; studenten en werkzoekenden hebben altijd een laag inkomen
+INCOME_LEVEL_BY_STATUS = {
+    'Laag': (['Laag', 'Beneden gemiddeld'], [80, 20]),
+    'Gemiddeld': (['Beneden gemiddeld', 'Gemiddeld', 'Boven gemiddeld'], [20, 60, 20]),
+    'Hoog': (['Boven gemiddeld', 'Hoog'], [30, 70]),
+}
+LOW_INCOME_EMPLOYMENT = ['Student', 'Werkzoekend']
+# Huishoudsamenstelling: (burgerlijke staten, bovengrens leeftijd of None, werkstatus of None, elementen, gewichten)
+# De eerste regel die past wordt gebruikt
+HOUSEHOLD_COMPOSITION_RULES = [
+    (('Ongehuwd', 'Relatie'), 25, 'Student', ['Bij ouders', 'Op kamers/Studio', 'Samenwonend (met partner/huisgenoten)'], [40, 40, 20]),
+    (('Ongehuwd', 'Relatie'), 25, None, ['Bij ouders', 'Alleenstaand', 'Samenwonend (met partner/huisgenoten)'], [30, 40, 30]),
+    (('Ongehuwd', 'Relatie'), 35, None, ['Alleenstaand', 'Samenwonend (met partner)', 'Alleenstaande ouder'], [50, 40, 10]),
+    (('Ongehuwd', 'Relatie'), None, None, ['Alleenstaand', 'Samenwonend (met partner)', 'Alleenstaande ouder', 'Woongroep'], [60, 20, 15, 5]),
+    (('Gehuwd', 'Samenwonend'), 30, None, ['Samenwonend zonder kinderen', 'Samenwonend met jonge kinderen'], [60, 40]),
+    (('Gehuwd', 'Samenwonend'), 50, None, ['Samenwonend met kinderen', 'Samenwonend zonder kinderen (kinderen uit huis/geen kinderen)'], [70, 30]),
+    (('Gehuwd', 'Samenwonend'), None, None, ['Samenwonend zonder inwonende kinderen', 'Samenwonend met volwassen kinderen'], [85, 15]),
+    (('Gescheiden',), 40, None, ['Alleenstaand', 'Alleenstaande ouder', 'Nieuwe partner, samengesteld gezin'], [40, 45, 15]),
+    (('Gescheiden',), None, None, ['Alleenstaand', 'Alleenstaande ouder (oudere kinderen)', 'Nieuwe partner'], [50, 30, 20]),
+    (('Weduwe/Weduwnaar',), None, None, ['Alleenstaand', 'Alleenstaand (kinderen uit huis)', 'Bij familie'], [70, 20, 10]),
+]
+UNKNOWN_HOUSEHOLD = 'Onbekend'
+# Online uren doordeweeks per werkstatus (uniforme keuze uit de opties)
+WEEKDAY_ONLINE_HOURS_BY_EMPLOYMENT = [
+    (('Student',), [
+        ["10:00-13:00", "17:00-20:00", "22:00-01:00"],
+        ["13:00-16:00", "19:00-23:00"],
+        ["09:00-12:00", "15:00-18:00", "21:00-00:00"]
+    ]),
+    (('Fulltime', 'Parttime', 'Zelfstandig'), [
+        ["07:00-09:00", "12:00-13:00", "18:00-22:00"],
+        ["19:00-23:00"],
+        ["08:00-10:00", "17:00-21:00"]
+    ]),
+    (('Werkzoekend',), [
+        ["09:00-17:00"],
+        ["10:00-14:00", "19:00-22:00"],
+    ]),
+    (('Gepensioneerd',), [
+        ["09:00-12:00", "14:00-17:00"],
+        ["10:00-15:00", "19:00-21:00"],
+        ["08:00-11:00", "13:00-16:00", "20:00-22:00"]
+    ]),
+]
+DEFAULT_WEEKDAY_ONLINE_HOURS = ["19:00-22:00"]
+# Online uren in het weekend per leeftijdsgroep: (bovengrens leeftijd of None, opties)
+WEEKEND_ONLINE_HOURS_BY_AGE = [
+    (30, [
+        ["11:00-15:00", "19:00-02:00"],
+        ["14:00-18:00", "20:00-00:00"],
+        ["Gehele dag met onderbrekingen"]
+    ]),
+    (65, [
+        ["10:00-13:00", "16:00-22:00"],
+        ["09:00-12:00", "15:00-18:00", "20:00-23:00"],
+        ["Sporadisch gedurende de dag"]
+    ]),
+    (None, [
+        ["09:00-12:00", "14:00-17:00", "19:00-21:00"],
+        ["10:00-16:00"],
+        ["Flexibel, meerdere korte periodes"]
+    ]),
+]
+
 def generate_dynamic_providers(faker_instance):
     """
     Voegt dynamische providers toe aan de Faker-instantie voor verschillende attributen.
     """
     providers = {
-        'country_of_origin': create_weighted_provider(
-            ['Nederlands', 'Turks', 'Marokkaans', 'Surinaams', 'Antilliaans', 'Indonesisch', 'Duits', 'Pools', 'Chinees', 'Indiaas', 'Afghaans', 'Irakees', 'Somalisch', 'Syrisch', 'Eritrees', 'Roemeens', 'Bulgaars', 'Italiaans', 'Spaans', 'Portugees'],
-            [70, 10, 10, 8, 5, 5, 5, 5, 7, 5, 3, 3, 3, 3, 3, 3, 3, 2, 2, 2]
-        ),
-        'socio_economic_status': create_weighted_provider(
-            ['Laag', 'Gemiddeld', 'Hoog'],
-            [50, 30, 20]
-        ),
-        'political_orientation': ['Links', 'Midden', 'Rechts'],
-        'education_level': create_weighted_provider(
-            ['Basisonderwijs', 'VMBO', 'HAVO', 'VWO', 'MBO', 'HBO', 'WO'],
-            [5, 20, 15, 10, 25, 15, 10]
-        ),
-        'religion': create_weighted_provider(
-            ['Christelijk', 'Islamitisch', 'Hindoeïstisch', 'Boeddhistisch', 'Joods', 'Atheïstisch', 'Anders', 'Geen'], # Added 'Geen'
-            [30, 15, 5, 5, 2, 25, 8, 10]
-        ),
-        'housing_type': create_weighted_provider(
-            ['Appartement', 'Rijtjeshuis', 'Vrijstaand', 'Twee-onder-een-kap', 'Studio', 'Woonboot'],
-            [30, 40, 10, 10, 5, 5]
-        ),
-        'activity_level_provider': create_weighted_provider(
-            ['Laag', 'Gemiddeld', 'Hoog'],
-            [30, 50, 20]
-        ),
-        'response_latency_profile_provider': create_weighted_provider(
-            ['Onmiddellijk', 'Korte vertraging', 'Lange vertraging', 'Variabel'],
-            [30, 40, 15, 15]
-        ),
-        'emoji_usage_propensity_provider': create_weighted_provider(
-            ['Geen', 'Laag', 'Gemiddeld', 'Hoog'],
-            [20, 30, 30, 20]
-        ),
-        'mention_propensity_provider': create_weighted_provider(
-            ['Laag', 'Gemiddeld', 'Hoog'],
-            [50, 40, 10]
-        ),
-        'message_length_preference_provider': create_weighted_provider(
-            ['Kort', 'Lang', 'Gemengd'],
-            [40, 20, 40]
-        ),
-        'punctuation_habits_provider': create_weighted_provider(
-            ['Correct', 'Schaars', 'Overmatig'],
-            [50, 30, 20]
-        ),
-        'spelling_error_frequency_provider': create_weighted_provider(
-            ['Geen', 'Laag', 'Gemiddeld', 'Hoog'],
-            [40, 30, 20, 10]
-        ),
-        'grammar_correctness_provider': create_weighted_provider(
-            ['Correct', 'Informeel', 'Slecht'],
-            [50, 35, 15]
-        ),
-        'language_style_provider': create_weighted_provider(
-            ['Formeel', 'Informeel', 'Straattaal', 'Vakjargon'],
-            [20, 50, 15, 15]
-        ),
-        'emphasis_style_provider': create_weighted_provider(
-            ['Geen', 'Soms HOOFDLETTERS', 'Veel uitroeptekens', 'Gemengd'],
-            [50, 20, 20, 10]
-        ),
-        'message_chaining_preference_provider': create_weighted_provider(
-            ['Eén lange boodschap', 'Meerdere korte boodschappen', 'Gemengd'],
-            [30, 40, 30]
-        ),
+        provider_name: create_weighted_provider(elements, weights)
+        for provider_name, (elements, weights) in PROVIDER_WEIGHTS.items()
     }
 
     for provider_name, elements in providers.items():
         dynamic_provider = DynamicProvider(provider_name=provider_name, elements=elements)
         faker_instance.add_provider(dynamic_provider)
     
-    age_provider = DynamicProvider(provider_name='age_provider', elements=list(range(18, 90)))
+    age_provider = DynamicProvider(provider_name='age_provider', elements=list(range(MIN_AGE, MAX_AGE)))
     faker_instance.add_provider(age_provider)
 
+def choose_by_age(table, age):
+    for max_age, elements, weights in table:
+        if max_age is None or age < max_age:
+            return random.choices(elements, weights=weights)[0]
+
 def get_employment_status(age):
     if age < 18: 
         return 'Niet van toepassing'
-    if age < 25:
-        return random.choices(
-            ['Student', 'Fulltime', 'Parttime', 'Zelfstandig', 'Werkzoekend'],
-            weights=[60, 15, 10, 5, 10]
-        )[0]
-    elif age < 67:
-        return random.choices(
-            ['Fulltime', 'Parttime', 'Zelfstandig', 'Werkzoekend'],
-            weights=[50, 25, 15, 10]
-        )[0]
-    else:
-        return random.choices(
-            ['Gepensioneerd', 'Parttime', 'Vrijwilligerswerk'],
-            weights=[80, 10, 10]
-        )[0]
+    return choose_by_age(EMPLOYMENT_STATUS_BY_AGE, age)
 
 def get_marital_status(age):
-    if age < 25:
-        return random.choices(['Ongehuwd', 'Relatie'], weights=[85,15])[0]
-    elif age < 35:
-        return random.choices(
-            ['Ongehuwd', 'Gehuwd', 'Samenwonend', 'Relatie'],
-            weights=[40, 30, 20, 10]
-        )[0]
-    elif age < 50:
-        return random.choices(
-            ['Gehuwd', 'Gescheiden', 'Ongehuwd', 'Samenwonend', 'Weduwe/Weduwnaar'],
-            weights=[55, 20, 10, 10, 5]
-        )[0]
-    else:
-        return random.choices(
-            ['Gehuwd', 'Gescheiden', 'Weduwe/Weduwnaar', 'Samenwonend', 'Ongehuwd'],
-            weights=[45, 25, 20, 5, 5]
-        )[0]
+    return choose_by_age(MARITAL_STATUS_BY_AGE, age)
 
 def get_health_status(age):
-    if age < 40:
-        return random.choices(
-            ['Zeer goed', 'Goed', 'Redelijk', 'Matig', 'Slecht'],
-            weights=[45, 35, 15, 3, 2]
-        )[0]
-    elif age < 65:
-        return random.choices(
-            ['Zeer goed', 'Goed', 'Redelijk', 'Matig', 'Slecht'],
-            weights=[25, 40, 25, 7, 3]
-        )[0]
-    else:
-        return random.choices(
-            ['Goed', 'Redelijk', 'Matig', 'Slecht', 'Zeer slecht'],
-            weights=[20, 35, 25, 15, 5]
-        )[0]
+    return choose_by_age(HEALTH_STATUS_BY_AGE, age)
 
 def get_income_level(socio_economic_status, employment_status):
-    if employment_status in ['Student', 'Werkzoekend']:
+    if employment_status in LOW_INCOME_EMPLOYMENT:
         return 'Laag'
-    if socio_economic_status == 'Laag':
-        return random.choices(['Laag', 'Beneden gemiddeld'], weights=[80, 20])[0]
-    elif socio_economic_status == 'Gemiddeld':
-        return random.choices(['Beneden gemiddeld', 'Gemiddeld', 'Boven gemiddeld'], weights=[20, 60, 20])[0]
-    else: 
-        return random.choices(['Boven gemiddeld', 'Hoog'], weights=[30, 70])[0]
+    elements, weights = INCOME_LEVEL_BY_STATUS.get(socio_economic_status, INCOME_LEVEL_BY_STATUS['Hoog'])
+    return random.choices(elements, weights=weights)[0]
 
 
 def get_technology_proficiency(age):
-    if age < 25:
-        return random.choices(
-            ['Beginner', 'Gemiddeld', 'Gevorderd', 'Expert'],
-            weights=[5, 25, 45, 25]
-        )[0]
-    elif age < 50:
-        return random.choices(
-            ['Beginner', 'Gemiddeld', 'Gevorderd', 'Expert'],
-            weights=[5, 20, 50, 25]
-        )[0]
-    elif age < 65:
-        return random.choices(
-            ['Beginner', 'Gemiddeld', 'Gevorderd'],
-            weights=[20, 50, 30]
-        )[0]
-    else:
-        return random.choices(
-            ['Zeer beperkt', 'Beginner', 'Gemiddeld'],
-            weights=[30, 45, 25]
-        )[0]
+    return choose_by_age(TECHNOLOGY_PROFICIENCY_BY_AGE, age)
 
 def household_composition(age, marital_status, employment_status):
-    if marital_status == 'Ongehuwd' or marital_status == 'Relatie':
-        if age < 25:
-            if employment_status == 'Student':
-                return random.choices(['Bij ouders', 'Op kamers/Studio', 'Samenwonend (met partner/huisgenoten)'], weights=[40, 40, 20])[0]
-            return random.choices(['Bij ouders', 'Alleenstaand', 'Samenwonend (met partner/huisgenoten)'], weights=[30, 40, 30])[0]
-        elif age < 35:
-            return random.choices(['Alleenstaand', 'Samenwonend (met partner)', 'Alleenstaande ouder'], weights=[50, 40, 10])[0]
-        else:
-            return random.choices(['Alleenstaand', 'Samenwonend (met partner)', 'Alleenstaande ouder', 'Woongroep'], weights=[60, 20, 15, 5])[0]
-    elif marital_status == 'Gehuwd' or marital_status == 'Samenwonend':
-        if age < 30:
-            return random.choices(['Samenwonend zonder kinderen', 'Samenwonend met jonge kinderen'], weights=[60, 40])[0]
-        elif age < 50:
-            return random.choices(['Samenwonend met kinderen', 'Samenwonend zonder kinderen (kinderen uit huis/geen kinderen)'], weights=[70, 30])[0]
-        else: # 50+
-            return random.choices(['Samenwonend zonder inwonende kinderen', 'Samenwonend met volwassen kinderen'], weights=[85, 15])[0]
-    elif marital_status == 'Gescheiden':
-        if age < 40:
-            return random.choices(['Alleenstaand', 'Alleenstaande ouder', 'Nieuwe partner, samengesteld gezin'], weights=[40, 45, 15])[0]
-        else:
-            return random.choices(['Alleenstaand', 'Alleenstaande ouder (oudere kinderen)', 'Nieuwe partner'], weights=[50, 30, 20])[0]
-    elif marital_status == 'Weduwe/Weduwnaar':
-        return random.choices(['Alleenstaand', 'Alleenstaand (kinderen uit huis)', 'Bij familie'], weights=[70, 20, 10])[0]
-    return 'Onbekend' 
+    for marital_statuses, max_age, required_employment, elements, weights in HOUSEHOLD_COMPOSITION_RULES:
+        if marital_status not in marital_statuses:
+            continue
+        if max_age is not None and age >= max_age:
+            continue
+        if required_employment is not None and employment_status != required_employment:
+            continue
+        return random.choices(elements, weights=weights)[0]
+    return UNKNOWN_HOUSEHOLD
 
 def get_typical_online_hours(age, employment_status):
     hours = { "weekdays": [], "weekends": [] }
     
-    if employment_status == 'Student':
-        hours["weekdays"] = random.choice([
-            ["10:00-13:00", "17:00-20:00", "22:00-01:00"],
-            ["13:00-16:00", "19:00-23:00"],
-            ["09:00-12:00", "15:00-18:00", "21:00-00:00"]
-        ])
-    elif employment_status in ['Fulltime', 'Parttime', 'Zelfstandig']:
-        hours["weekdays"] = random.choice([
-            ["07:00-09:00", "12:00-13:00", "18:00-22:00"],
-            ["19:00-23:00"],
-            ["08:00-10:00", "17:00-21:00"]
-        ])
-    elif employment_status == 'Werkzoekend':
-        hours["weekdays"] = random.choice([
-            ["09:00-17:00"],
-            ["10:00-14:00", "19:00-22:00"],
-        ])
-    elif employment_status == 'Gepensioneerd':
-        hours["weekdays"] = random.choice([
-            ["09:00-12:00", "14:00-17:00"],
-            ["10:00-15:00", "19:00-21:00"],
-            ["08:00-11:00", "13:00-16:00", "20:00-22:00"]
-        ])
-    else:
-         hours["weekdays"] = ["19:00-22:00"]
-
-    if age < 30:
-        hours["weekends"] = random.choice([
-            ["11:00-15:00", "19:00-02:00"],
-            ["14:00-18:00", "20:00-00:00"],
-            ["Gehele dag met onderbrekingen"]
-        ])
-    elif age < 65:
-        hours["weekends"] = random.choice([
-            ["10:00-13:00", "16:00-22:00"],
-            ["09:00-12:00", "15:00-18:00", "20:00-23:00"],
-            ["Sporadisch gedurende de dag"]
-        ])
-    else: # 65+
-        hours["weekends"] = random.choice([
-            ["09:00-12:00", "14:00-17:00", "19:00-21:00"],
-            ["10:00-16:00"],
-            ["Flexibel, meerdere korte periodes"]
-        ])
+    hours["weekdays"] = list(DEFAULT_WEEKDAY_ONLINE_HOURS)
+    for employment_statuses, options in WEEKDAY_ONLINE_HOURS_BY_EMPLOYMENT:
+        if employment_status in employment_statuses:
+            hours["weekdays"] = random.choice(options)
+            break
+
+    for max_age, options in WEEKEND_ONLINE_HOURS_BY_AGE:
+        if max_age is None or age < max_age:
+            hours["weekends"] = random.choice(options)
+            break
     return hours  
 
 def generate_people(faker_instance, num_people):
@@ -364,27 +363,130 @@ def generate_people(faker_instance, num_people):
         df['typical_online_hours'] = df['typical_online_hours'].apply(json.dumps)
     return df
 
-def main():
+def group_seed(base_seed, group_id):
+    """
+    Leidt een vaste seed af uit (base seed, group id). Zo hangt elke groep alleen van zijn
+    eigen seed af en kan hij los (en parallel) opnieuw gegenereerd worden.
+    """
+    digest = hashlib.sha256(f"{base_seed}:{group_id}".encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big")
+
+
+_worker_faker = None
+
+
+def get_worker_faker():
+    """Eén Faker-instantie met de dynamische providers per proces."""
+    global _worker_faker
+    if _worker_faker is None:
+        _worker_faker = Faker('nl_NL')
+        generate_dynamic_providers(_worker_faker)
+    return _worker_faker
+
+
+def generate_group(group_id, base_seed=BASE_SEED, vectorized=False):
+    """Genereert groep group_id volledig uit zijn eigen seed; dezelfde argumenten geven dezelfde groep."""
+    seed = group_seed(base_seed, group_id)
+    if vectorized:
+        import numpy as np
+        from vectorized_group_generation import generate_people_vectorized
+        rng = np.random.default_rng(seed)
+        group_size = int(rng.integers(MIN_PEOPLE, MAX_PEOPLE + 1))
+        return generate_people_vectorized(group_size, rng=rng)
+
+    faker_instance = get_worker_faker()
+    # De hulpfuncties gebruiken de globale random, de DynamicProviders de gedeelde Faker-random
+    # en profile() de instantie-random: alle drie zaaien
+    random.seed(seed)
+    Faker.seed(seed)
+    faker_instance.seed_instance(seed)
+    group_size = random.randint(MIN_PEOPLE, MAX_PEOPLE)
+    return generate_people(faker_instance, group_size)
+
+
+def save_group(people_df, group_id, group_data_folder=GROUP_DATA_FOLDER):
+    """Schrijft eerst naar een tijdelijk bestand, zodat een afgebroken run geen halve CSV achterlaat."""
+    filepath = os.path.join(group_data_folder, f"group_{group_id}.csv")
+    tmp_path = filepath + ".tmp"
+    people_df.to_csv(tmp_path, index=False, encoding='utf-8-sig')
+    os.replace(tmp_path, filepath)
+    return filepath
+
+
+def generate_and_save_group(group_id, base_seed=BASE_SEED, vectorized=False, group_data_folder=GROUP_DATA_FOLDER):
+    people_df = generate_group(group_id, base_seed, vectorized)
+    return group_id, len(people_df), save_group(people_df, group_id, group_data_folder)
+
+
+def generate_groups_sharded(group_ids, base_seed=BASE_SEED, vectorized=False, group_data_folder=GROUP_DATA_FOLDER, max_workers=GROUP_WORKERS):
+    """
+    Verdeelt de groepen over een process pool. Elke groep wordt onafhankelijk gegenereerd en
+    weggeschreven, dus de volgorde waarin workers klaar zijn maakt voor de output niet uit.
+    """
+    os.makedirs(group_data_folder, exist_ok=True)
+    start_time = time.perf_counter()
+    total_people = 0
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [
+            executor.submit(generate_and_save_group, group_id, base_seed, vectorized, group_data_folder)
+            for group_id in group_ids
+        ]
+        for future in as_completed(futures):
+            group_id, group_size, filepath = future.result()
+            total_people += group_size
+            print(f"Generated {group_size} people and saved to {filepath}")
+    duration = time.perf_counter() - start_time
+    print(f"Generated {len(group_ids)} groups ({total_people} people) in {duration:.2f} seconds with {max_workers} workers")
+
+
+def generate_groups_sequential(base_seed=BASE_SEED, vectorized=False):
+    """De oorspronkelijke run: alle groepen na elkaar uit één random-stroom."""
     faker_instance = Faker('nl_NL')
-    Faker.seed(313) 
-    random.seed(313) 
-    
-    GROUP_DATA_FOLDER = "data/groups" 
-    GROUP_AMOUNT = 1000 
-    MIN_PEOPLE = 10 
-    MAX_PEOPLE = 35 
+    Faker.seed(base_seed) 
+    random.seed(base_seed) 
     
     os.makedirs(GROUP_DATA_FOLDER, exist_ok=True)
     
     people_per_group = [random.randint(MIN_PEOPLE, MAX_PEOPLE) for _ in range(GROUP_AMOUNT)]
     
     generate_dynamic_providers(faker_instance)
+
+    # --vectorized: hele kolommen in één keer trekken met NumPy (veel sneller, andere trekkingen dan Faker)
+    if vectorized:
+        import numpy as np
+        from vectorized_group_generation import generate_people_vectorized
+        rng = np.random.default_rng(base_seed)
     
     for group_id, group_size in enumerate(people_per_group):
-        people_df = generate_people(faker_instance, group_size)
+        if vectorized:
+            people_df = generate_people_vectorized(group_size, rng=rng)
+        else:
+            people_df = generate_people(faker_instance, group_size)
         filepath = os.path.join(GROUP_DATA_FOLDER, f"group_{group_id+1}.csv")
         people_df.to_csv(filepath, index=False, encoding='utf-8-sig')
         print(f"Generated {group_size} people and saved to {filepath}")
 
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate persona groups as CSV files.")
+    parser.add_argument("--vectorized", action="store_true", help="sample whole columns at once with NumPy")
+    parser.add_argument("--sharded", action="store_true", help="derive a seed per group and generate the groups in a process pool")
+    parser.add_argument("--workers", type=int, default=GROUP_WORKERS)
+    parser.add_argument("--seed", type=int, default=BASE_SEED)
+    parser.add_argument("--groups", default=None, help="comma-separated group ids to (re)generate, implies --sharded")
+    parser.add_argument("--parquet", action="store_true", help="also write the groups to the Parquet dataset afterwards")
+    args = parser.parse_args()
+
+    if args.sharded or args.groups:
+        group_ids = [int(g) for g in args.groups.split(",")] if args.groups else list(range(1, GROUP_AMOUNT + 1))
+        generate_groups_sharded(group_ids, args.seed, args.vectorized, GROUP_DATA_FOLDER, args.workers)
+    else:
+        generate_groups_sequential(args.seed, args.vectorized)
+
+    if args.parquet:
+        from data_store import write_groups, load_group_csvs, GROUPS_DATASET
+        write_groups(load_group_csvs(GROUP_DATA_FOLDER))
+        print(f"Groups written to {GROUPS_DATASET}")
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,84 @@
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+# Modules die scripts en worker-processen importeren
+IMPORT_BENCHMARK_MODULES = ["agent", "async_agent", "chat_generation", "chat_runner", "event_simulation",
+                            "bio_generation", "group_generation"]
+IMPORT_BENCHMARK_REPEATS = 5
+# Zware dependencies waarvan we willen zien of een import ze (onnodig) meetrekt
+HEAVY_MODULES = ["google.genai", "ollama", "httpx", "pyarrow", "pandas", "numpy", "faker"]
+
+MEASURE_SNIPPET = """
+import sys, time, json
+start = time.perf_counter()
+import {module}
+seconds = time.perf_counter() - start
+print(json.dumps({{"seconds": seconds, "loaded": [name for name in {heavy!r} if name in sys.modules]}}))
+"""
+
+
+def measure_import(module, source_dir, repeats=IMPORT_BENCHMARK_REPEATS):
+    """
+    Importeert module `repeats` keer in een vers proces (zoals een nieuwe worker) en geeft de
+    mediane importtijd en de zware dependencies die daarbij geladen werden.
+    """
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [source_dir, os.environ.get("PYTHONPATH")])),
+               PYTHONDONTWRITEBYTECODE="1")
+    timings = []
+    loaded = []
+    for _ in range(repeats):
+        completed = subprocess.run([sys.executable, "-c", MEASURE_SNIPPET.format(module=module, heavy=HEAVY_MODULES)],
+                                   cwd=source_dir, env=env, capture_output=True, text=True)
+        if completed.returncode != 0:
+            error = completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else "unknown error"
+            return {"module": module, "error": error}
+        result = json.loads(completed.stdout.strip().splitlines()[-1])
+        timings.append(result["seconds"])
+        loaded = result["loaded"]
+    return {"module": module, "seconds": statistics.median(timings), "loaded": loaded}
+
+
+def run_import_benchmark(modules=IMPORT_BENCHMARK_MODULES, source_dir=None, repeats=IMPORT_BENCHMARK_REPEATS):
+    source_dir = os.path.abspath(source_dir or os.path.dirname(os.path.abspath(__file__)))
+    return [measure_import(module, source_dir, repeats) for module in modules]
+
+
+def format_import_result(result, reference=None):
+    if "error" in result:
+        return f"{result['module']:<17} failed: {result['error']}"
+    line = f"{result['module']:<17} {result['seconds'] * 1000:8.1f} ms  loads: {', '.join(result['loaded']) or '-'}"
+    if reference and "seconds" in reference:
+        line += f"  (was {reference['seconds'] * 1000:.1f} ms, {reference['seconds'] / result['seconds']:.1f}x faster"
+        no_longer_loaded = [name for name in reference["loaded"] if name not in result["loaded"]]
+        if no_longer_loaded:
+            line += f", no longer loads {', '.join(no_longer_loaded)}"
+        line += ")"
+    return line
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the import time of the data_generation modules in fresh processes.")
+    parser.add_argument("--modules", nargs="+", default=IMPORT_BENCHMARK_MODULES)
+    parser.add_argument("--repeats", type=int, default=IMPORT_BENCHMARK_REPEATS)
+    parser.add_argument("--compare", help="data_generation folder of another checkout (e.g. a git worktree of an older commit) to compare against")
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    args = parser.parse_args()
+
+    results = run_import_benchmark(args.modules, repeats=args.repeats)
+    references = {}
+    if args.compare:
+        references = {result["module"]: result for result in run_import_benchmark(args.modules, args.compare, args.repeats)}
+    for result in results:
+        print(format_import_result(result, references.get(result["module"])))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"results": results, "compare": list(references.values())}, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+import os
+import time
+import random
+import asyncio
+import hashlib
+import json
+from abc import ABC, abstractmethod
+
+# "mock" laat alle agents de MockBackend gebruiken in plaats van Gemini/Ollama (voor benchmarks en tests)
+LLM_BACKEND = os.getenv("LLM_BACKEND", "")
+MOCK_LLM_TOKENS = int(os.getenv("MOCK_LLM_TOKENS", "40"))
+# Vaste latency per call plus per token, om een echte backend na te bootsen
+MOCK_LLM_LATENCY_MS = float(os.getenv("MOCK_LLM_LATENCY_MS", "0"))
+MOCK_LLM_TOKEN_LATENCY_MS = float(os.getenv("MOCK_LLM_TOKEN_LATENCY_MS", "0"))
+MOCK_WORDS = [
+    "ik", "denk", "dat", "het", "een", "goed", "idee", "is", "voor", "ons", "dorp", "maar", "we", "moeten",
+    "wel", "kijken", "naar", "de", "kosten", "en", "buurt", "gemeente", "eens", "niet", "zeker", "misschien",
+    "parkeren", "veilig", "groen", "school", "werk", "samen", "mensen", "vind", "belangrijk", "jammer",
+]
+
+
+class LLMBackend(ABC):
+    """
+    Interface voor een LLM-backend die een agent kan gebruiken in plaats van Gemini en Ollama.
+    generate geeft de tekst terug; stream voert de tekst in stukken aan een StreamCollector
+    (zie streaming.py) en stopt zodra die dat aangeeft. agenerate is de asyncio-variant.
+    """
+    name = "backend"
+    model = None
+
+    @abstractmethod
+    def generate(self, prompt, system=None, response_schema=None):
+        pass
+
+    @abstractmethod
+    def stream(self, prompt, system, collector, response_schema=None):
+        pass
+
+    async def agenerate(self, prompt, system=None, response_schema=None):
+        return await asyncio.to_thread(self.generate, prompt, system, response_schema)
+
+
+class MockBackend(LLMBackend):
+    """
+    Deterministische stub: dezelfde prompt geeft altijd hetzelfde antwoord van `tokens` woorden,
+    of `response` als die vast is opgegeven. Met een response_schema komt er geldige JSON volgens
+    dat schema terug, en een prompt met [START]/[END]-opmaak krijgt die markers (plus wat tekst
+    erna, zodat een vroege stop ook iets te doen heeft). Latency wordt met sleep nagebootst.
+    """
+    name = "mock"
+
+    def __init__(self, response=None, tokens=MOCK_LLM_TOKENS, latency_ms=MOCK_LLM_LATENCY_MS,
+                 token_latency_ms=MOCK_LLM_TOKEN_LATENCY_MS, model="mock"):
+        self.response = response
+        self.tokens = tokens
+        self.latency_ms = latency_ms
+        self.token_latency_ms = token_latency_ms
+        self.model = model
+        self.calls = 0
+
+    def _rng(self, prompt, system):
+        digest = hashlib.sha256(f"{system or ''}\n{prompt}".encode("utf-8")).digest()
+        return random.Random(int.from_bytes(digest[:8], "big"))
+
+    def _words(self, rng, count):
+        return " ".join(rng.choice(MOCK_WORDS) for _ in range(count))
+
+    def _from_schema(self, schema, rng):
+        schema_type = schema.get("type")
+        if schema_type == "object":
+            return {key: self._from_schema(value, rng) for key, value in schema.get("properties", {}).items()}
+        if schema_type == "array":
+            return [self._from_schema(schema.get("items", {"type": "string"}), rng) for _ in range(3)]
+        if schema_type in ("integer", "number"):
+            return rng.randint(0, 100)
+        if schema_type == "boolean":
+            return rng.random() < 0.5
+        return self._words(rng, max(self.tokens // 8, 1))
+
+    def render(self, prompt, system=None, response_schema=None):
+        if self.response is not None:
+            return self.response
+        rng = self._rng(prompt, system)
+        if response_schema is not None:
+            return json.dumps(self._from_schema(response_schema, rng), ensure_ascii=False)
+        text = self._words(rng, self.tokens)
+        if "[START]" in prompt and "[END]" in prompt:
+            return f"[START]\n{text}\n[END]\n{self._words(rng, max(self.tokens // 4, 1))}"
+        return text
+
+    def _pieces(self, text):
+        return [piece + " " for piece in text.split(" ")]
+
+    def _sleep_seconds(self, num_tokens):
+        return (self.latency_ms + self.token_latency_ms * num_tokens) / 1000
+
+    def generate(self, prompt, system=None, response_schema=None):
+        self.calls += 1
+        text = self.render(prompt, system, response_schema)
+        delay = self._sleep_seconds(len(self._pieces(text)))
+        if delay:
+            time.sleep(delay)
+        return text
+
+    def stream(self, prompt, system, collector, response_schema=None):
+        self.calls += 1
+        collector.start()
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+        for piece in self._pieces(self.render(prompt, system, response_schema)):
+            if self.token_latency_ms:
+                time.sleep(self.token_latency_ms / 1000)
+            if collector.feed(piece):
+                break
+        collector.finish()
+        return collector
+
+    async def agenerate(self, prompt, system=None, response_schema=None):
+        self.calls += 1
+        text = self.render(prompt, system, response_schema)
+        delay = self._sleep_seconds(len(self._pieces(text)))
+        if delay:
+            await asyncio.sleep(delay)
+        return text
+
+
+def backend_from_env():
+    """De backend uit LLM_BACKEND, of None voor de gewone Gemini/Ollama-route."""
+    if LLM_BACKEND == "mock":
+        return MockBackend()
+    if LLM_BACKEND:
+        raise ValueError(f"Unknown LLM_BACKEND {LLM_BACKEND!r}, expected 'mock' or empty")
+    return None
@@ -0,0 +1,199 @@
+import os
+import json
+import time
+import uuid
+import threading
+import contextvars
+import multiprocessing
+from contextlib import contextmanager
+
+from metrics_core import MetricsCore, Histogram, prometheus_text
+
+# Opt-in, kommagescheiden exporters: "jsonl" (één regel per call/span plus een eindregel), "prometheus"
+# (textfile). Standaard geen: dan wordt er niets naar schijf geschreven en print alleen het eindrapport
+METRICS_EXPORT = os.getenv("METRICS_EXPORT", "")
+METRICS_JSONL_PATH = os.getenv("METRICS_JSONL_PATH", "data/metrics.jsonl")
+# Voor de textfile collector van node_exporter, of om met de hand te bekijken
+METRICS_PROMETHEUS_PATH = os.getenv("METRICS_PROMETHEUS_PATH", "data/metrics.prom")
+# Schatting als een backend geen tokens meldt: ongeveer vier tekens per token
+CHARS_PER_TOKEN = 4
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+
+def estimate_tokens(text):
+    return len(text) // CHARS_PER_TOKEN if text else 0
+
+
+class JsonlExporter():
+    """Schrijft elke call en span als JSON-regel, en bij export() een regel met alle totalen."""
+    def __init__(self, path=METRICS_JSONL_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def _append(self, record):
+        with self._lock:
+            if os.path.dirname(self.path):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+
+    def on_event(self, record):
+        self._append(record)
+
+    def export(self, metrics):
+        self._append({"type": "summary", "time": time.time(), "run_id": metrics.run_id, **metrics.snapshot()})
+
+
+class PrometheusExporter():
+    """Schrijft de huidige stand in het Prometheus text format (atomair, dus veilig voor een scraper)."""
+    def __init__(self, path=METRICS_PROMETHEUS_PATH):
+        self.path = path
+
+    def on_event(self, record):
+        pass
+
+    def export(self, metrics):
+        path = self.path
+        if multiprocessing.parent_process() is not None:
+            # Elk worker-proces een eigen bestand (metrics.<pid>.prom); de textfile collector leest ze allemaal
+            root, ext = os.path.splitext(path)
+            path = f"{root}.{os.getpid()}{ext}"
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(prometheus_text(metrics))
+        os.replace(tmp_path, path)
+
+
+EXPORTERS = {"jsonl": JsonlExporter, "prometheus": PrometheusExporter}
+
+
+class Metrics(MetricsCore):
+    """
+    Verzamelt per proces counters en latency-histogrammen met labels (backend, model, ...) en stuurt
+    elke LLM-call en span door naar de exporters. Alles is thread-safe; één instantie via get_metrics().
+    """
+    def __init__(self, exporters=None):
+        super().__init__()
+        self.run_id = uuid.uuid4().hex[:12]
+        self.exporters = exporters if exporters is not None else []
+
+    def event(self, record):
+        record = {"time": time.time(), "run_id": self.run_id, **record}
+        for exporter in self.exporters:
+            exporter.on_event(record)
+
+    def record_llm_call(self, backend, model, seconds, tokens_in=0, tokens_out=0, queue_wait=None, outcome="ok"):
+        """Eén LLM-call: latency, tokens, wachttijd in de rij (rate limiter, semaphore of pool) en uitkomst."""
+        super().record_llm_call(backend, model, seconds, tokens_in, tokens_out, outcome)
+        if queue_wait is not None:
+            self.observe("llm_queue_wait_seconds", queue_wait, backend=backend)
+        span = _current_span.get()
+        self.event({
+            "type": "llm_call", "backend": backend, "model": model, "seconds": round(seconds, 4),
+            "tokens_in": tokens_in, "tokens_out": tokens_out,
+            "queue_wait": round(queue_wait, 4) if queue_wait is not None else None,
+            "outcome": outcome, "span_id": span["span_id"] if span else None,
+        })
+
+    def record_retry(self, backend, reason):
+        self.inc("llm_retries_total", backend=backend, reason=reason)
+
+    def record_fallback(self, from_backend, to_backend, reason):
+        self.inc("llm_fallbacks_total", from_backend=from_backend, to_backend=to_backend, reason=reason)
+
+    @contextmanager
+    def span(self, name, **labels):
+        """
+        Meet de duur van een stap (bio, simulatie, request) als histogram <name>_seconds. Spans binnen
+        een span krijgen diens id als parent_id, zodat de JSONL-regels als trace te volgen zijn.
+        Het yield-object is een dict waarin de stap extra velden voor de JSONL-regel kan zetten.
+        """
+        parent = _current_span.get()
+        span = {"span_id": uuid.uuid4().hex[:16], "parent_id": parent["span_id"] if parent else None, "fields": {}}
+        token = _current_span.set(span)
+        start_time = time.perf_counter()
+        outcome = "ok"
+        try:
+            yield span["fields"]
+        except BaseException:
+            outcome = "error"
+            raise
+        finally:
+            seconds = time.perf_counter() - start_time
+            _current_span.reset(token)
+            self.observe(f"{name}_seconds", seconds, **labels)
+            self.inc(f"{name}_total", outcome=outcome, **labels)
+            self.event({"type": "span", "name": name, "span_id": span["span_id"], "parent_id": span["parent_id"],
+                        "seconds": round(seconds, 4), "outcome": outcome, **labels, **span["fields"]})
+
+    def add_to_span(self, field, value):
+        """Telt value op bij een veld van de lopende span (bv. de LLM-tijd binnen een simulatie)."""
+        span = _current_span.get()
+        if span is not None:
+            span["fields"][field] = span["fields"].get(field, 0) + value
+
+    def report(self):
+        """Eindrapport: per backend latency, tokens, wachttijd, retries en fallbacks, daarna per stap."""
+        counters, histograms = self.collect()
+        lines = [f"Run report ({self.run_id}, {time.time() - self.started_at:.1f}s)"]
+        backends = sorted({dict(labels)["backend"] for name, labels in histograms if name == "llm_request_seconds"})
+        for backend in backends:
+            latency = Histogram()
+            for (name, labels), histogram in histograms.items():
+                if name == "llm_request_seconds" and dict(labels)["backend"] == backend:
+                    latency.counts = [a + b for a, b in zip(latency.counts, histogram.counts)]
+                    latency.sum += histogram.sum
+                    latency.count += histogram.count
+            wait = histograms.get(("llm_queue_wait_seconds", (("backend", backend),)))
+            errors = self.counter("llm_requests_total", backend=backend) - self.counter("llm_requests_total", backend=backend, outcome="ok")
+            lines.append(
+                f"  {backend}: {latency.count} calls, {latency.sum:.1f}s, mean {latency.mean:.2f}s, p50 <= {latency.quantile(0.5)}s, "
+                f"p95 <= {latency.quantile(0.95)}s, {self.counter('llm_tokens_in_total', backend=backend)} tokens in, "
+                f"{self.counter('llm_tokens_out_total', backend=backend)} tokens out, "
+                f"queue wait {wait.sum if wait else 0.0:.1f}s, {self.counter('llm_retries_total', backend=backend)} retries, "
+                f"{errors} errors"
+            )
+        fallbacks = {labels: value for (name, labels), value in counters.items() if name == "llm_fallbacks_total"}
+        for labels, value in sorted(fallbacks.items()):
+            labels = dict(labels)
+            lines.append(f"  fallback {labels['from_backend']} -> {labels['to_backend']} ({labels['reason']}): {value}")
+        cache_hits = self.counter("llm_cache_lookups_total", result="hit")
+        cache_misses = self.counter("llm_cache_lookups_total", result="miss")
+        if cache_hits or cache_misses:
+            lines.append(f"  cache: {cache_hits} hits, {cache_misses} misses")
+        lines.extend(self.step_report_lines(counters, histograms, skip_prefix="llm_"))
+        return "\n".join(lines)
+
+    def export(self):
+        for exporter in self.exporters:
+            exporter.export(self)
+
+    def report_run(self):
+        """Print het eindrapport en schrijft de totalen naar de exporters; aan het eind van elke run."""
+        print(self.report())
+        self.export()
+
+
+def exporters_from_env(names=METRICS_EXPORT):
+    exporters = []
+    for name in filter(None, (name.strip() for name in names.split(","))):
+        if name not in EXPORTERS:
+            raise ValueError(f"Unknown metrics exporter {name!r}, expected one of {', '.join(EXPORTERS)}")
+        exporters.append(EXPORTERS[name]())
+    return exporters
+
+
+_metrics = None
+_metrics_lock = threading.Lock()
+
+
+def get_metrics():
+    """Eén Metrics per proces, met de exporters uit METRICS_EXPORT."""
+    global _metrics
+    with _metrics_lock:
+        if _metrics is None:
+            _metrics = Metrics(exporters_from_env())
+        return _metrics
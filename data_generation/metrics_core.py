@@ -0,0 +1,145 @@
+import time
+import bisect
+import threading
+
+# Gedeelde basis voor data_generation/metrics.py en de API (api_metrics.py). Alleen de standaardbibliotheek,
+# zodat de API dit als data_generation.metrics_core kan importeren zonder de generatiemodules mee te laden.
+LATENCY_BUCKETS_SECONDS = [0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300]
+
+
+def label_key(labels):
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+class Histogram():
+    """Cumulatieve histogram zoals Prometheus die verwacht, plus een geschat kwantiel voor het rapport."""
+    def __init__(self, buckets=LATENCY_BUCKETS_SECONDS):
+        self.buckets = list(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q):
+        """Bovengrens van de bucket waarin het q-kwantiel valt (de grootste bucket als het erboven ligt)."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return self.buckets[-1]
+
+    @property
+    def mean(self):
+        return self.sum / self.count if self.count else 0.0
+
+
+def format_labels(labels):
+    if not labels:
+        return ""
+    escaped = [(key, value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")) for key, value in labels]
+    return "{" + ",".join(f'{key}="{value}"' for key, value in escaped) + "}"
+
+
+def prometheus_text(metrics):
+    """Alle counters en histograms van een MetricsCore als Prometheus exposition format."""
+    counters, histograms = metrics.collect()
+    lines = []
+    for name in sorted({name for name, _ in counters}):
+        lines.append(f"# TYPE {name} counter")
+        for (metric_name, labels), value in sorted(counters.items()):
+            if metric_name == name:
+                lines.append(f"{name}{format_labels(labels)} {value}")
+    for name in sorted({name for name, _ in histograms}):
+        lines.append(f"# TYPE {name} histogram")
+        for (metric_name, labels), histogram in sorted(histograms.items(), key=lambda item: item[0]):
+            if metric_name != name:
+                continue
+            cumulative = 0
+            for bound, count in zip(histogram.buckets + ["+Inf"], histogram.counts):
+                cumulative += count
+                lines.append(f"{name}_bucket{format_labels(labels + (('le', str(bound)),))} {cumulative}")
+            lines.append(f"{name}_sum{format_labels(labels)} {histogram.sum}")
+            lines.append(f"{name}_count{format_labels(labels)} {histogram.count}")
+    return "\n".join(lines) + "\n"
+
+
+class MetricsCore():
+    """Thread-safe counters en latency-histogrammen met labels; Metrics en ApiMetrics bouwen hierop voort."""
+    def __init__(self):
+        self.started_at = time.time()
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+
+    def inc(self, name, value=1, **labels):
+        key = (name, label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        key = (name, label_key(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(value)
+
+    def record_llm_call(self, backend, model, seconds, tokens_in=0, tokens_out=0, outcome="ok"):
+        self.observe("llm_request_seconds", seconds, backend=backend, model=model)
+        self.inc("llm_requests_total", backend=backend, model=model, outcome=outcome)
+        self.inc("llm_tokens_in_total", tokens_in, backend=backend, model=model)
+        self.inc("llm_tokens_out_total", tokens_out, backend=backend, model=model)
+
+    def collect(self):
+        """Kopie van (counters, histograms), voor exporters en rapporten."""
+        with self._lock:
+            histograms = {}
+            for key, histogram in self._histograms.items():
+                copy = Histogram(histogram.buckets)
+                copy.counts, copy.sum, copy.count = list(histogram.counts), histogram.sum, histogram.count
+                histograms[key] = copy
+            return dict(self._counters), histograms
+
+    def counter(self, name, **labels):
+        """Som van een counter over alle labelcombinaties die bij de gegeven labels passen."""
+        wanted = set(label_key(labels))
+        with self._lock:
+            return sum(value for (metric_name, key), value in self._counters.items() if metric_name == name and wanted <= set(key))
+
+    def snapshot(self):
+        counters, histograms = self.collect()
+        return {
+            "counters": [{"name": name, "labels": dict(labels), "value": value} for (name, labels), value in sorted(counters.items())],
+            "histograms": [{"name": name, "labels": dict(labels), "count": h.count, "sum": round(h.sum, 4),
+                            "p50": h.quantile(0.5), "p95": h.quantile(0.95)}
+                           for (name, labels), h in sorted(histograms.items(), key=lambda item: item[0])],
+        }
+
+    def prometheus_text(self):
+        return prometheus_text(self)
+
+    def step_report_lines(self, counters, histograms, skip_prefix=None):
+        """Rapportregels per histogram (aantal, totale en gemiddelde duur, p95) en daarna de overige counters."""
+        lines = []
+        for (name, labels), histogram in sorted(histograms.items(), key=lambda item: item[0]):
+            if skip_prefix and name.startswith(skip_prefix):
+                continue
+            label_text = ", ".join(f"{key}={value}" for key, value in labels)
+            lines.append(f"  {name[:-len('_seconds')]}{f' ({label_text})' if label_text else ''}: {histogram.count}x, "
+                         f"{histogram.sum:.1f}s total, mean {histogram.mean:.2f}s, p95 <= {histogram.quantile(0.95)}s")
+        # Het aantal van een span staat al in de regel hierboven
+        span_names = {name[:-len("_seconds")] for name, _ in histograms if name.endswith("_seconds")}
+        for (name, labels), value in sorted(counters.items()):
+            if (skip_prefix and name.startswith(skip_prefix)) or (name.endswith("_total") and name[:-len("_total")] in span_names):
+                continue
+            label_text = ", ".join(f"{key}={value}" for key, value in labels)
+            lines.append(f"  {name}{f' ({label_text})' if label_text else ''}: {value:g}")
+        return lines
@@ -0,0 +1,167 @@
+import os
+import time
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+
+from streaming import StreamCollector
+from metrics import get_metrics, estimate_tokens
+
+# Hoe lang Ollama het lokale model na een call in het geheugen houdt, zodat het niet steeds opnieuw laadt
+OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+# Gelijktijdige requests naar de Ollama-server. Zet OLLAMA_NUM_PARALLEL op de server minstens zo hoog,
+# anders zet de server de extra requests alsnog in de rij.
+OLLAMA_CONCURRENCY = int(os.getenv("OLLAMA_CONCURRENCY", "2"))
+OLLAMA_REQUEST_TIMEOUT_SECONDS = float(os.getenv("LLM_REQUEST_TIMEOUT_SECONDS", "120"))
+# Na hoeveel requests de pool een regel met tokens/sec print (0 = nooit)
+OLLAMA_REPORT_EVERY = int(os.getenv("OLLAMA_REPORT_EVERY", "50"))
+
+
+class OllamaPool():
+    """
+    Vaste pool van worker-threads voor één lokaal model. Elke worker houdt een eigen ollama.Client
+    (en dus een open HTTP-verbinding) en elke call geeft keep_alive mee, zodat het model geladen blijft.
+    Antwoorden worden gestreamd: zodra de stopconditie (bv. een [END]-marker) voldaan is wordt de
+    stream gesloten, waarna Ollama stopt met genereren. Per call en over de hele pool wordt tokens/sec bijgehouden.
+    """
+    def __init__(self, model, concurrency=OLLAMA_CONCURRENCY, keep_alive=OLLAMA_KEEP_ALIVE,
+                 timeout=OLLAMA_REQUEST_TIMEOUT_SECONDS):
+        self.model = model
+        self.concurrency = concurrency
+        self.keep_alive = keep_alive
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix=f"ollama-{model}")
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        self.requests = 0
+        self.early_stops = 0
+        self.tokens = 0
+        self.generation_seconds = 0.0
+        self._first_start = None
+        self._last_end = None
+
+    def _client(self):
+        if not hasattr(self._local, "client"):
+            # Pas hier geïmporteerd: wie alleen Gemini of de MockBackend gebruikt laadt ollama nooit
+            import ollama
+            self._local.client = ollama.Client(timeout=self.timeout)
+        return self._local.client
+
+    def warm_up(self):
+        """Laadt het model alvast in het geheugen; een lege prompt genereert niets."""
+        self._executor.submit(
+            lambda: self._client().generate(model=self.model, prompt="", keep_alive=self.keep_alive)
+        ).result()
+
+    def _generate(self, prompt, system=None, collector=None, options=None, response_format=None, submitted_at=None):
+        collector = collector or StreamCollector()
+        collector.start()
+        start_time = time.perf_counter()
+        queue_wait = start_time - submitted_at if submitted_at is not None else None
+        # response_format: "json" of een JSON-schema voor gestructureerde output
+        stream = self._client().generate(
+            model=self.model, prompt=prompt, system=system, options=options, format=response_format,
+            stream=True, keep_alive=self.keep_alive
+        )
+        final_chunk = None
+        try:
+            for chunk in stream:
+                if chunk.get("done"):
+                    collector.feed(chunk["response"])
+                    final_chunk = chunk
+                    break
+                if collector.feed(chunk["response"]):
+                    break
+        finally:
+            # Sluiten van de stream sluit de HTTP-response; Ollama breekt de generatie dan af
+            if hasattr(stream, "close"):
+                stream.close()
+        collector.finish()
+        end_time = time.perf_counter()
+
+        if final_chunk and final_chunk.get("eval_count") and final_chunk.get("eval_duration"):
+            collector.tokens = final_chunk["eval_count"]
+            seconds = final_chunk["eval_duration"] / 1e9
+        else:
+            # Bij een vroege stop komt er geen eindchunk; elke gestreamde chunk is één token
+            seconds = collector.seconds
+        if final_chunk and final_chunk.get("prompt_eval_count"):
+            collector.prompt_tokens = final_chunk["prompt_eval_count"]
+        self._record(collector.token_count, seconds, collector.stopped_early, start_time, end_time)
+        tokens_in = collector.prompt_tokens if collector.prompt_tokens is not None else estimate_tokens(f"{system or ''}{prompt}")
+        get_metrics().record_llm_call("ollama", self.model, end_time - start_time, tokens_in, collector.token_count, queue_wait)
+        return collector
+
+    def _submit(self, func, *args):
+        # Met de context van de aanroeper, zodat de metrics de call aan de lopende span koppelen
+        return self._executor.submit(contextvars.copy_context().run, func, *args)
+
+    def _record(self, tokens, seconds, stopped, start_time, end_time):
+        with self._stats_lock:
+            self.requests += 1
+            self.early_stops += stopped
+            self.tokens += tokens
+            self.generation_seconds += seconds
+            self._first_start = start_time if self._first_start is None else min(self._first_start, start_time)
+            self._last_end = end_time if self._last_end is None else max(self._last_end, end_time)
+            report = OLLAMA_REPORT_EVERY and self.requests % OLLAMA_REPORT_EVERY == 0
+        if report:
+            self.report()
+
+    def stream(self, prompt, system=None, collector=None, options=None, response_format=None):
+        """
+        Zet een gestreamde call in de rij van de pool. De Future geeft de StreamCollector terug,
+        met de tekst, het aantal tokens, de duur en of de stopconditie de stream heeft afgebroken.
+        """
+        return self._submit(self._generate, prompt, system, collector, options, response_format, time.perf_counter())
+
+    def submit(self, prompt, system=None, stop_condition=None, options=None, response_format=None):
+        """Als stream(), maar de Future geeft direct de tekst, bv. met stop_condition=stop_at_marker("[END]")."""
+        collector = StreamCollector(stop_condition)
+        submitted_at = time.perf_counter()
+        return self._submit(lambda: self._generate(prompt, system, collector, options, response_format, submitted_at).text)
+
+    def generate(self, prompt, system=None, stop_condition=None, options=None, response_format=None):
+        return self.submit(prompt, system, stop_condition, options, response_format).result()
+
+    def map(self, prompts, system=None, stop_condition=None, options=None):
+        """Genereert een batch prompts met maximaal concurrency tegelijk; de volgorde blijft behouden."""
+        futures = [self.submit(prompt, system, stop_condition, options) for prompt in prompts]
+        return [future.result() for future in futures]
+
+    def stats(self):
+        """
+        tokens_per_second is de doorvoer van de hele pool (tokens gedeeld door de wandkloktijd waarin
+        er calls liepen); tokens_per_second_per_call is de gemiddelde snelheid van één stream.
+        """
+        with self._stats_lock:
+            wall_seconds = (self._last_end - self._first_start) if self.requests else 0.0
+            return {
+                "model": self.model,
+                "requests": self.requests,
+                "early_stops": self.early_stops,
+                "tokens": self.tokens,
+                "tokens_per_second": self.tokens / wall_seconds if wall_seconds else 0.0,
+                "tokens_per_second_per_call": self.tokens / self.generation_seconds if self.generation_seconds else 0.0,
+            }
+
+    def report(self):
+        stats = self.stats()
+        print(f"Ollama pool {stats['model']}: {stats['requests']} requests ({stats['early_stops']} stopped early), "
+              f"{stats['tokens']} tokens, {stats['tokens_per_second']:.1f} tokens/sec "
+              f"({stats['tokens_per_second_per_call']:.1f} per stream, concurrency {self.concurrency})")
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_ollama_pool(model, concurrency=OLLAMA_CONCURRENCY):
+    """Eén pool per model per proces, gedeeld door alle (sync en async) agents."""
+    with _pools_lock:
+        if model not in _pools:
+            _pools[model] = OllamaPool(model, concurrency)
+        return _pools[model]
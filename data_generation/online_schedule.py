@@ -0,0 +1,80 @@
+import datetime
+import numpy as np
+
+MINUTES_PER_DAY = 24 * 60
+MINUTES_PER_WEEK = 7 * MINUTES_PER_DAY
+WHOLE_DAY_MARKERS = ["gehele dag", "sporadisch"]
+
+
+def parse_slot(slot):
+    """Zet 'HH:MM-HH:MM' om naar (start, eind) in minuten sinds middernacht."""
+    start_str, end_str = slot.split('-')
+    start_time = datetime.datetime.strptime(start_str.strip(), "%H:%M")
+    end_time = datetime.datetime.strptime(end_str.strip(), "%H:%M")
+    return start_time.hour * 60 + start_time.minute, end_time.hour * 60 + end_time.minute
+
+
+def compile_day(time_slots, persona_name="unknown"):
+    """
+    Bitmap van 1440 minuten voor één dag, met dezelfde regels als is_persona_online:
+    [start, eind) binnen de dag, een slot over middernacht telt aan beide kanten van dezelfde dag,
+    en 'gehele dag'/'sporadisch' betekent de hele dag online.
+    """
+    day = np.zeros(MINUTES_PER_DAY, dtype=bool)
+    for slot in time_slots:
+        if isinstance(slot, str) and '-' in slot:
+            try:
+                start, end = parse_slot(slot)
+            except ValueError:
+                print(f"Warning: Invalid time format in slot '{slot}' for {persona_name}. Skipping slot.")
+                continue
+            if start <= end:
+                day[start:end] = True
+            else:
+                day[start:] = True
+                day[:end] = True
+        elif isinstance(slot, str) and any(marker in slot.lower() for marker in WHOLE_DAY_MARKERS):
+            day[:] = True
+    return day
+
+
+def compile_online_hours(online_hours_data, persona_name="unknown"):
+    """Compileert typical_online_hours één keer naar een minute-of-week bitmap (maandag 00:00 = 0)."""
+    online_hours_data = online_hours_data or {}
+    weekdays = compile_day(online_hours_data.get("weekdays", []), persona_name)
+    weekends = compile_day(online_hours_data.get("weekends", []), persona_name)
+    return np.concatenate([weekdays] * 5 + [weekends] * 2)
+
+
+def minute_of_week(sim_time):
+    return sim_time.weekday() * MINUTES_PER_DAY + sim_time.hour * 60 + sim_time.minute
+
+
+class OnlineSchedule():
+    """
+    Voorgecompileerde online-uren van een hele groep: per persona een ingepakte bitmap van
+    10080 bits (1260 bytes). De online-status van alle persona's op een tijdstip is één kolom-lookup.
+    """
+    def __init__(self, personas_data):
+        self.names = list(personas_data.keys())
+        bitmaps = np.zeros((len(self.names), MINUTES_PER_WEEK), dtype=bool)
+        for i, name in enumerate(self.names):
+            bitmaps[i] = compile_online_hours(personas_data[name].get("typical_online_hours"), name)
+        self.packed = np.packbits(bitmaps, axis=1)
+
+    def online_mask(self, sim_time):
+        minute = minute_of_week(sim_time)
+        return ((self.packed[:, minute >> 3] >> (7 - (minute & 7))) & 1).astype(bool)
+
+    def online_names(self, sim_time):
+        mask = self.online_mask(sim_time)
+        return [name for name, online in zip(self.names, mask) if online]
+
+    def is_online(self, name, sim_time):
+        return bool(self.online_mask(sim_time)[self.names.index(name)])
+
+    def online_matrix(self, start_time, num_steps, step_minutes):
+        """Online-status van alle persona's op num_steps tijdstippen vanaf start_time: (persona's, stappen)."""
+        start_minute = minute_of_week(start_time)
+        minutes = (start_minute + np.arange(num_steps) * step_minutes) % MINUTES_PER_WEEK
+        return np.unpackbits(self.packed, axis=1, count=MINUTES_PER_WEEK)[:, minutes].astype(bool)
@@ -0,0 +1,162 @@
+import os
+import time
+import asyncio
+import sqlite3
+import datetime
+import threading
+from contextlib import contextmanager
+
+from custom_exceptions import DailyLimitException
+
+# Gratis limieten van gemini-2.0-flash-lite
+GEMINI_REQUESTS_PER_MINUTE = int(os.getenv("GEMINI_REQUESTS_PER_MINUTE", "30"))
+GEMINI_REQUESTS_PER_DAY = int(os.getenv("GEMINI_REQUESTS_PER_DAY", "1500"))
+# SQLite-bestand waarin de buckets staan; gedeeld door alle agents en processen
+RATE_LIMIT_DB = os.getenv("RATE_LIMIT_DB", "data/rate_limits.sqlite")
+DAILY_HISTORY_DAYS = 7
+
+
+class RateLimiter():
+    """
+    Token bucket voor requests per minuut plus een teller per dag, opgeslagen in SQLite.
+    Omdat de staat op schijf staat (met SQLite-locking) delen de bio-agent, de chat-agent
+    en meerdere processen dezelfde quota. Calls worden vooraf gedoseerd in plaats van
+    achteraf op een 429 te reageren.
+    """
+    def __init__(self, name, requests_per_minute, requests_per_day, db_path=RATE_LIMIT_DB):
+        self.name = name
+        self.requests_per_minute = requests_per_minute
+        self.requests_per_day = requests_per_day
+        self.refill_per_second = requests_per_minute / 60
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        if os.path.dirname(db_path):
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self._db = sqlite3.connect(db_path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS buckets (name TEXT PRIMARY KEY, tokens REAL, updated_at REAL, blocked_until REAL)"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS daily (name TEXT, day TEXT, count INTEGER, PRIMARY KEY (name, day))"
+        )
+        self.waited_seconds = 0.0
+        self.acquired = 0
+
+    @contextmanager
+    def _transaction(self):
+        with self._lock:
+            # BEGIN IMMEDIATE pakt direct de schrijflock, zodat processen elkaar niet overlappen
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._db
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+
+    def _read_state(self, db, now, today):
+        row = db.execute("SELECT tokens, updated_at, blocked_until FROM buckets WHERE name = ?", (self.name,)).fetchone()
+        if row is None:
+            tokens, updated_at, blocked_until = self.requests_per_minute, now, 0.0
+        else:
+            tokens, updated_at, blocked_until = row
+        tokens = min(self.requests_per_minute, tokens + (now - updated_at) * self.refill_per_second)
+        day_row = db.execute("SELECT count FROM daily WHERE name = ? AND day = ?", (self.name, today)).fetchone()
+        day_count = day_row[0] if day_row else 0
+        return tokens, blocked_until, day_count
+
+    def _write_state(self, db, now, today, tokens, blocked_until, day_count):
+        db.execute(
+            "INSERT OR REPLACE INTO buckets (name, tokens, updated_at, blocked_until) VALUES (?, ?, ?, ?)",
+            (self.name, tokens, now, blocked_until),
+        )
+        db.execute("INSERT OR REPLACE INTO daily (name, day, count) VALUES (?, ?, ?)", (self.name, today, day_count))
+        oldest_day = (datetime.date.today() - datetime.timedelta(days=DAILY_HISTORY_DAYS)).isoformat()
+        db.execute("DELETE FROM daily WHERE name = ? AND day < ?", (self.name, oldest_day))
+
+    def try_acquire(self):
+        """
+        Probeert één request te reserveren. Geeft 0 terug als het gelukt is, anders het aantal
+        seconden dat gewacht moet worden. Gooit DailyLimitException als de dagquota op is.
+        """
+        now = time.time()
+        today = datetime.date.today().isoformat()
+        with self._transaction() as db:
+            tokens, blocked_until, day_count = self._read_state(db, now, today)
+            if day_count >= self.requests_per_day:
+                wait = None
+            elif now < blocked_until:
+                wait = blocked_until - now
+            elif tokens < 1:
+                wait = (1 - tokens) / self.refill_per_second
+            else:
+                tokens -= 1
+                day_count += 1
+                wait = 0.0
+                self.acquired += 1
+            self._write_state(db, now, today, tokens, blocked_until, day_count)
+        if wait is None:
+            raise DailyLimitException(f"Daily limit of {self.requests_per_day} requests reached for {self.name}")
+        return wait
+
+    def acquire(self):
+        while True:
+            wait = self.try_acquire()
+            if wait == 0:
+                return
+            self.waited_seconds += wait
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        while True:
+            # try_acquire doet een SQLite-transactie (met lock), dus niet op de event loop zelf
+            wait = await asyncio.to_thread(self.try_acquire)
+            if wait == 0:
+                return
+            self.waited_seconds += wait
+            await asyncio.sleep(wait)
+
+    def backoff(self, seconds):
+        """Na een 429 pauzeren alle agents (ook in andere processen) tot de retryDelay voorbij is."""
+        now = time.time()
+        today = datetime.date.today().isoformat()
+        with self._transaction() as db:
+            tokens, blocked_until, day_count = self._read_state(db, now, today)
+            self._write_state(db, now, today, 0.0, max(blocked_until, now + seconds), day_count)
+
+    def exhaust_day(self):
+        """Markeert de dagquota als op, bijvoorbeeld als de API zelf de daglimiet meldt."""
+        now = time.time()
+        today = datetime.date.today().isoformat()
+        with self._transaction() as db:
+            tokens, blocked_until, _ = self._read_state(db, now, today)
+            self._write_state(db, now, today, tokens, blocked_until, self.requests_per_day)
+
+    def remaining(self):
+        now = time.time()
+        today = datetime.date.today().isoformat()
+        with self._transaction() as db:
+            tokens, blocked_until, day_count = self._read_state(db, now, today)
+        return {
+            "name": self.name,
+            "minute_remaining": int(tokens),
+            "minute_limit": self.requests_per_minute,
+            "day_used": day_count,
+            "day_remaining": max(0, self.requests_per_day - day_count),
+            "day_limit": self.requests_per_day,
+            "blocked_for_seconds": round(max(0.0, blocked_until - now), 1),
+            "acquired_by_this_process": self.acquired,
+            "waited_seconds_in_this_process": round(self.waited_seconds, 1),
+        }
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(name="gemini", requests_per_minute=GEMINI_REQUESTS_PER_MINUTE, requests_per_day=GEMINI_REQUESTS_PER_DAY):
+    """Geeft per naam één RateLimiter per proces terug, zodat alle agents dezelfde instantie delen."""
+    with _limiters_lock:
+        if name not in _limiters:
+            _limiters[name] = RateLimiter(name, requests_per_minute, requests_per_day)
+        return _limiters[name]
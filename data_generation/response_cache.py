@@ -0,0 +1,182 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+
+from custom_exceptions import CacheMissException
+from metrics import get_metrics
+
+# "off" (standaard): cache niet gebruiken, elke call gaat naar het LLM zoals voorheen. Opt-in:
+# "record": antwoorden uit de cache halen en nieuwe opslaan (herhaalde prompts geven dan hetzelfde antwoord),
+# "replay": alleen uit de cache (een miss is een fout, er gaat geen enkele call naar een LLM)
+LLM_CACHE_MODE = os.getenv("LLM_CACHE_MODE", "off")
+LLM_CACHE_DB = os.getenv("LLM_CACHE_DB", "data/llm_cache.sqlite")
+# Boven deze grootte worden de langst niet gebruikte antwoorden verwijderd
+LLM_CACHE_MAX_MB = float(os.getenv("LLM_CACHE_MAX_MB", "512"))
+EVICT_TO_FRACTION = 0.9
+# last_used wordt bij een hit hooguit zo vaak bijgewerkt, zodat lezen geen schrijfactie per call wordt
+TOUCH_INTERVAL_SECONDS = 3600
+# Andere processen schrijven ook; na zoveel eigen writes wordt de totale grootte opnieuw geteld
+RECOUNT_EVERY_STORES = 100
+CACHE_MODES = ["off", "record", "replay"]
+
+
+def cache_key(backend, model, system, prompt, params=None):
+    """Content-addressed sleutel: sha256 over backend, model, system instruction, prompt en parameters."""
+    payload = json.dumps([backend, model, system, prompt, params or {}], sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def cache_params(stop_condition=None, strip_reasoning=False, response_schema=None):
+    """De parameters die het antwoord bepalen; een stopconditie telt mee via zijn cache_key (zie stop_at_marker)."""
+    stop = None
+    if stop_condition is not None:
+        stop = getattr(stop_condition, "cache_key", getattr(stop_condition, "__qualname__", type(stop_condition).__name__))
+    return {"stop": stop, "strip_reasoning": strip_reasoning, "response_schema": response_schema}
+
+
+class ResponseCache():
+    """
+    Persistente cache van LLM-antwoorden in SQLite, gedeeld door alle agents en processen.
+    Hetzelfde (backend, model, system, prompt, parameters) levert bij een volgende run hetzelfde antwoord,
+    dus een herstart na een crash of een replay van een simulatie kost geen LLM-calls.
+    """
+    def __init__(self, db_path=LLM_CACHE_DB, mode=LLM_CACHE_MODE, max_mb=LLM_CACHE_MAX_MB):
+        if mode not in CACHE_MODES:
+            raise ValueError(f"Unknown LLM_CACHE_MODE {mode!r}, expected one of {', '.join(CACHE_MODES)}")
+        self.mode = mode
+        self.db_path = db_path
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self._db = None
+        if mode == "off":
+            return
+        if os.path.dirname(db_path):
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self._db = sqlite3.connect(db_path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, backend TEXT, model TEXT, response TEXT, "
+            "size INTEGER, created_at REAL, last_used REAL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)")
+        self._total_bytes = self._count_bytes()
+
+    def _count_bytes(self):
+        return self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    @property
+    def enabled(self):
+        return self.mode != "off"
+
+    def get(self, key):
+        """Het opgeslagen antwoord of None."""
+        if not self.enabled:
+            return None
+        with self._lock:
+            row = self._db.execute("SELECT response, last_used FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            now = time.time()
+            if now - row[1] > TOUCH_INTERVAL_SECONDS:
+                self._db.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+            return row[0]
+
+    def lookup(self, keys):
+        """Probeert de sleutels op volgorde; in replay-modus is een miss een CacheMissException."""
+        if not self.enabled:
+            return None
+        for key in keys:
+            response = self.get(key)
+            if response is not None:
+                with self._lock:
+                    self.hits += 1
+                get_metrics().inc("llm_cache_lookups_total", result="hit")
+                return response
+        with self._lock:
+            self.misses += 1
+        get_metrics().inc("llm_cache_lookups_total", result="miss")
+        if self.mode == "replay":
+            raise CacheMissException(f"No cached response for this call (LLM_CACHE_MODE=replay, cache {self.db_path})")
+        return None
+
+    def put(self, key, backend, model, response):
+        if self.mode != "record" or response is None:
+            return
+        now = time.time()
+        size = len(response.encode("utf-8"))
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (key, backend, model, response, size, created_at, last_used) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, backend, model, response, size, now, now),
+            )
+            self.stores += 1
+            self._total_bytes += size
+            if self.stores % RECOUNT_EVERY_STORES == 0:
+                self._total_bytes = self._count_bytes()
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        """Verwijdert de langst niet gebruikte antwoorden tot de cache onder EVICT_TO_FRACTION van het maximum zit."""
+        total = self._count_bytes()
+        if total <= self.max_bytes:
+            self._total_bytes = total
+            return
+        target = int(self.max_bytes * EVICT_TO_FRACTION)
+        freed = 0
+        evicted_keys = []
+        for key, size in self._db.execute("SELECT key, size FROM responses ORDER BY last_used"):
+            if total - freed <= target:
+                break
+            evicted_keys.append((key,))
+            freed += size
+        self._db.executemany("DELETE FROM responses WHERE key = ?", evicted_keys)
+        self.evictions += len(evicted_keys)
+        self._total_bytes = total - freed
+
+    def size_bytes(self):
+        if not self.enabled:
+            return 0
+        with self._lock:
+            return self._count_bytes()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "mode": self.mode,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "stores": self.stores,
+                "evictions": self.evictions,
+            }
+
+    def summary(self):
+        stats = self.stats()
+        if not self.enabled:
+            return "LLM cache off"
+        return (f"LLM cache ({stats['mode']}): {stats['hits']} hits, {stats['misses']} misses "
+                f"({stats['hit_rate']:.0%} hit rate), {stats['stores']} stored, {stats['evictions']} evicted, "
+                f"{self.size_bytes() / 1024 / 1024:.1f} MB on disk")
+
+
+_response_cache = None
+_response_cache_lock = threading.Lock()
+
+
+def get_response_cache():
+    """Eén ResponseCache per proces, gedeeld door agent en AsyncAgent."""
+    global _response_cache
+    with _response_cache_lock:
+        if _response_cache is None:
+            _response_cache = ResponseCache()
+        return _response_cache
@@ -0,0 +1,248 @@
+import os
+import time
+import json
+import threading
+
+# deepseek-r1 zet zijn redenering tussen deze tags; die tekst hoort nooit in een bio of bericht
+REASONING_OPEN_TAG = "<think>"
+REASONING_CLOSE_TAG = "</think>"
+# Opt-in: per gestreamde call één regel met tokens, latency en (geschatte) besparing naar dit bestand,
+# bv. data/stream_stats.jsonl. Leeg (standaard) houdt de statistieken alleen in het geheugen
+STREAM_STATS_PATH = os.getenv("STREAM_STATS_PATH", "")
+# Opt-in: de eerste en daarna elke N-de call per model loopt door na de stopconditie, om te meten
+# hoeveel tokens en tijd een vroege stop bespaart. Zo'n meetcall kost die tokens dus echt (0 = nooit)
+STREAM_BASELINE_EVERY = int(os.getenv("STREAM_BASELINE_EVERY", "0"))
+
+
+def stop_at_marker(end_marker, start_marker=None):
+    """
+    Stopconditie voor StreamCollector: stopt zodra end_marker binnen is (en, als start_marker
+    gegeven is, pas na start_marker). Geeft de tekst tot en met de marker terug, anders None.
+    """
+    def condition(text):
+        search_from = 0
+        if start_marker:
+            search_from = text.find(start_marker)
+            if search_from == -1:
+                return None
+            search_from += len(start_marker)
+        end_idx = text.find(end_marker, search_from)
+        if end_idx == -1:
+            return None
+        return text[:end_idx + len(end_marker)]
+    # Vaste beschrijving, zodat de response cache dezelfde conditie over runs heen herkent
+    condition.cache_key = f"stop_at_marker({end_marker!r}, {start_marker!r})"
+    return condition
+
+
+def partial_tag_length(text, tag):
+    """Lengte van het langste stuk aan het eind van text dat het begin van tag kan zijn."""
+    for length in range(min(len(tag) - 1, len(text)), 0, -1):
+        if text.endswith(tag[:length]):
+            return length
+    return 0
+
+
+class ReasoningFilter():
+    """
+    Haalt <think>...</think>-blokken uit een stream terwijl die binnenkomt. Een tag die over twee
+    chunks verdeeld is wordt even vastgehouden tot duidelijk is of het echt een tag is.
+    """
+    def __init__(self):
+        self.in_reasoning = False
+        self.pending = ""
+        self.discarded_chars = 0
+
+    def feed(self, piece):
+        buffer = self.pending + piece
+        self.pending = ""
+        visible = []
+        while buffer:
+            tag = REASONING_CLOSE_TAG if self.in_reasoning else REASONING_OPEN_TAG
+            tag_idx = buffer.find(tag)
+            if tag_idx == -1:
+                keep = partial_tag_length(buffer, tag)
+                self.pending = buffer[len(buffer) - keep:]
+                emitted = buffer[:len(buffer) - keep]
+                buffer = ""
+            else:
+                emitted = buffer[:tag_idx]
+                buffer = buffer[tag_idx + len(tag):]
+                self.discarded_chars += len(tag)
+            if self.in_reasoning:
+                self.discarded_chars += len(emitted)
+            else:
+                visible.append(emitted)
+            if tag_idx != -1:
+                self.in_reasoning = not self.in_reasoning
+        return "".join(visible)
+
+    def flush(self):
+        rest, self.pending = self.pending, ""
+        if self.in_reasoning:
+            self.discarded_chars += len(rest)
+            return ""
+        return rest
+
+
+class StreamCollector():
+    """
+    Verzamelt de tekst van één gestreamde call. feed() geeft True terug zodra de stopconditie
+    voldaan is; de aanroeper sluit dan de stream. Met strip_reasoning worden <think>-blokken
+    direct weggegooid, zodat de stopconditie alleen de echte output ziet.
+    Met measure_tail wordt niet gestopt maar alleen onthouden waar de stop had gelegen; de tekst
+    wordt wel op dat punt afgekapt. Zo meet StreamStats wat een vroege stop oplevert.
+    """
+    def __init__(self, stop_condition=None, strip_reasoning=False, measure_tail=False):
+        self.stop_condition = stop_condition
+        self.reasoning_filter = ReasoningFilter() if strip_reasoning else None
+        self.measure_tail = measure_tail
+        self.text = ""
+        self.chunks = 0
+        self.tokens = None
+        # Tokens van de prompt, als de backend die meldt (voor de metrics)
+        self.prompt_tokens = None
+        self.seconds = 0.0
+        self.stopped_early = False
+        self.stop_point = None
+        self._start_time = time.perf_counter()
+
+    def start(self):
+        """Begin van de stream; een call die in de rij van een pool stond telt zo niet mee."""
+        self._start_time = time.perf_counter()
+
+    def feed(self, piece):
+        self.chunks += 1
+        if self.stop_point:
+            return False
+        visible = self.reasoning_filter.feed(piece) if self.reasoning_filter else piece
+        if not visible:
+            return False
+        self.text += visible
+        if self.stop_condition:
+            truncated = self.stop_condition(self.text)
+            if truncated is not None:
+                self.text = truncated
+                # (chunks, seconds) op het moment dat de stopconditie voldaan was
+                self.stop_point = (self.chunks, time.perf_counter() - self._start_time)
+                self.stopped_early = not self.measure_tail
+                return self.stopped_early
+        return False
+
+    def finish(self):
+        if self.reasoning_filter and not self.stop_point:
+            self.text += self.reasoning_filter.flush()
+        self.seconds = time.perf_counter() - self._start_time
+        return self.text
+
+    @property
+    def reasoning_chars(self):
+        return self.reasoning_filter.discarded_chars if self.reasoning_filter else 0
+
+    @property
+    def token_count(self):
+        """Tokens volgens de backend als die het meldt, anders het aantal chunks."""
+        return self.tokens if self.tokens is not None else self.chunks
+
+    @property
+    def token_unit(self):
+        return "tokens" if self.tokens is not None else "chunks"
+
+    def tokens_after(self, chunks):
+        """Tokens na de eerste `chunks` chunks; met backend-tokens naar rato van het aantal chunks."""
+        tail_chunks = max(self.chunks - chunks, 0)
+        if self.tokens is None or not self.chunks:
+            return tail_chunks
+        return self.tokens * tail_chunks / self.chunks
+
+
+class StreamStats():
+    """
+    Houdt per (backend, model) bij hoeveel tokens en seconden gestreamde calls kosten. Een deel van
+    de calls (zie STREAM_BASELINE_EVERY) loopt door na de stopconditie; het gemiddelde aantal tokens
+    en seconden ná het stoppunt van die calls is de geschatte besparing van elke vroeg gestopte call.
+    Meldt de backend geen tokens, dan wordt in chunks geteld; token_unit in elke regel zegt welke.
+    """
+    def __init__(self, path=STREAM_STATS_PATH, baseline_every=STREAM_BASELINE_EVERY):
+        self.path = path
+        self.baseline_every = baseline_every
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._tail = {}
+        self.totals = {"calls": 0, "stopped_early": 0, "tokens": 0, "seconds": 0.0,
+                       "tokens_saved": 0.0, "seconds_saved": 0.0, "reasoning_chars": 0, "chunk_counted_calls": 0}
+
+    def new_collector(self, backend, model, stop_condition=None, strip_reasoning=False):
+        """Collector voor de volgende call; af en toe een meetcall die doorloopt na de stopconditie."""
+        key = (backend, model)
+        with self._lock:
+            call_number = self._calls.get(key, 0)
+            self._calls[key] = call_number + 1
+        measure_tail = bool(stop_condition and self.baseline_every and call_number % self.baseline_every == 0)
+        return StreamCollector(stop_condition, strip_reasoning, measure_tail)
+
+    def record(self, backend, model, collector):
+        key = (backend, model)
+        tokens = collector.token_count
+        seconds = collector.seconds
+        with self._lock:
+            tail = self._tail.setdefault(key, {"calls": 0, "tokens": 0.0, "seconds": 0.0})
+            tokens_saved, seconds_saved = 0.0, 0.0
+            if collector.measure_tail and collector.stop_point:
+                stop_chunks, stop_seconds = collector.stop_point
+                tail["calls"] += 1
+                tail["tokens"] += collector.tokens_after(stop_chunks)
+                tail["seconds"] += max(seconds - stop_seconds, 0.0)
+            elif collector.stopped_early and tail["calls"]:
+                tokens_saved = tail["tokens"] / tail["calls"]
+                seconds_saved = tail["seconds"] / tail["calls"]
+            self.totals["calls"] += 1
+            self.totals["stopped_early"] += collector.stopped_early
+            self.totals["tokens"] += tokens
+            self.totals["seconds"] += seconds
+            self.totals["tokens_saved"] += tokens_saved
+            self.totals["seconds_saved"] += seconds_saved
+            self.totals["reasoning_chars"] += collector.reasoning_chars
+            self.totals["chunk_counted_calls"] += collector.tokens is None
+            record = {
+                "backend": backend,
+                "model": model,
+                "tokens": tokens,
+                "token_unit": collector.token_unit,
+                "seconds": round(seconds, 3),
+                "stopped_early": collector.stopped_early,
+                "baseline_call": collector.measure_tail,
+                "reasoning_chars": collector.reasoning_chars,
+                "output_chars": len(collector.text),
+                "estimated_tokens_saved": round(tokens_saved, 1),
+                "estimated_seconds_saved": round(seconds_saved, 3),
+            }
+            if self.path:
+                if os.path.dirname(self.path):
+                    os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(record) + "\n")
+        return record
+
+    def summary(self):
+        with self._lock:
+            totals = dict(self.totals)
+        text = (f"{totals['calls']} streamed calls, {totals['stopped_early']} stopped early, {totals['tokens']} tokens in "
+                f"{totals['seconds']:.1f}s; estimated savings {totals['tokens_saved']:.0f} tokens and "
+                f"{totals['seconds_saved']:.1f}s, {totals['reasoning_chars']} reasoning characters discarded")
+        if totals["chunk_counted_calls"]:
+            text += f" ({totals['chunk_counted_calls']} calls without token counts from the backend counted in chunks)"
+        return text
+
+
+_stream_stats = None
+_stream_stats_lock = threading.Lock()
+
+
+def get_stream_stats():
+    """Eén StreamStats per proces, gedeeld door alle agents."""
+    global _stream_stats
+    with _stream_stats_lock:
+        if _stream_stats is None:
+            _stream_stats = StreamStats()
+        return _stream_stats
@@ -0,0 +1,216 @@
+import sys
+import time
+import numpy as np
+import pandas as pd
+from faker.providers.person.nl_NL import Provider as PersonProvider
+from faker.providers.job import Provider as JobProvider
+
+from group_generation import (
+    PROVIDER_WEIGHTS, MIN_AGE, MAX_AGE,
+    EMPLOYMENT_STATUS_BY_AGE, MARITAL_STATUS_BY_AGE, HEALTH_STATUS_BY_AGE, TECHNOLOGY_PROFICIENCY_BY_AGE,
+    INCOME_LEVEL_BY_STATUS, LOW_INCOME_EMPLOYMENT, HOUSEHOLD_COMPOSITION_RULES, UNKNOWN_HOUSEHOLD,
+    WEEKDAY_ONLINE_HOURS_BY_EMPLOYMENT, DEFAULT_WEEKDAY_ONLINE_HOURS, WEEKEND_ONLINE_HOURS_BY_AGE,
+)
+
+# Vaste peildatum, zodat geboortedata bij dezelfde seed altijd gelijk zijn
+REFERENCE_DATE = np.datetime64("2025-01-01")
+SENIOR_JOB_TERMS = ['directeur', 'manager', 'advocaat', 'arts', 'professor']
+FIRST_NAMES_MALE = np.array(PersonProvider.first_names_male, dtype=object)
+FIRST_NAMES_FEMALE = np.array(PersonProvider.first_names_female, dtype=object)
+LAST_NAMES = np.array(PersonProvider.last_names, dtype=object)
+JOBS = np.array(JobProvider.jobs, dtype=object)
+# Net als de nl_NL Faker-formats heeft 1 op de 4 personen een dubbele achternaam
+DOUBLE_LAST_NAME_CHANCE = 0.25
+
+
+def sample_categorical(rng, elements, weights, size):
+    """Trekt size keer uit elements via een cumulatieve gewichtentabel."""
+    cumulative = np.cumsum(weights, dtype=float)
+    cumulative /= cumulative[-1]
+    indices = np.searchsorted(cumulative, rng.random(size), side="right")
+    return np.asarray(elements, dtype=object)[indices]
+
+
+def sample_uniform(rng, elements, size):
+    return np.asarray(elements, dtype=object)[rng.integers(0, len(elements), size)]
+
+
+def sample_provider(rng, provider_name, size):
+    elements, weights = PROVIDER_WEIGHTS[provider_name]
+    return sample_categorical(rng, elements, weights, size)
+
+
+def sample_by_age(rng, table, age):
+    """Gemaskeerd trekken: per leeftijdsgroep één trekking voor alle personen in die groep."""
+    result = np.empty(len(age), dtype=object)
+    remaining = np.ones(len(age), dtype=bool)
+    for max_age, elements, weights in table:
+        mask = remaining if max_age is None else remaining & (age < max_age)
+        result[mask] = sample_categorical(rng, elements, weights, mask.sum())
+        remaining &= ~mask
+    return result
+
+
+def replace_where(rng, values, mask, options):
+    values[mask] = sample_uniform(rng, options, mask.sum())
+
+
+def json_list(values):
+    return "[" + ", ".join(f'"{value}"' for value in values) + "]"
+
+
+def sample_online_hours(rng, age, employment_status):
+    """Geeft typical_online_hours als JSON-string, in hetzelfde formaat als generate_people."""
+    size = len(age)
+    weekdays = np.full(size, json_list(DEFAULT_WEEKDAY_ONLINE_HOURS), dtype=object)
+    for employment_statuses, options in WEEKDAY_ONLINE_HOURS_BY_EMPLOYMENT:
+        mask = np.isin(employment_status, employment_statuses)
+        weekdays[mask] = sample_uniform(rng, [json_list(option) for option in options], mask.sum())
+
+    weekends = np.empty(size, dtype=object)
+    remaining = np.ones(size, dtype=bool)
+    for max_age, options in WEEKEND_ONLINE_HOURS_BY_AGE:
+        mask = remaining if max_age is None else remaining & (age < max_age)
+        weekends[mask] = sample_uniform(rng, [json_list(option) for option in options], mask.sum())
+        remaining &= ~mask
+    return '{"weekdays": ' + weekdays + ', "weekends": ' + weekends + '}'
+
+
+def generate_people_vectorized(num_people, seed=None, rng=None):
+    """
+    Gevectoriseerde variant van group_generation.generate_people.
+    Elke kolom wordt in één keer getrokken met een NumPy Generator; afhankelijke attributen
+    (werkstatus per leeftijd, spelling per opleiding, ...) worden per groep met maskers getrokken.
+    Dezelfde seed geeft altijd hetzelfde resultaat.
+    """
+    if rng is None:
+        rng = np.random.default_rng(seed)
+    size = num_people
+
+    sex = np.where(rng.random(size) < 0.5, "M", "F").astype(object)
+    first_names = np.where(
+        sex == "M",
+        sample_uniform(rng, FIRST_NAMES_MALE, size),
+        sample_uniform(rng, FIRST_NAMES_FEMALE, size),
+    )
+    last_names = sample_uniform(rng, LAST_NAMES, size)
+    double_last_name = rng.random(size) < DOUBLE_LAST_NAME_CHANCE
+    last_names[double_last_name] = last_names[double_last_name] + "-" + sample_uniform(rng, LAST_NAMES, double_last_name.sum())
+    name = first_names + " " + last_names
+    job = sample_uniform(rng, JOBS, size)
+
+    age = rng.integers(MIN_AGE, MAX_AGE, size)
+    days_before_reference = (age * 365.25).astype(np.int64) + rng.integers(0, 365, size)
+    birthdate = (REFERENCE_DATE - days_before_reference.astype("timedelta64[D]")).astype(str).astype(object)
+
+    marital_status = sample_by_age(rng, MARITAL_STATUS_BY_AGE, age)
+    socio_economic_status = sample_provider(rng, 'socio_economic_status', size)
+    employment_status = sample_by_age(rng, EMPLOYMENT_STATUS_BY_AGE, age)
+    health_status = sample_by_age(rng, HEALTH_STATUS_BY_AGE, age)
+    technology_proficiency = sample_by_age(rng, TECHNOLOGY_PROFICIENCY_BY_AGE, age)
+
+    income = np.full(size, 'Laag', dtype=object)
+    for status, (elements, weights) in INCOME_LEVEL_BY_STATUS.items():
+        mask = (socio_economic_status == status) & ~np.isin(employment_status, LOW_INCOME_EMPLOYMENT)
+        income[mask] = sample_categorical(rng, elements, weights, mask.sum())
+
+    household = np.full(size, UNKNOWN_HOUSEHOLD, dtype=object)
+    remaining = np.ones(size, dtype=bool)
+    for marital_statuses, max_age, required_employment, elements, weights in HOUSEHOLD_COMPOSITION_RULES:
+        mask = remaining & np.isin(marital_status, marital_statuses)
+        if max_age is not None:
+            mask &= age < max_age
+        if required_employment is not None:
+            mask &= employment_status == required_employment
+        household[mask] = sample_categorical(rng, elements, weights, mask.sum())
+        remaining &= ~mask
+
+    education = sample_provider(rng, 'education_level', size)
+    activity_level = sample_provider(rng, 'activity_level_provider', size)
+    typical_online_hours = sample_online_hours(rng, age, employment_status)
+
+    low_tech = np.isin(technology_proficiency, ['Zeer beperkt', 'Beginner'])
+    high_tech = np.isin(technology_proficiency, ['Gevorderd', 'Expert'])
+
+    response_latency_profile = sample_provider(rng, 'response_latency_profile_provider', size)
+    replace_where(rng, response_latency_profile, ((age > 60) | low_tech) & (response_latency_profile == 'Onmiddellijk'),
+                  ['Korte vertraging', 'Lange vertraging', 'Variabel'])
+
+    emoji_usage_propensity = sample_provider(rng, 'emoji_usage_propensity_provider', size)
+    reduced_emoji = (age > 50) | low_tech
+    replace_where(rng, emoji_usage_propensity, reduced_emoji & np.isin(emoji_usage_propensity, ['Gemiddeld', 'Hoog']), ['Geen', 'Laag'])
+    replace_where(rng, emoji_usage_propensity, ~reduced_emoji & (age < 25) & high_tech & np.isin(emoji_usage_propensity, ['Geen', 'Laag']),
+                  ['Gemiddeld', 'Hoog'])
+
+    mention_propensity = sample_provider(rng, 'mention_propensity_provider', size)
+    message_length_preference = sample_provider(rng, 'message_length_preference_provider', size)
+
+    punctuation_habits = sample_provider(rng, 'punctuation_habits_provider', size)
+    spelling_error_frequency = sample_provider(rng, 'spelling_error_frequency_provider', size)
+    grammar_correctness = sample_provider(rng, 'grammar_correctness_provider', size)
+
+    low_education = np.isin(education, ['Basisonderwijs', 'VMBO'])
+    replace_where(rng, punctuation_habits, low_education & (punctuation_habits == 'Correct'), ['Schaars', 'Overmatig', 'Correct'])
+    replace_where(rng, spelling_error_frequency, low_education & (spelling_error_frequency == 'Geen'), ['Laag', 'Gemiddeld', 'Hoog'])
+    replace_where(rng, grammar_correctness, low_education & (grammar_correctness == 'Correct'), ['Informeel', 'Slecht'])
+
+    high_education = np.isin(education, ['HBO', 'WO'])
+    punctuation_habits[high_education & (punctuation_habits != 'Correct') & (rng.random(size) < 0.7)] = 'Correct'
+    spelling_error_frequency[high_education & (spelling_error_frequency != 'Geen') & (rng.random(size) < 0.7)] = 'Geen'
+    grammar_correctness[high_education & (grammar_correctness != 'Correct') & (rng.random(size) < 0.8)] = 'Correct'
+
+    # Taalstijl beïnvloed door leeftijd/beroep
+    language_style = sample_provider(rng, 'language_style_provider', size)
+    lower_job = pd.Series(job).str.lower()
+    senior_job = lower_job.str.contains("|".join(SENIOR_JOB_TERMS), regex=True).to_numpy()
+    formal_group = (age > 55) | senior_job
+    young_group = ~formal_group & (age < 25)
+    was_informal = language_style == 'Informeel'
+    style_roll = rng.random(size) < 0.3
+    language_style[formal_group & (language_style == 'Straattaal')] = 'Informeel'
+    language_style[formal_group & was_informal & style_roll] = 'Formeel'
+    language_style[young_group & (language_style == 'Formeel')] = 'Informeel'
+    language_style[young_group & was_informal & style_roll] = 'Straattaal'
+
+    emphasis_style = sample_provider(rng, 'emphasis_style_provider', size)
+    message_chaining_preference = sample_provider(rng, 'message_chaining_preference_provider', size)
+
+    return pd.DataFrame({
+        'job': job,
+        'name': name,
+        'sex': sex,
+        'birthdate': birthdate,
+        'country_of_origin': sample_provider(rng, 'country_of_origin', size),
+        'socio_economic_status': socio_economic_status,
+        'household_composition': household,
+        'political_orientation': sample_provider(rng, 'political_orientation', size),
+        'education_level': education,
+        'religion': sample_provider(rng, 'religion', size),
+        'marital_status': marital_status,
+        'employment_status': employment_status,
+        'housing_type': sample_provider(rng, 'housing_type', size),
+        'technology_proficiency': technology_proficiency,
+        'health_status': health_status,
+        'income_level': income,
+        'age': age,
+        'activity_level': activity_level,
+        'typical_online_hours': typical_online_hours,
+        'response_latency_profile': response_latency_profile,
+        'emoji_usage_propensity': emoji_usage_propensity,
+        'mention_propensity': mention_propensity,
+        'message_length_preference': message_length_preference,
+        'punctuation_habits': punctuation_habits,
+        'spelling_error_frequency': spelling_error_frequency,
+        'grammar_correctness': grammar_correctness,
+        'language_style': language_style,
+        'emphasis_style': emphasis_style,
+        'message_chaining_preference': message_chaining_preference,
+    })
+
+
+if __name__ == "__main__":
+    num_people = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    start_time = time.perf_counter()
+    people_df = generate_people_vectorized(num_people, seed=313)
+    duration = time.perf_counter() - start_time
+    print(f"Generated {len(people_df)} people in {duration:.2f} seconds ({len(people_df) / duration:,.0f} people/s)")
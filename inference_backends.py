@@ -0,0 +1,99 @@
+import os
+import torch
+from transformers import AutoConfig, AutoModelForSeq2SeqLM
+
+# torch: fp32 PyTorch (standaard)
+# int8: PyTorch met dynamische int8-kwantisatie van alle Linear-lagen
+# onnx: ONNX Runtime met gecachte encoder/decoder sessies (vereist optimum[onnxruntime])
+# onnx-int8: ONNX Runtime met dynamisch gekwantiseerde int8 modellen
+BACKENDS = ("torch", "int8", "onnx", "onnx-int8")
+SUMMARIZER_BACKEND = os.getenv("SUMMARIZER_BACKEND", "torch")
+
+
+def _require_optimum():
+    try:
+        from optimum.onnxruntime import ORTModelForSeq2SeqLM, ORTQuantizer
+        from optimum.onnxruntime.configuration import AutoQuantizationConfig
+    except ImportError:
+        raise ImportError("The onnx backends need optimum with onnxruntime: pip install optimum[onnxruntime]")
+    return ORTModelForSeq2SeqLM, ORTQuantizer, AutoQuantizationConfig
+
+
+def onnx_export_dir(model_path, backend):
+    return f"{model_path.rstrip('/')}-{backend}"
+
+
+def export_onnx(model_path):
+    """Exporteert een getraind checkpoint (bv. ./bart-summarizer) eenmalig naar ONNX."""
+    ORTModelForSeq2SeqLM, _, _ = _require_optimum()
+    export_dir = onnx_export_dir(model_path, "onnx")
+    if not os.path.exists(export_dir):
+        print(f"Exporting {model_path} to ONNX in {export_dir}")
+        model = ORTModelForSeq2SeqLM.from_pretrained(model_path, export=True, use_cache=True)
+        model.save_pretrained(export_dir)
+    return export_dir
+
+
+def export_onnx_int8(model_path):
+    """Kwantiseert de ONNX-export dynamisch naar int8 (encoder, decoder en decoder-with-past)."""
+    ORTModelForSeq2SeqLM, ORTQuantizer, AutoQuantizationConfig = _require_optimum()
+    onnx_dir = export_onnx(model_path)
+    export_dir = onnx_export_dir(model_path, "onnx-int8")
+    if not os.path.exists(export_dir):
+        print(f"Quantizing {onnx_dir} to int8 in {export_dir}")
+        qconfig = AutoQuantizationConfig.avx2(is_static=False, per_channel=False)
+        for onnx_file in sorted(f for f in os.listdir(onnx_dir) if f.endswith(".onnx")):
+            quantizer = ORTQuantizer.from_pretrained(onnx_dir, file_name=onnx_file)
+            quantizer.quantize(save_dir=export_dir, quantization_config=qconfig)
+        # Config meenemen, zodat de map los te laden is
+        AutoConfig.from_pretrained(onnx_dir).save_pretrained(export_dir)
+    return export_dir
+
+
+def load_seq2seq_model(model_path, backend=SUMMARIZER_BACKEND):
+    """Laadt een seq2seq-model met de gekozen backend. Alle backends ondersteunen model.generate."""
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend {backend}, choose one of {BACKENDS}")
+
+    if backend in ("torch", "int8"):
+        model = AutoModelForSeq2SeqLM.from_pretrained(model_path)
+        model.eval()
+        if backend == "int8":
+            model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        return model
+
+    ORTModelForSeq2SeqLM, _, _ = _require_optimum()
+    if backend == "onnx":
+        export_dir = export_onnx(model_path)
+        return ORTModelForSeq2SeqLM.from_pretrained(export_dir, use_cache=True)
+    export_dir = export_onnx_int8(model_path)
+    quantized_files = {f.replace("_quantized", "").replace(".onnx", ""): f for f in os.listdir(export_dir) if f.endswith(".onnx")}
+    return ORTModelForSeq2SeqLM.from_pretrained(
+        export_dir,
+        use_cache=True,
+        encoder_file_name=quantized_files["encoder_model"],
+        decoder_file_name=quantized_files["decoder_model"],
+        decoder_with_past_file_name=quantized_files.get("decoder_with_past_model"),
+    )
+
+
+def estimate_model_bytes(model):
+    """Schat het geheugengebruik van een model; voor ONNX-modellen de grootte van de bestanden."""
+    if not isinstance(model, torch.nn.Module):
+        model_dir = str(getattr(model, "model_save_dir", ""))
+        if not os.path.isdir(model_dir):
+            return 0
+        return sum(os.path.getsize(os.path.join(model_dir, f)) for f in os.listdir(model_dir) if f.endswith(".onnx"))
+
+    total = 0
+    seen = set()
+    for value in model.state_dict().values():
+        # Gekwantiseerde Linear-lagen slaan gewicht en bias samen op als tuple
+        tensors = value if isinstance(value, (tuple, list)) else (value,)
+        for tensor in tensors:
+            # Gedeelde gewichten (bv. de embeddings van BART) maar één keer tellen
+            if not isinstance(tensor, torch.Tensor) or tensor.data_ptr() in seen:
+                continue
+            seen.add(tensor.data_ptr())
+            total += tensor.numel() * tensor.element_size()
+    return total
@@ -0,0 +1,168 @@
+import os
+import time
+import asyncio
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+import torch
+
+MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", "8"))
+MAX_BATCH_WAIT_MS = int(os.getenv("MAX_BATCH_WAIT_MS", "25"))
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", "1"))
+MAX_INPUT_TOKENS = 1024
+# Generatie-instellingen voor samenvattingen, gedeeld door de API en batch_summarize.py
+SUMMARY_GENERATION_KWARGS = {
+    "max_length": 248,
+    "min_length": 50,
+    "do_sample": True,
+    "num_beams": 4,
+}
+DETERMINISTIC_GENERATION_KWARGS = {**SUMMARY_GENERATION_KWARGS, "do_sample": False}
+
+
+def generation_key(model_path, generation_kwargs, max_input_tokens=None):
+    return (model_path, tuple(sorted(generation_kwargs.items())), max_input_tokens)
+
+
+def generate_batch_with_counts(tokenizer, model, texts, generation_kwargs, max_input_tokens=None):
+    """Als generate_batch, maar geeft ook het aantal tokens in (zonder padding) en uit terug."""
+    max_input_tokens = min(tokenizer.model_max_length, max_input_tokens or MAX_INPUT_TOKENS)
+    inputs = tokenizer(texts, padding=True, truncation=True, max_length=max_input_tokens, return_tensors="pt")
+    with torch.inference_mode():
+        output_ids = model.generate(**inputs, **generation_kwargs)
+    summaries = tokenizer.batch_decode(output_ids, skip_special_tokens=True, clean_up_tokenization_spaces=True)
+    tokens_in = int(inputs["attention_mask"].sum())
+    tokens_out = int((output_ids != tokenizer.pad_token_id).sum())
+    return [summary.strip() for summary in summaries], tokens_in, tokens_out
+
+
+def generate_batch(tokenizer, model, texts, generation_kwargs, max_input_tokens=None):
+    """
+    Tokeniseert de teksten als één gepadde batch en voert één keer model.generate uit.
+    Langere teksten worden afgekapt op max_input_tokens (standaard MAX_INPUT_TOKENS).
+    """
+    return generate_batch_with_counts(tokenizer, model, texts, generation_kwargs, max_input_tokens)[0]
+
+
+class InferenceScheduler():
+    """
+    Verzamelt binnenkomende samenvattingsverzoeken in een wachtrij en voert ze in batches uit.
+    Een batch wordt gestart zodra er max_batch_size verzoeken zijn of max_wait_ms verstreken is.
+    Alleen verzoeken met hetzelfde model, dezelfde generatie-instellingen en dezelfde max_input_tokens
+    komen in één batch.
+    De generatie draait in een threadpool, zodat de event loop vrij blijft.
+    Met metrics (een ApiMetrics-object, zie api_metrics.py) worden wachttijd, batchduur en tokens bijgehouden.
+    """
+    def __init__(self, registry, max_batch_size=MAX_BATCH_SIZE, max_wait_ms=MAX_BATCH_WAIT_MS, num_workers=INFERENCE_WORKERS,
+                 metrics=None):
+        self.registry = registry
+        self.metrics = metrics
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.num_workers = num_workers
+        self._queue = None
+        self._workers = None
+        self._executor = None
+        self._loop_task = None
+        self._tasks = set()
+        self.batches_run = 0
+        self.requests_done = 0
+        self.generate_seconds = 0.0
+
+    async def start(self):
+        self._queue = asyncio.Queue()
+        self._workers = asyncio.Semaphore(self.num_workers)
+        self._executor = ThreadPoolExecutor(max_workers=self.num_workers, thread_name_prefix="summarizer")
+        self._loop_task = asyncio.create_task(self._batch_loop())
+
+    async def stop(self):
+        if self._loop_task:
+            self._loop_task.cancel()
+            try:
+                await self._loop_task
+            except asyncio.CancelledError:
+                pass
+        while self._queue and not self._queue.empty():
+            _, _, future, _ = self._queue.get_nowait()
+            future.cancel()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self._executor:
+            self._executor.shutdown(wait=True)
+
+    async def submit(self, model_path, input_text, generation_kwargs, max_input_tokens=None):
+        """Zet een tekst in de wachtrij en wacht tot de samenvatting klaar is."""
+        future = asyncio.get_running_loop().create_future()
+        key = generation_key(model_path, generation_kwargs, max_input_tokens)
+        await self._queue.put((key, input_text, future, time.perf_counter()))
+        return await future
+
+    async def _batch_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            groups = defaultdict(list)
+            for key, input_text, future, enqueued_at in batch:
+                groups[key].append((input_text, future, enqueued_at))
+
+            for key, items in groups.items():
+                # Wachten op een vrije worker; ondertussen lopen nieuwe verzoeken de wachtrij in
+                await self._workers.acquire()
+                task = asyncio.create_task(self._run_batch(key, items))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+
+    async def _run_batch(self, key, items):
+        model_path, generation_items, max_input_tokens = key
+        texts = [input_text for input_text, _, _ in items]
+        if self.metrics:
+            now = time.perf_counter()
+            for _, _, enqueued_at in items:
+                self.metrics.observe("llm_queue_wait_seconds", now - enqueued_at, backend="summarizer")
+        try:
+            summaries = await asyncio.get_running_loop().run_in_executor(
+                self._executor, self._generate, model_path, texts, dict(generation_items), max_input_tokens
+            )
+            for (_, future, _), summary in zip(items, summaries):
+                if not future.done():
+                    future.set_result(summary)
+        except Exception as e:
+            for _, future, _ in items:
+                if not future.done():
+                    future.set_exception(e)
+        finally:
+            self._workers.release()
+
+    def _generate(self, model_path, texts, generation_kwargs, max_input_tokens=None):
+        entry = self.registry.get(model_path)
+        start_time = time.perf_counter()
+        summaries, tokens_in, tokens_out = generate_batch_with_counts(entry.tokenizer, entry.model, texts, generation_kwargs, max_input_tokens)
+        duration = time.perf_counter() - start_time
+        if self.metrics:
+            # Eén call per batch; summarize_batch_items_total / llm_requests_total is de gemiddelde batchgrootte
+            self.metrics.record_llm_call("summarizer", model_path, duration, tokens_in, tokens_out)
+            self.metrics.inc("summarize_batch_items_total", len(texts), model=model_path)
+
+        self.batches_run += 1
+        self.requests_done += len(texts)
+        self.generate_seconds += duration
+        print(f"Generated batch of {len(texts)} summaries with {model_path} in {duration:.2f} seconds")
+        return summaries
+
+    def stats(self):
+        return {
+            "queued": self._queue.qsize() if self._queue else 0,
+            "batches_run": self.batches_run,
+            "requests_done": self.requests_done,
+            "avg_batch_size": round(self.requests_done / self.batches_run, 2) if self.batches_run else 0,
+            "generate_seconds": round(self.generate_seconds, 2),
+        }
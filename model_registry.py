@@ -0,0 +1,117 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from transformers import AutoTokenizer
+
+from inference_backends import load_seq2seq_model, estimate_model_bytes, SUMMARIZER_BACKEND
+
+DEFAULT_MODEL_PATH = "Testing/bartsummarizer"
+# Totale hoeveelheid geheugen (in MB) die de geladen modellen samen mogen gebruiken
+MODEL_MEMORY_BUDGET_MB = int(os.getenv("MODEL_MEMORY_BUDGET_MB", "4096"))
+# Komma-gescheiden lijst van modellen die bij het opstarten al geladen worden
+PRELOAD_MODELS = [p.strip() for p in os.getenv("PRELOAD_MODELS", DEFAULT_MODEL_PATH).split(",") if p.strip()]
+
+
+class LoadedModel():
+    def __init__(self, model_path, backend, tokenizer, model, load_seconds):
+        self.model_path = model_path
+        self.backend = backend
+        self.tokenizer = tokenizer
+        self.model = model
+        self.size_bytes = estimate_model_bytes(model)
+        self.load_seconds = load_seconds
+        self.loaded_at = time.time()
+        self.last_used = self.loaded_at
+        self.uses = 0
+
+    def info(self):
+        return {
+            "model_path": self.model_path,
+            "backend": self.backend,
+            "size_mb": round(self.size_bytes / (1024 * 1024), 1),
+            "load_seconds": round(self.load_seconds, 2),
+            "loaded_at": self.loaded_at,
+            "last_used": self.last_used,
+            "uses": self.uses,
+        }
+
+
+class ModelRegistry():
+    """
+    Houdt per model_path één geladen tokenizer en model warm.
+    Modellen worden bij het eerste gebruik geladen en de minst recent gebruikte modellen
+    worden verwijderd zodra het geheugenbudget overschreden wordt.
+    """
+    def __init__(self, memory_budget_mb=MODEL_MEMORY_BUDGET_MB, backend=SUMMARIZER_BACKEND):
+        self.backend = backend
+        self.memory_budget_bytes = memory_budget_mb * 1024 * 1024
+        self._models = OrderedDict()
+        self._lock = threading.Lock()
+        self._load_locks = {}
+
+    def _load_lock(self, model_path):
+        with self._lock:
+            if model_path not in self._load_locks:
+                self._load_locks[model_path] = threading.Lock()
+            return self._load_locks[model_path]
+
+    def _load(self, model_path):
+        start_time = time.perf_counter()
+        tokenizer = AutoTokenizer.from_pretrained(model_path)
+        model = load_seq2seq_model(model_path, self.backend)
+        duration = time.perf_counter() - start_time
+        print(f"Loaded model {model_path} ({self.backend}) in {duration:.2f} seconds")
+        return LoadedModel(model_path, self.backend, tokenizer, model, duration)
+
+    def _evict_for(self, needed_bytes):
+        """Verwijdert de minst recent gebruikte modellen totdat needed_bytes binnen het budget past."""
+        while self._models and self.used_bytes() + needed_bytes > self.memory_budget_bytes:
+            evicted_path, evicted = self._models.popitem(last=False)
+            print(f"Evicting model {evicted_path} ({evicted.size_bytes / (1024 * 1024):.0f} MB) from the registry")
+
+    def get(self, model_path):
+        """Geeft het geladen model terug en laadt het als het nog niet in het geheugen staat."""
+        with self._lock:
+            entry = self._models.get(model_path)
+            if entry is not None:
+                self._models.move_to_end(model_path)
+                entry.last_used = time.time()
+                entry.uses += 1
+                return entry
+
+        # Per model een aparte lock, zodat gelijktijdige requests hetzelfde model niet twee keer laden
+        with self._load_lock(model_path):
+            with self._lock:
+                entry = self._models.get(model_path)
+            if entry is None:
+                entry = self._load(model_path)
+                with self._lock:
+                    self._evict_for(entry.size_bytes)
+                    self._models[model_path] = entry
+            with self._lock:
+                self._models.move_to_end(model_path)
+                entry.last_used = time.time()
+                entry.uses += 1
+            return entry
+
+    def load(self, model_path):
+        entry = self.get(model_path)
+        entry.uses -= 1
+        return entry
+
+    def unload(self, model_path):
+        with self._lock:
+            return self._models.pop(model_path, None) is not None
+
+    def used_bytes(self):
+        return sum(entry.size_bytes for entry in self._models.values())
+
+    def list_models(self):
+        with self._lock:
+            return {
+                "backend": self.backend,
+                "memory_budget_mb": round(self.memory_budget_bytes / (1024 * 1024), 1),
+                "memory_used_mb": round(self.used_bytes() / (1024 * 1024), 1),
+                "models": [entry.info() for entry in self._models.values()],
+            }
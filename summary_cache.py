@@ -0,0 +1,138 @@
+import os
+import json
+import time
+import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict
+
+SUMMARY_CACHE_SIZE = int(os.getenv("SUMMARY_CACHE_SIZE", "1024"))
+SUMMARY_CACHE_TTL_SECONDS = int(os.getenv("SUMMARY_CACHE_TTL_SECONDS", str(24 * 60 * 60)))
+# Pad naar een SQLite-bestand voor de schijf-cache; leeg laten om alleen in het geheugen te cachen
+SUMMARY_CACHE_DB = os.getenv("SUMMARY_CACHE_DB", "")
+SUMMARY_CACHE_DB_MAX_ROWS = int(os.getenv("SUMMARY_CACHE_DB_MAX_ROWS", "100000"))
+
+
+def normalize_text(text):
+    """Negeert verschillen in witruimte, zodat dezelfde chat dezelfde hash krijgt."""
+    return " ".join(text.split())
+
+
+class ContentHasher():
+    """Berekent incrementeel een hash over de genormaliseerde berichtteksten."""
+    def __init__(self):
+        self._hash = hashlib.sha256()
+
+    def update(self, text):
+        self._hash.update(normalize_text(text).encode("utf-8"))
+        self._hash.update(b"\x1e")
+
+    def hexdigest(self):
+        return self._hash.hexdigest()
+
+
+def make_cache_key(content_hash, model_path, generation_kwargs, **options):
+    key_data = {
+        "content": content_hash,
+        "model_path": model_path,
+        "generation": generation_kwargs,
+        "options": options,
+    }
+    return hashlib.sha256(json.dumps(key_data, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class SummaryCache():
+    """
+    Cache voor samenvattingen met een LRU-laag in het geheugen en een optionele SQLite-laag op schijf.
+    Beide lagen hebben een TTL en een maximale grootte.
+    """
+    def __init__(self, max_entries=SUMMARY_CACHE_SIZE, ttl_seconds=SUMMARY_CACHE_TTL_SECONDS,
+                 db_path=SUMMARY_CACHE_DB, db_max_rows=SUMMARY_CACHE_DB_MAX_ROWS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.db_max_rows = db_max_rows
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS summaries (key TEXT PRIMARY KEY, value TEXT, created_at REAL, last_access REAL)"
+            )
+            self._db.commit()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def _expired(self, created_at):
+        return self.ttl_seconds > 0 and time.time() - created_at > self.ttl_seconds
+
+    def _put_memory(self, key, value, created_at):
+        self._memory[key] = (value, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                value, created_at = entry
+                if not self._expired(created_at):
+                    self._memory.move_to_end(key)
+                    self.memory_hits += 1
+                    return value
+                del self._memory[key]
+
+            if self._db is not None:
+                row = self._db.execute("SELECT value, created_at FROM summaries WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    value, created_at = json.loads(row[0]), row[1]
+                    if not self._expired(created_at):
+                        self._db.execute("UPDATE summaries SET last_access = ? WHERE key = ?", (time.time(), key))
+                        self._db.commit()
+                        self._put_memory(key, value, created_at)
+                        self.disk_hits += 1
+                        return value
+                    self._db.execute("DELETE FROM summaries WHERE key = ?", (key,))
+                    self._db.commit()
+
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        now = time.time()
+        with self._lock:
+            self._put_memory(key, value, now)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO summaries (key, value, created_at, last_access) VALUES (?, ?, ?, ?)",
+                    (key, json.dumps(value, ensure_ascii=False), now, now),
+                )
+                if self.ttl_seconds > 0:
+                    self._db.execute("DELETE FROM summaries WHERE created_at < ?", (now - self.ttl_seconds,))
+                self._db.execute(
+                    "DELETE FROM summaries WHERE key IN (SELECT key FROM summaries ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                    (self.db_max_rows,),
+                )
+                self._db.commit()
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM summaries")
+                self._db.commit()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            disk_entries = self._db.execute("SELECT COUNT(*) FROM summaries").fetchone()[0] if self._db is not None else None
+            return {
+                "memory_entries": len(self._memory),
+                "disk_entries": disk_entries,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.memory_hits + self.disk_hits) / lookups, 3) if lookups else 0,
+            }
@@ -0,0 +1,8 @@
+import os
+import sys
+
+# De modules importeren elkaar als losse scripts, dus de repo-root en data_generation moeten op het pad
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in [ROOT, os.path.join(ROOT, "data_generation")]:
+    if path not in sys.path:
+        sys.path.insert(0, path)
@@ -0,0 +1,40 @@
+import os
+import json
+import glob
+
+import pytest
+
+from bio_structure import BIO_FIELDS, BIO_LIST_FIELDS, parse_bio_text
+
+BIOS_FOLDER = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "bios")
+BIO_FILES = sorted(glob.glob(os.path.join(BIOS_FOLDER, "*.json")))
+
+
+def test_item_with_placeholder_description_is_not_a_section():
+    fields = parse_bio_text(
+        "**Description:**\nAnna is 40.\n\n**Normen en Waarden:**\n- **Eerlijkheid:** description\n- **Familie:** description\n\n"
+        "**Beliefs:**\n- **Karma:** omschrijving\n\n**Opinions:**\n- **Klimaat:** omschrijving\n\n**Writing style:**\nKort."
+    )
+    assert fields["description"] == "Anna is 40."
+    assert [item["name"] for item in fields["normen_en_waarden"]] == ["Eerlijkheid", "Familie"]
+    assert fields["beliefs"] == [{"name": "Karma", "description": "omschrijving"}]
+    assert fields["writing_style"] == "Kort."
+
+
+def test_header_with_colon_after_the_bold_markers():
+    fields = parse_bio_text("**Description**:\nAnna is 40.\n**Writing style**: Kort.")
+    assert fields["description"] == "Anna is 40."
+    assert fields["writing_style"] == "Kort."
+
+
+@pytest.mark.parametrize("path", BIO_FILES, ids=os.path.basename)
+def test_parses_every_existing_bio(path):
+    with open(path, "r", encoding="utf-8") as f:
+        personas = json.load(f)
+    for persona in personas:
+        fields = parse_bio_text(persona.get("llm_generated_bio_text") or persona.get("bio"))
+        for field in BIO_FIELDS:
+            assert fields[field], f"{persona['name']}: empty {field}"
+        for field in BIO_LIST_FIELDS:
+            for item in fields[field]:
+                assert not item["name"].startswith("**"), f"{persona['name']}: bad item name {item['name']!r} in {field}"
@@ -0,0 +1,103 @@
+import random
+import datetime
+import statistics
+
+import pytest
+
+import chat_generation
+import event_simulation
+from chat_generation import SIMULATION_START_TIME_STR, SIMULATION_STEP_MINUTES, is_persona_online
+from event_simulation import run_event_simulation, scale_probability
+
+ONLINE_HOURS = {
+    "Anna": {"weekdays": ["00:00-03:00", "08:00-12:00"], "weekends": []},
+    "Bram": {"weekdays": ["22:00-02:00", "09:30-10:30"], "weekends": []},
+    "Cor": {"weekdays": ["Gehele dag"], "weekends": []},
+    "Daan": {"weekdays": ["00:00-06:00", "18:00-23:00"], "weekends": []},
+    "Eva": {"weekdays": ["01:00-01:30", "07:00-09:00"], "weekends": []},
+}
+ACTIVITY = {"Anna": "Hoog", "Bram": "Gemiddeld", "Cor": "Laag", "Daan": "Hoog", "Eva": "Gemiddeld"}
+NUM_RUNS = 60
+TOPIC = {"id": 1, "title": "Test", "description": "Een onderwerp"}
+
+
+class FakeChatAgent():
+    """Geeft vaste berichten terug en noemt om de paar berichten iemand, zonder de globale random te gebruiken."""
+    def __init__(self):
+        self.calls = 0
+
+    def generate(self, prompt, system=None):
+        self.calls += 1
+        names = list(ONLINE_HOURS)
+        text = f"@{names[self.calls % len(names)]} wat vind jij?" if self.calls % 3 == 0 else "Eens."
+        return text, 0.0
+
+
+def make_personas():
+    return {
+        name: {
+            "name": name,
+            "Chat Activity Level": ACTIVITY[name],
+            "typical_online_hours": ONLINE_HOURS[name],
+            "writing_style": "kort",
+            "last_read_message_index": -1,
+            "message_cooldown_timer": 0,
+            "is_online": False,
+        }
+        for name in ONLINE_HOURS
+    }
+
+
+@pytest.fixture(autouse=True)
+def no_persona_prompts(monkeypatch):
+    # Het promptprofiel doet niet mee aan de kansen; zo zijn minimale persona's genoeg
+    def contexts(personas_data, topic):
+        return {name: "" for name in personas_data}
+    monkeypatch.setattr(chat_generation, "build_persona_contexts", contexts)
+    monkeypatch.setattr(event_simulation, "build_persona_contexts", contexts)
+
+
+def run_engine(engine, seed):
+    random.seed(seed)
+    personas = make_personas()
+    if engine == "event":
+        return run_event_simulation(personas, TOPIC, FakeChatAgent())
+    return chat_generation.run_simulation(personas, TOPIC, FakeChatAgent())
+
+
+def test_event_engine_matches_stepper_distribution():
+    counts = {}
+    shares = {}
+    for engine in ["stepper", "event"]:
+        runs = [run_engine(engine, seed) for seed in range(NUM_RUNS)]
+        counts[engine] = [len(messages) for messages in runs]
+        senders = [message["sender"] for messages in runs for message in messages]
+        shares[engine] = {name: senders.count(name) / len(senders) for name in ONLINE_HOURS}
+
+    stepper_mean, event_mean = statistics.mean(counts["stepper"]), statistics.mean(counts["event"])
+    standard_error = ((statistics.variance(counts["stepper"]) + statistics.variance(counts["event"])) / NUM_RUNS) ** 0.5
+    assert abs(stepper_mean - event_mean) < 3 * standard_error, (stepper_mean, event_mean)
+    for name in ONLINE_HOURS:
+        assert shares["stepper"][name] == pytest.approx(shares["event"][name], abs=0.03), name
+
+
+@pytest.mark.parametrize("engine", ["stepper", "event"])
+def test_messages_are_on_the_step_grid_and_from_online_personas(engine):
+    start_time = datetime.datetime.strptime(SIMULATION_START_TIME_STR, "%Y-%m-%d %H:%M:%S")
+    personas = make_personas()
+    for seed in range(5):
+        messages = run_engine(engine, seed)
+        assert messages
+        timestamps = [datetime.datetime.fromisoformat(message["timestamp"]) for message in messages]
+        assert timestamps == sorted(timestamps)
+        for message, timestamp in zip(messages, timestamps):
+            assert (timestamp - start_time) % datetime.timedelta(minutes=SIMULATION_STEP_MINUTES) == datetime.timedelta(0)
+            assert is_persona_online(personas[message["sender"]], timestamp), message
+
+
+def test_scale_probability_keeps_the_rate_per_minute():
+    assert scale_probability(0.2, SIMULATION_STEP_MINUTES) == 0.2
+    assert scale_probability(1.0, 1) == 1.0
+    for prob in [0.05, 0.17, 0.67]:
+        per_minute = scale_probability(prob, 1)
+        assert 1 - (1 - per_minute) ** SIMULATION_STEP_MINUTES == pytest.approx(prob)
@@ -0,0 +1,74 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("torch")
+
+import inference_scheduler
+from inference_scheduler import InferenceScheduler, generation_key
+
+KWARGS = {"max_length": 248, "num_beams": 4}
+
+
+class FakeEntry():
+    tokenizer = None
+    model = None
+
+
+class FakeRegistry():
+    def get(self, model_path):
+        return FakeEntry()
+
+
+@pytest.fixture
+def batches(monkeypatch):
+    """Vervangt de echte generatie; onthoudt per batch (teksten, generatie-instellingen, max_input_tokens)."""
+    calls = []
+
+    def fake_generate(tokenizer, model, texts, generation_kwargs, max_input_tokens=None):
+        calls.append((sorted(texts), generation_kwargs, max_input_tokens))
+        return [f"summary of {text}" for text in texts], len(texts), len(texts)
+
+    monkeypatch.setattr(inference_scheduler, "generate_batch_with_counts", fake_generate)
+    return calls
+
+
+def run_requests(requests, max_batch_size=8):
+    async def main():
+        scheduler = InferenceScheduler(FakeRegistry(), max_batch_size=max_batch_size, max_wait_ms=50)
+        await scheduler.start()
+        try:
+            return await asyncio.gather(*[scheduler.submit(*request) for request in requests])
+        finally:
+            await scheduler.stop()
+    return asyncio.run(main())
+
+
+def test_generation_key_includes_the_input_limit():
+    assert generation_key("m", KWARGS, 512) == generation_key("m", dict(reversed(list(KWARGS.items()))), 512)
+    assert generation_key("m", KWARGS, 512) != generation_key("m", KWARGS, 1024)
+    assert generation_key("m", KWARGS) != generation_key("m", KWARGS, 1024)
+
+
+def test_batches_by_model_kwargs_and_max_input_tokens(batches):
+    requests = [
+        ("m", "a", KWARGS, 512),
+        ("m", "b", KWARGS, 512),
+        ("m", "c", KWARGS, 1024),
+        ("m", "d", {**KWARGS, "num_beams": 1}, 512),
+        ("other", "e", KWARGS, 512),
+    ]
+    summaries = run_requests(requests)
+
+    assert summaries == [f"summary of {text}" for text in "abcde"]
+    assert sorted(batches, key=str) == sorted([
+        (["a", "b"], KWARGS, 512),
+        (["c"], KWARGS, 1024),
+        (["d"], {**KWARGS, "num_beams": 1}, 512),
+        (["e"], KWARGS, 512),
+    ], key=str)
+
+
+def test_respects_max_batch_size(batches):
+    run_requests([("m", str(i), KWARGS, None) for i in range(5)], max_batch_size=2)
+    assert sorted(len(texts) for texts, _, _ in batches) == [1, 2, 2]
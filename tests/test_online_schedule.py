@@ -0,0 +1,63 @@
+import datetime
+
+import numpy as np
+
+from chat_generation import is_persona_online
+from online_schedule import OnlineSchedule
+
+PERSONAS = {
+    "overdag": {"typical_online_hours": {"weekdays": ["09:00-12:30", "13:15-17:00"], "weekends": ["10:00-11:00"]}},
+    "nachtbraker": {"typical_online_hours": {"weekdays": ["22:00-02:00"], "weekends": ["23:30-00:15", "12:00-13:00"]}},
+    "altijd": {"typical_online_hours": {"weekdays": ["Gehele dag"], "weekends": ["Sporadisch online"]}},
+    "ongeldig": {"typical_online_hours": {"weekdays": ["25:00-26:00", "08:00-09:00"], "weekends": ["geen idee"]}},
+    "leeg_slot": {"typical_online_hours": {"weekdays": ["12:00-12:00"], "weekends": []}},
+    "zonder_uren": {},
+}
+# Maandag 00:00, zodat de sweep precies één week beslaat
+START = datetime.datetime(2025, 1, 6)
+
+
+def personas():
+    return {name: {**persona, "name": name} for name, persona in PERSONAS.items()}
+
+
+def test_online_mask_matches_is_persona_online_for_a_week():
+    data = personas()
+    schedule = OnlineSchedule(data)
+    for minute in range(0, 7 * 24 * 60, 7):
+        sim_time = START + datetime.timedelta(minutes=minute)
+        expected = [is_persona_online(data[name], sim_time) for name in schedule.names]
+        assert schedule.online_mask(sim_time).tolist() == expected, sim_time
+
+
+def test_slot_boundaries_and_wrap_around():
+    data = personas()
+    schedule = OnlineSchedule(data)
+    for time_str, name, online in [
+        ("2025-01-06 09:00", "overdag", True),
+        ("2025-01-06 12:30", "overdag", False),
+        ("2025-01-06 16:59", "overdag", True),
+        ("2025-01-06 17:00", "overdag", False),
+        # Een slot over middernacht telt aan beide kanten van dezelfde dag
+        ("2025-01-06 01:59", "nachtbraker", True),
+        ("2025-01-06 02:00", "nachtbraker", False),
+        ("2025-01-06 23:00", "nachtbraker", True),
+        ("2025-01-11 00:10", "nachtbraker", True),
+        ("2025-01-11 00:15", "nachtbraker", False),
+        ("2025-01-11 03:00", "altijd", True),
+        ("2025-01-06 08:30", "ongeldig", True),
+        ("2025-01-06 12:00", "leeg_slot", False),
+    ]:
+        sim_time = datetime.datetime.strptime(time_str, "%Y-%m-%d %H:%M")
+        assert schedule.is_online(name, sim_time) == online, (name, time_str)
+        assert is_persona_online(data[name], sim_time) == online, (name, time_str)
+
+
+def test_online_matrix_matches_online_mask():
+    schedule = OnlineSchedule(personas())
+    start_time = START + datetime.timedelta(days=4, hours=20)
+    matrix = schedule.online_matrix(start_time, num_steps=200, step_minutes=15)
+    assert matrix.shape == (len(PERSONAS), 200)
+    for step in range(200):
+        expected = schedule.online_mask(start_time + datetime.timedelta(minutes=15 * step))
+        assert np.array_equal(matrix[:, step], expected), step
@@ -0,0 +1,74 @@
+import pytest
+
+import rate_limiter
+from custom_exceptions import DailyLimitException
+from rate_limiter import RateLimiter
+
+
+class FakeClock():
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limiter.time, "time", clock)
+    return clock
+
+
+def make_limiter(tmp_path, requests_per_minute=6, requests_per_day=100):
+    return RateLimiter("test", requests_per_minute, requests_per_day, db_path=str(tmp_path / "rate_limits.sqlite"))
+
+
+def test_bucket_empties_and_refills(tmp_path, clock):
+    limiter = make_limiter(tmp_path, requests_per_minute=6)
+    assert [limiter.try_acquire() for _ in range(6)] == [0] * 6
+    # Leeg: het volgende token komt na 60 / rpm seconden
+    assert limiter.try_acquire() == pytest.approx(10)
+
+    clock.now += 5
+    assert limiter.try_acquire() == pytest.approx(5)
+    clock.now += 5
+    assert limiter.try_acquire() == 0
+    assert limiter.acquired == 7
+
+    # Na een lange pauze is de bucket weer vol, maar niet voller dan rpm
+    clock.now += 3600
+    assert limiter.remaining()["minute_remaining"] == 6
+
+
+def test_daily_limit_raises(tmp_path, clock):
+    limiter = make_limiter(tmp_path, requests_per_minute=60, requests_per_day=3)
+    for _ in range(3):
+        assert limiter.try_acquire() == 0
+    with pytest.raises(DailyLimitException):
+        limiter.try_acquire()
+    assert limiter.remaining()["day_remaining"] == 0
+
+
+def test_state_is_shared_through_the_database(tmp_path, clock):
+    first = make_limiter(tmp_path, requests_per_minute=2)
+    second = make_limiter(tmp_path, requests_per_minute=2)
+    assert first.try_acquire() == 0
+    assert second.try_acquire() == 0
+    assert first.try_acquire() > 0
+
+    second.exhaust_day()
+    with pytest.raises(DailyLimitException):
+        first.try_acquire()
+
+
+def test_backoff_blocks_every_caller(tmp_path, clock):
+    first = make_limiter(tmp_path)
+    second = make_limiter(tmp_path)
+    first.backoff(30)
+    assert second.try_acquire() == pytest.approx(30)
+
+    clock.now += 30
+    # De bucket is bij de backoff geleegd en heeft in 30 seconden 3 tokens bijgevuld
+    assert second.try_acquire() == 0
+    assert second.remaining()["minute_remaining"] == 2